@@ -1,212 +1,312 @@
+from startup import timer
+
 import eventlet
 eventlet.monkey_patch()
-
-import random
-from flask import Flask, session as flask_session
-from flask_sqlalchemy import SQLAlchemy
-from flask_socketio import SocketIO, emit, join_room, send, close_room
-from models import db, Player, Game, GameSession
-from collections import deque
-from typing import List, Tuple, Optional, Dict
+timer.mark("import eventlet + monkey_patch")
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from flask import Flask, current_app, jsonify, request, session as flask_session
+from flask_socketio import SocketIO, emit, join_room, send
+timer.mark("import flask, flask_socketio")
+from models import db, Player, Game, GAME_ID_COUNTER, PLAYER_ID_COUNTER
+from persistence import (ROUND_STATS, IdAllocator, PlayerIdCache, WriteBehind, create_missing_indexes,
+                         engine_options, install_sqlite_pragmas, player_id_for)
+timer.mark("import flask_sqlalchemy, models")
+from workers import BrokenProcessPool, PoolShutDown, submit_board, wait_for_board
+from board_pool import BoardPool, DIFFICULTIES
+from board_cache import board_fingerprint
+from game_state import GameState, IllegalMove
+from metrics import SolveMetrics
+from matchmaking import Matchmaker
+from usernames import UsernameAllocator
+from broadcast import DELIVERY_MODES, RoomBroadcaster, sub_room
+from scoring import SolutionScorer
+from snapshots import GameSnapshots
+from wire import ENCODINGS, decode_move, decode_moves, encode_board, encode_delta, encode_moves
+timer.mark("import game modules")
 
 # ----------------------------
 # Flask + DB + SocketIO Setup
 # ----------------------------
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///game.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-db.init_app(app)
-socketio = SocketIO(app, cors_allowed_origins="*")  # allow CORS for testing
-
-with app.app_context():
-    db.create_all()
-
-# ----------------------------
-# Random username generator
-# ----------------------------
-ADJECTIVES = ["Fast", "Red", "Clever", "Sneaky", "Brave", "Quick", "Fuzzy"]
-NOUNS = ["Tiger", "Robot", "Wizard", "Ninja", "Eagle", "Panther", "Fox"]
-
-def generate_unique_username():
-    while True:
-        adj = random.choice(ADJECTIVES)
-        noun = random.choice(NOUNS)
-        number = random.randint(0, 9999)
-        username = f"{adj}{noun}{number:04d}"
-
-        # Ensure uniqueness in DB
-        existing = Player.query.filter_by(username=username).first()
-        if not existing:
-            return username
-
-# Directions (dx, dy) and name
-DIRECTIONS = {
-    "Down": (0, 1),
-    "Up": (0, -1),
-    "Left": (-1, 0),
-    "Right": (1, 0),
-}
-
-def is_blocked_by_wall(grid: List[List[int]], x: int, y: int, dx: int, dy: int) -> bool:
-    """
-    Return True if movement from (x,y) to (x+dx, y+dy) is blocked by a wall (either current cell or target cell).
-    grid[y][x] uses bitmask: 1=N, 2=E, 4=S, 8=W
+# Importing this module only defines the handlers; create_app() builds the app
+# and its services, and ensure_ready() does the DB work on the first socket
+# connect. `python startup.py` (or STARTUP_TIMING=1) reports the cost of each phase.
+
+socketio = SocketIO()
+
+def load_config(app: Flask) -> None:
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///game.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", "10"))             # connections kept open
+    app.config["DB_BUSY_TIMEOUT"] = float(os.environ.get("DB_BUSY_TIMEOUT", "5.0"))   # seconds to wait for the write lock
+    app.config["WRITE_BEHIND_MAX"] = int(os.environ.get("WRITE_BEHIND_MAX", "10000"))  # queued events before joins block on a flush
+    app.config["WRITE_BEHIND_INTERVAL"] = float(os.environ.get("WRITE_BEHIND_INTERVAL", "0.05"))  # seconds between flushes
+    app.config["SOLVER"] = os.environ.get("SOLVER", "auto")  # key of solver.SOLVERS, or auto (solver.pick_solver)
+    app.config["BOARD_SOLVE_BUDGET"] = float(os.environ.get("BOARD_SOLVE_BUDGET", "2.0"))  # seconds per board
+    app.config["BOARD_TIME_LIMIT"] = float(os.environ.get("BOARD_TIME_LIMIT", "20.0"))  # seconds per game start
+    app.config["BOARD_STYLE"] = os.environ.get("BOARD_STYLE", "random")  # key of boards.BOARD_STYLES
+    app.config["BOARD_ROWS"] = int(os.environ.get("BOARD_ROWS", "10"))  # random boards only; classic is 16x16
+    app.config["BOARD_COLS"] = int(os.environ.get("BOARD_COLS", "10"))
+    app.config["BOARD_ROBOTS"] = int(os.environ.get("BOARD_ROBOTS", "3"))
+    app.config["BOARD_TARGET_TABLE"] = os.environ.get("BOARD_TARGET_TABLE", "1") == "1"  # pick targets from one all-targets search per layout
+    app.config["BROADCAST_WINDOW"] = float(os.environ.get("BROADCAST_WINDOW", "0.02"))  # seconds moves are coalesced, 0 = send at once
+    app.config["SCORING_INTERVAL"] = float(os.environ.get("SCORING_INTERVAL", "0.05"))  # seconds between scoring batches, 0 = score at once
+    app.config["RECONNECT_GRACE"] = float(os.environ.get("RECONNECT_GRACE", "30"))  # seconds a dropped player's seat is held, 0 = end the game at once
+    app.config["MAX_PLAYERS"] = int(os.environ.get("MAX_PLAYERS", "2"))  # default players per game
+    app.config["PLAYER_ID_CACHE"] = int(os.environ.get("PLAYER_ID_CACHE", "10000"))  # cached username -> Player.id entries
+    app.config["SOLVER_MAX_NODES"] = int(os.environ.get("SOLVER_MAX_NODES", "0")) or None  # expansions per board, 0 = no limit
+    app.config["BOARD_POOL_LOW"] = int(os.environ.get("BOARD_POOL_LOW", "2"))    # refill a bucket below this
+    app.config["BOARD_POOL_HIGH"] = int(os.environ.get("BOARD_POOL_HIGH", "6"))  # ...until it holds this many
+    app.config["SOLVED_BOARD_CACHE"] = os.environ.get("SOLVED_BOARD_CACHE", os.path.join(app.instance_path, "solved_boards.db"))
+    # Multi-worker deployments: redis://... URLs shared by every worker
+    app.config["MESSAGE_QUEUE"] = os.environ.get("MESSAGE_QUEUE")  # Socket.IO broadcasts between workers
+    app.config["SHARED_STATE_URL"] = os.environ.get("SHARED_STATE_URL", app.config["MESSAGE_QUEUE"])  # lobbies + boards (memory:// = in-process stand-in)
+
+def create_app(config: Optional[Dict] = None) -> Flask:
+    """Build the Flask app and this worker's services; `config` overrides the environment."""
+    global app, username_allocator, player_id_allocator, game_id_allocator, write_behind
+    global board_pool, solve_metrics, broadcaster, scorer, snapshots, matchmaker, shared_boards, player_ids
+
+    with timer.measure("create_app"):
+        app = Flask(__name__)
+        load_config(app)
+        app.config.update(config or {})
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+            app.config["SQLALCHEMY_DATABASE_URI"],
+            pool_size=app.config["DB_POOL_SIZE"],
+            busy_timeout=app.config["DB_BUSY_TIMEOUT"],
+        )
+        db.init_app(app)
+
+        socketio.init_app(app, cors_allowed_origins="*",  # allow CORS for testing
+                          message_queue=app.config["MESSAGE_QUEUE"])
+
+        username_allocator = UsernameAllocator()
+        player_id_allocator = IdAllocator(PLAYER_ID_COUNTER, Player.id)
+        game_id_allocator = IdAllocator(GAME_ID_COUNTER, Game.id)
+        player_ids = PlayerIdCache(app.config["PLAYER_ID_CACHE"])
+
+        # Game lifecycle rows are queued here and written in batches off the request path
+        write_behind = WriteBehind(
+            max_size=app.config["WRITE_BEHIND_MAX"],
+            flush_interval=app.config["WRITE_BEHIND_INTERVAL"],
+            on_player_id=update_player_id,
+        )
+
+        board_pool = BoardPool(
+            low=app.config["BOARD_POOL_LOW"],
+            high=app.config["BOARD_POOL_HIGH"],
+            board_kwargs={
+                "style": app.config["BOARD_STYLE"],
+                "rows": app.config["BOARD_ROWS"],
+                "cols": app.config["BOARD_COLS"],
+                "num_robots": app.config["BOARD_ROBOTS"],
+                "target_table": app.config["BOARD_TARGET_TABLE"],
+                "method": app.config["SOLVER"],
+                "board_budget": app.config["BOARD_SOLVE_BUDGET"],
+                "time_limit": app.config["BOARD_TIME_LIMIT"],
+                "cache_path": app.config["SOLVED_BOARD_CACHE"],
+                "max_nodes": app.config["SOLVER_MAX_NODES"],
+            },
+        )
+        solve_metrics = SolveMetrics()
+        scorer = SolutionScorer(get_game_state, socketio.emit, publish_ranking,
+                                interval=app.config["SCORING_INTERVAL"])
+
+        # Matchmaking lanes are (difficulty, max_players); with SHARED_STATE_URL set, lobbies,
+        # running boards and held seats live in Redis so every worker sees the same games
+        shared_boards = None
+        sub_rooms = None
+        if app.config["SHARED_STATE_URL"]:
+            from shared_state import SharedBoards, SharedMatchmaker, SharedSnapshots, SharedSubRooms, get_redis
+            shared_redis = get_redis(app.config["SHARED_STATE_URL"])
+            matchmaker = SharedMatchmaker(shared_redis)
+            shared_boards = SharedBoards(shared_redis)
+            sub_rooms = SharedSubRooms(shared_redis)
+            snapshots = SharedSnapshots(shared_redis, on_expired=expire_game, ttl=app.config["RECONNECT_GRACE"])
+        else:
+            matchmaker = Matchmaker()
+            snapshots = GameSnapshots(on_expired=expire_game, ttl=app.config["RECONNECT_GRACE"])
+        broadcaster = RoomBroadcaster(socketio.emit, window=app.config["BROADCAST_WINDOW"], sub_rooms=sub_rooms)
+
+        app.add_url_rule("/metrics", view_func=metrics)
+    timer.log("create_app")
+    return app
+
+def __getattr__(name: str):
+    # `app:app` and `server.app` build the default app on first access
+    if name == "app":
+        return create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def ensure_ready() -> None:
     """
-    rows = len(grid)
-    cols = len(grid[0])
-    nx, ny = x + dx, y + dy
-    # out of bounds treated as blocked
-    if not (0 <= nx < cols and 0 <= ny < rows):
-        return True
-
-    # moving Up (dy == -1): blocked if current has North or target has South
-    if dx == 0 and dy == -1:
-        return (grid[y][x] & 1) != 0 or (grid[ny][nx] & 4) != 0
-    # moving Down (dy == 1): blocked if current has South or target has North
-    if dx == 0 and dy == 1:
-        return (grid[y][x] & 4) != 0 or (grid[ny][nx] & 1) != 0
-    # moving Right (dx == 1): blocked if current has East or target has West
-    if dx == 1 and dy == 0:
-        return (grid[y][x] & 2) != 0 or (grid[ny][nx] & 8) != 0
-    # moving Left (dx == -1): blocked if current has West or target has East
-    if dx == -1 and dy == 0:
-        return (grid[y][x] & 8) != 0 or (grid[ny][nx] & 2) != 0
-
-    return True  # fallback: block
-
-def slide_until_block(grid: List[List[int]], start: Tuple[int,int],
-                     dx: int, dy: int, occupied: set) -> Tuple[int,int]:
+    First-use DB setup: SQLite pragmas, create_all and index checks, and the
+    write-behind engine. Runs once per app (so once per database), from the
+    first socket connect, inside the app context.
     """
-    Slide from start (x,y) along (dx,dy) until the next cell would be blocked by wall or occupied.
-    Return final (x,y).
-    """
-    x, y = start
-    rows = len(grid)
-    cols = len(grid[0])
-
-    while True:
-        nx, ny = x + dx, y + dy
-        # stop if out of bounds or wall between current and next
-        if not (0 <= nx < cols and 0 <= ny < rows):
-            break
-        if is_blocked_by_wall(grid, x, y, dx, dy):
-            break
-        # stop if occupied (there is a robot at next cell)
-        if (nx, ny) in occupied:
-            break
-        # otherwise move to nx,ny and continue
-        x, y = nx, ny
-
-    return (x, y)
-
-def encode_positions(positions: List[Tuple[int,int]]) -> Tuple[Tuple[int,int], ...]:
-    """Canonical encoding for visited set"""
-    return tuple(positions)
-
-def solve_board(board: Dict, rows = 10, cols = 10) -> Optional[List[Dict]]:
+    if current_app.extensions.get("game_ready"):
+        return
+    with timer.measure("first connect: schema + indexes"):
+        install_sqlite_pragmas(db.engine)  # before the first connection is opened
+        db.create_all()
+        create_missing_indexes()
+        write_behind.bind(db.engine)
+    current_app.extensions["game_ready"] = True
+    timer.log("first connect")
+
+# Services, set by create_app (None until it runs)
+username_allocator: Optional[UsernameAllocator] = None
+player_id_allocator: Optional[IdAllocator] = None
+game_id_allocator: Optional[IdAllocator] = None
+player_ids: Optional[PlayerIdCache] = None  # username -> Player.id of recent players
+write_behind: Optional[WriteBehind] = None
+board_pool: Optional[BoardPool] = None
+solve_metrics: Optional[SolveMetrics] = None
+broadcaster: Optional[RoomBroadcaster] = None
+scorer: Optional[SolutionScorer] = None
+snapshots: Optional[GameSnapshots] = None
+matchmaker: Optional[Matchmaker] = None  # or SharedMatchmaker
+shared_boards = None  # SharedBoards when SHARED_STATE_URL is set
+
+# Authoritative board state of every running game, by game id (None while its board is generated)
+game_states: Dict[int, Optional[GameState]] = {}
+# GameRound fields of every running game known at its start, by game id
+# (kept with the shared board instead when SHARED_STATE_URL is set)
+rounds: Dict[int, Dict] = {}
+
+# Player counts a client may ask for in join_game
+ALLOWED_MAX_PLAYERS = (2, 3, 4)
+
+def update_player_id(username: str, player_id: Optional[int]) -> None:
+    """Write-behind found `username` under another id (None: it has no row), see persistence.WriteBehind."""
+    if player_id is None:
+        player_ids.pop(username, None)
+    else:
+        player_ids[username] = player_id
+
+def known_player_id(username: str) -> Optional[int]:
+    """Player.id of `username`, cached or from the DB; None if no player has the name."""
+    player_id = player_ids.get(username)
+    return player_id if player_id is not None else player_id_for(username)
+
+def get_game_state(game_id) -> Optional[GameState]:
+    """This worker's GameState for a running game, built from the shared board if the game started elsewhere."""
+    state = game_states.get(game_id)
+    if shared_boards is None or game_id is None:
+        return state
+    if state is not None:
+        # the game may have ended on another worker, which only clears its own copy
+        if shared_boards.exists(game_id):
+            return state
+        del game_states[game_id]
+        return None
+    shared = shared_boards.get(game_id)
+    if shared is not None:
+        state = game_states[game_id] = GameState(shared["board"], shared["solution"])
+        state.best.update(shared_boards.bests(game_id))
+    return state
+
+def session_seat(data) -> Optional[Tuple[int, str]]:
     """
-    BFS solver.
-    board: dict with keys: 'rows','cols','grid' (2D int list), 'robots' (list of [y,x]),
-           'target' (y,x)
-    Returns list of moves: [{ 'robot': i, 'dir': 'Right', 'to': [y,x] }, ...] or None.
+    (game id, username) of this socket's seat, from its session (set by
+    join_game / resume_game), or None if it has none in the game the event names.
     """
-    grid = board["grid"]
-    robots = [tuple(r) for r in board["robots"]]  # list of (y, x)
-    target = tuple(board["target"])               # (y,x)
-    num_robots = len(robots)
-
-    # BFS queue: each node = (positions_list, moves_list)
-    start_positions = robots
-    start_key = encode_positions(start_positions)
-
-    q = deque()
-    q.append((start_positions, []))
-    visited = {start_key}
-
-    while q:
-        positions, moves = q.popleft()
-
-        # check if any robot at target
-        if any(pos == target for pos in positions):
-            # return moves as sequence of dicts
-            return moves
-
-        # for each robot, try sliding in each direction
-        for ridx in range(num_robots):
-            for dname, (dx, dy) in DIRECTIONS.items():
-                occupied = set(positions)  # set of occupied cells
-                start = positions[ridx]
-                new_pos = slide_until_block(grid, start, dx, dy, occupied)
-
-                # if no movement, skip
-                if new_pos == start:
-                    continue
-
-                # build new positions list
-                new_positions = list(positions)
-                new_positions[ridx] = new_pos
-                key = encode_positions(new_positions)
-                if key in visited:
-                    continue
-                visited.add(key)
-
-                # append move record
-                move_record = {
-                    "robot": ridx,
-                    "dir": dname,
-                    "to": [new_pos[0], new_pos[1]]
-                }
-                q.append((new_positions, moves + [move_record]))
-
-    # no solution
-    return None
-
-
-def generate_board(rows=10, cols=10, num_robots=3, wall_prob=0.1):
-    grid = [[0 for _ in range(cols)] for _ in range(rows)]
-
-    # Add random walls + borders
-    for y in range(rows):
-        for x in range(cols):
-            cell = 0
-            # North wall
-            if y == 0 or random.random() < wall_prob:
-                cell |= 1
-            # East wall
-            if x == cols - 1:
-                cell |= 2
-            # South wall
-            if y == rows - 1:
-                cell |= 4
-            # West wall
-            if x == 0 or random.random() < wall_prob:
-                cell |= 8
-            grid[y][x] = cell
-
-    # Place robots randomly
-    robots = []
-    for _ in range(num_robots):
-        while True:
-            rx, ry = random.randrange(cols), random.randrange(rows)
-            if (rx, ry) not in robots:  # don't stack robots
-                robots.append((rx, ry))
-                break
-
-    # Place target at least distance 3 from any robot
-    while True:
-        tx, ty = random.randrange(cols), random.randrange(rows)
-        if all(abs(tx - rx) + abs(ty - ry) >= 3 for (rx, ry) in robots):
-            target = (tx, ty)
-            break
+    game_id = flask_session.get("game_id")
+    username = flask_session.get("username")
+    if game_id is None or username is None:
+        return None
+    requested = data.get("game_id") if isinstance(data, dict) else None
+    if requested is not None and requested != game_id:
+        return None
+    return game_id, username
+
+def emit_encoded(event: str, room: str, payload: Dict, compact_payload: Dict) -> None:
+    """Send each client of a game room the payload in the encoding it negotiated in join_game."""
+    socketio.emit(event, payload, room=f"{room}:json")
+    socketio.emit(event, compact_payload, room=f"{room}:compact")
+
+def share_best(game_id, username: str, length: int) -> None:
+    """Let whichever worker ends the game see a verified solution length (see end_game)."""
+    if shared_boards is not None:
+        shared_boards.record_best(game_id, username, length)
+
+def publish_ranking(game_id: int, payload: Dict) -> None:
+    for entry in payload["ranking"]:
+        share_best(game_id, entry["username"], entry["length"])
+    broadcaster.push(f"game_{game_id}", "solution_ranking", payload)
+
+def close_game_rooms(room: str) -> None:
+    socketio.close_room(room)
+    for encoding in ENCODINGS:
+        socketio.close_room(f"{room}:{encoding}")
+        for mode in DELIVERY_MODES:
+            socketio.close_room(sub_room(room, encoding, mode))
+
+def join_game_rooms(room: str, encoding: str, delivery: str) -> None:
+    join_room(room)
+    join_room(f"{room}:{encoding}")
+    join_room(sub_room(room, encoding, delivery))
+    broadcaster.join(room, encoding, delivery)
+
+def client_options(data: Dict):
+    """(encoding, delivery mode) a client asked for in join_game / resume_game."""
+    encoding = data.get("encoding")
+    if encoding not in ENCODINGS:
+        encoding = "json"
+    return encoding, "batched" if data.get("batch_updates") is True else "each"
+
+def end_game(game_id, message: str) -> None:
+    """Drop a game everywhere and tell its room; also runs outside socket handlers."""
+    room = f"game_{game_id}"
+    state = game_states.pop(game_id, None)
+    started = rounds.pop(game_id, None)
+    bests = dict(state.best) if state is not None else {}
+    if shared_boards is not None:
+        # the game may have started and had moves on other workers; only the
+        # end that removes its shared entry writes the round
+        shared = shared_boards.get(game_id)
+        for username, length in shared_boards.bests(game_id).items():
+            bests[username] = min(length, bests.get(username, length))
+        shared_round = shared and shared.get("round")
+        if shared_boards.delete(game_id) and shared_round:
+            started = {**shared_round, "started_at": datetime.fromisoformat(shared_round["started_at"]),
+                       "board": encode_board(shared["board"])}
+    if started is not None:
+        lobby = matchmaker.lobby_of(game_id)
+        results = {username: bests.get(username) for username in (lobby.usernames if lobby else [])}
+        write_behind.put("round_finished", **started, ended_at=datetime.utcnow(),
+                         players=json.dumps(results), best_moves=min(bests.values(), default=None))
+    matchmaker.remove_game(game_id)
+    snapshots.forget(game_id)
+    if game_id is not None:
+        write_behind.put("game_ended", game_id=game_id)  # sessions + game
+
+    # Notify clients to clean up, after any updates still buffered for the room
+    broadcaster.close(room)
+    socketio.emit("end_game", {"message": message}, room=room)
+    close_game_rooms(room)
+
+def expire_game(game_id: int) -> None:
+    print(f"Reconnect grace over in game {game_id}")
+    end_game(game_id, "Game ended: a player didn't reconnect in time.")
 
-    return {
-        "rows": rows,
-        "cols": cols,
-        "grid": grid,       # 2D wall bitmask array
-        "robots": robots,   # list of robot coords
-        "target": target,   # (x,y) target position
-    }    
+# ----------------------------
+# Metrics
+# ----------------------------
+def metrics():
+    """GET /metrics"""
+    return jsonify({
+        "solver": solve_metrics.snapshot(),
+        "board_pool": board_pool.sizes(),
+        "board_pool_layout_targets": board_pool.layout_targets(),
+        "write_behind_queued": len(write_behind.events),
+        "scoring_queued": len(scorer.pending),
+        "player_ids_cached": len(player_ids),
+    })
 
 # ----------------------------
 # Socket: join game
@@ -214,81 +314,162 @@ def generate_board(rows=10, cols=10, num_robots=3, wall_prob=0.1):
 @socketio.on("join_game")
 def handle_join_game(data):
     """
-    Client emits: { "username": "Kevin" } (optional)
+    Client emits: { "username": "Kevin", "difficulty": "easy" | "medium" | "hard", "max_players": 2,
+                    "encoding": "json" | "compact", "batch_updates": false }
+    (all optional; see wire.py for the compact game_start / game_update payloads and
+    broadcast.py for batch_updates)
     """
     print("handling join_game with data:", data)
     username = data.get("username")
-    if not username:
-        username = generate_unique_username()
-
-    # 1️⃣ Create/find player
-    player = Player.query.filter_by(username=username).first()
-    if not player:
-        player = Player(username=username)
-        db.session.add(player)
-        db.session.commit()
-
-    # 2️⃣ Find waiting game
-    waiting_games = Game.query.filter_by(status="waiting").all()
-    game = next((g for g in waiting_games if len(g.players) < g.max_players), None)
-    if not game:
-        game = Game(status="waiting")
-        db.session.add(game)
-        db.session.commit()
-
-    # 3️⃣ Create session if not exists
-    session = GameSession.query.filter_by(player_id=player.id, game_id=game.id).first()
-    if not session:
-        session = GameSession(player_id=player.id, game_id=game.id)
-        db.session.add(session)
-        db.session.commit()
-
-    # 4️⃣ Join the socket room
-    room = f"game_{game.id}"
-    join_room(room)
+    difficulty = data.get("difficulty")
+    if difficulty not in DIFFICULTIES:
+        difficulty = None
+    generated = not username
+    if generated:
+        username = username_allocator.allocate()
+
+    max_players = data.get("max_players")
+    if max_players not in ALLOWED_MAX_PLAYERS:
+        max_players = current_app.config["MAX_PLAYERS"]
+    lane = (difficulty, max_players)
+
+    encoding, delivery = client_options(data)
+
+    # 1️⃣ Create/find player (ids are cached, so returning players skip the query)
+    player_id = player_ids.get(username)
+    if player_id is None or generated:
+        player_id = known_player_id(username)
+        while generated and player_id is not None:
+            # a client picked this name before a restart or in another worker
+            username = username_allocator.allocate()
+            player_id = known_player_id(username)
+        if player_id is None:
+            player_id = player_id_allocator.allocate()
+            write_behind.put("player_created", id=player_id, username=username)
+            if not generated:
+                username_allocator.reserve(username)
+        player_ids[username] = player_id
+
+    # 2️⃣ Find a waiting game in this lane (or open a new one) and seat the player;
+    # the rows are queued for write-behind, not written here
+    lobby = matchmaker.find_lobby(lane)
+    while True:
+        if lobby is None:
+            new_game_id = game_id_allocator.allocate()
+            write_behind.put("game_created", id=new_game_id, status="waiting", max_players=max_players)
+            lobby = matchmaker.open_lobby(new_game_id, lane, max_players)
+        seated = username in lobby.usernames
+        if matchmaker.add_player(lobby, username):
+            break
+        # another worker filled this lobby first
+        lobby = matchmaker.find_lobby(lane)
+    game_id = lobby.game_id
+    session_token = snapshots.issue(game_id, username, request.sid)
+    if not seated:
+        write_behind.put("session_created", player_id=player_id, game_id=game_id,
+                         session_token=session_token)
+    starting = lobby.full and matchmaker.claim_start(game_id)
+    if starting:
+        write_behind.put("game_started", game_id=game_id)
+
+    # 3️⃣ Join the socket room
+    room = f"game_{game_id}"
+    join_game_rooms(room, encoding, delivery)
 
     flask_session["username"] = username
-    flask_session["game_id"] = game.id
+    flask_session["game_id"] = game_id
+
+    # only this client learns the token it can resume_game with after a reconnect
+    emit("game_session", {"game_id": game_id, "username": username, "session_token": session_token})
 
     # send({"message": f"{username} joined the game!"}, to=room)
     emit("server_msg", {"message": f"{username} joined the game!"}, room=room)
 
-    # 5️⃣ Count sockets in the room
-    participants = socketio.server.manager.get_participants("/", room)
-    count = len(list(participants))
-
-    # 6️⃣ Emit waiting or start
-    if count >= game.max_players and game.status != "active":
-        print("Starting game", game.id, "with players:", [p.player.username for p in game.players])
-        game.status = "active"
-        db.session.commit()
-
-        # Keep generating until solvable
-        while True:
-            board = generate_board()
-            solution = solve_board(board)
-            if solution:  # non-empty solution found
-                break
-        
+    # 4️⃣ Count seated players
+    count = len(lobby.usernames)
+
+    # 5️⃣ Emit waiting or start
+    if starting:
+        print("Starting game", game_id, "with players:", lobby.usernames)
+        # None marks the board as in progress; leave_game pops it
+        game_states[game_id] = None
+
+        # Take a pre-solved board; if the pool ran dry, generate + solve one in
+        # the process pool and yield to other clients meanwhile
+        result = board_pool.pop(difficulty)
+        source = "pool"
+        layout = None
+        if result is None:
+            source = "on_demand"
+            min_moves, max_moves = DIFFICULTIES.get(difficulty, (1, None))
+            try:
+                future = submit_board(
+                    min_moves=min_moves,
+                    max_moves=max_moves,
+                    **board_pool.board_kwargs,
+                )
+            except (BrokenProcessPool, PoolShutDown) as e:
+                print("Board job not queued:", repr(e))
+                future = None  # the game ends below with an error the players can rejoin from
+            if future is not None:
+                result = wait_for_board(future, current_app.config["BOARD_TIME_LIMIT"] + 5, sleep=socketio.sleep)
+            if result is not None:
+                *result, layout = result
+        if result is None:
+            solve_metrics.record_failure(game_id)
+            end_game(game_id, "Could not generate a board, please rejoin.")
+            return
+        if game_id not in game_states or matchmaker.lobby_of(game_id) is None:
+            return  # everyone left while the board was being generated
+        board, solution, stats = result
+        solve_metrics.record_start(game_id, source, stats)
+        if layout:
+            board_pool.keep_layout(board_fingerprint(board), layout)  # its other targets can refill the pool
+
+        game_states[game_id] = GameState(board, solution)
+        compact_board = encode_board(board)
+        started = {
+            "game_id": game_id,
+            "started_at": datetime.utcnow(),
+            "difficulty": difficulty,
+            "max_players": lobby.max_players,
+            "source": source,
+            "optimal_moves": len(solution),
+            **{field: (stats or {}).get(field) for field in ROUND_STATS},
+        }
+        if shared_boards is not None:
+            shared_boards.put(game_id, board, solution,
+                              {**started, "started_at": started["started_at"].isoformat()})
+        else:
+            rounds[game_id] = {**started, "board": compact_board}
         print("Generated board with solution:", solution)
         print("Board:", board)
 
         second_username = username
 
-        socketio.emit("game_start", {
-            "game_id": game.id,
-            "players": [p.player.username for p in game.players],
+        start = {
+            "game_id": game_id,
+            "players": list(lobby.usernames),
             "second_username" : second_username,
+        }
+        emit_encoded("game_start", room, {
+            **start,
             "board": board,
             "solution": solution
-        }, room=room)
+        }, {
+            **start,
+            "board": compact_board,
+            "solution": encode_moves(solution),
+        })
     else:
-        print(f"Waiting for more players in game {game.id}: {count}/{game.max_players}")
+        print(f"Waiting for more players in game {game_id}: {count}/{lobby.max_players}")
         emit("game_waiting", {
-            "game_id": game.id,
+            "game_id": game_id,
             "username": username,
             "players_connected": count,
-            "players_needed": max(0, game.max_players - count)
+            "players_needed": max(0, lobby.max_players - count),
+            "encoding": encoding,
+            "batch_updates": delivery == "batched",
         })
 
 # ----------------------------
@@ -296,16 +477,60 @@ def handle_join_game(data):
 # ----------------------------
 @socketio.on("move")
 def handle_move(data):
-    game_id = data.get("game_id")
-    move = data.get("move")
+    """
+    Client emits: { "game_id": 1, "move": { "robot": 0, "dir": "Right" } }
+    or { "game_id": 1, "move": { "reset": true } } to restart from the initial robots.
+    Compact clients may send the move as one wire.encode_move byte.
+    """
+    if not isinstance(data, dict):
+        emit("move_rejected", {"reason": "expected { game_id, move }", "move": None})
+        return
+    move = data.get("move") or {}
+    if isinstance(move, bytes):
+        move = dict(zip(("robot", "dir"), decode_move(move[0]))) if len(move) == 1 else {}
+    if not isinstance(move, dict):
+        emit("move_rejected", {"reason": "move must be an object", "move": move})
+        return
+    seat = session_seat(data)
+    if seat is None:
+        emit("move_rejected", {"reason": "not seated in this game", "move": move})
+        return
+    game_id, username = seat
     room = f"game_{game_id}"
-    emit("game_update", {"move": move}, room=room)
+
+    state = get_game_state(game_id)
+    if state is None:
+        emit("move_rejected", {"reason": "no running game", "move": move})
+        return
+
+    if move.get("reset"):
+        state.reset(username)
+        broadcaster.push(room, "game_update", {"username": username, "move": {"reset": True}})
+        return
+
+    try:
+        delta = state.apply_move(username, move.get("robot"), move.get("dir"))
+    except IllegalMove as e:
+        emit("move_rejected", {"reason": str(e), "move": move})
+        return
+    if delta["solved"]:
+        share_best(game_id, username, delta["moves"])
+
+    broadcaster.push(room, "game_update",
+                     {"username": username, "move": delta},
+                     {"username": username, "move": encode_delta(delta, state.ctx.cols)})
 
 # ----------------------------
 # Socket: connect
 # ----------------------------
 @socketio.on("connect")
 def handle_connect():
+    ensure_ready()
+    board_pool.start(socketio.start_background_task, socketio.sleep)
+    broadcaster.start(socketio.start_background_task, socketio.sleep)
+    write_behind.start(socketio.start_background_task, socketio.sleep)
+    scorer.start(socketio.start_background_task, socketio.sleep)
+    snapshots.start(socketio.start_background_task, socketio.sleep)
     emit("server_msg", {"message": "Welcome!"})
 
 @socketio.on("leave_game")
@@ -319,39 +544,136 @@ def handle_leave_game(data):
     emit("server_msg", {"message": f"{username} has left the game."}, room=room)
 
     # End the game completely
-    game = db.session.get(Game, game_id)
-    if game:
-        db.session.delete(game)  # this should cascade delete sessions + players if you configure it
-        db.session.commit()
-
-    # Notify clients to clean up
-    emit("end_game", {"message": "Game ended due to player leaving."}, room=room)
-    close_room(room)
+    end_game(game_id, "Game ended due to player leaving.")
 
 @socketio.on("update_best_solution")
 def handle_update_best_solution(data):
-    username = data.get("username")
-    game_id = data.get("game_id")
-    currentSolutionLength = data.get("current_solution_length")
-
-    # Broadcast to all players in the game room
+    # only ever publish for the session's own seat
+    seat = session_seat(data)
+    currentSolutionLength = data.get("current_solution_length") if isinstance(data, dict) else None
+    if seat is None:
+        emit("solution_rejected", {
+            "reason": "not seated in this game",
+            "current_solution_length": currentSolutionLength,
+            "verified_solution_length": None,
+        })
+        return
+    game_id, username = seat
+    if currentSolutionLength is not None and (
+            not isinstance(currentSolutionLength, int) or isinstance(currentSolutionLength, bool)):
+        emit("solution_rejected", {
+            "reason": "current_solution_length must be an integer",
+            "current_solution_length": currentSolutionLength,
+            "verified_solution_length": None,
+        })
+        return
+
+    # Only lengths the server has seen the player reach count
+    state = get_game_state(game_id)
+    if state is not None:
+        verified = state.best_length(username)
+        if verified is None or (currentSolutionLength is not None and currentSolutionLength < verified):
+            emit("solution_rejected", {
+                "current_solution_length": currentSolutionLength,
+                "verified_solution_length": verified,
+            })
+            return
+        currentSolutionLength = verified
+
+    # Broadcast to all players in the game room (merged per player per broadcast window)
     room = f"game_{game_id}"
-    emit("improved_solution_update", {
+    broadcaster.push_best(room, username, {
         "username": username,
         "current_solution_length": currentSolutionLength,
-    }, room=room)
+    })
+
+@socketio.on("submit_solution")
+def handle_submit_solution(data):
+    """
+    Client emits: { "game_id": 1, "moves": [ { "robot": 0, "dir": "Right" }, ... ] }
+    with the whole solution from the starting robots (compact clients may send
+    wire.encode_moves bytes). Scored in the next batch, see scoring.py.
+    """
+    if not isinstance(data, dict):
+        emit("solution_rejected", {"game_id": None, "reason": "expected { game_id, moves }",
+                                   "verified_solution_length": None})
+        return
+    moves = data.get("moves")
+    if isinstance(moves, bytes):
+        moves = decode_moves(moves)
+    seat = session_seat(data)
+    reason = None
+    if not isinstance(moves, list):
+        reason = "moves must be a list"
+    elif seat is None:
+        reason = "not seated in this game"
+    elif get_game_state(seat[0]) is None:
+        reason = "no running game"
+    if reason is not None:
+        emit("solution_rejected", {
+            "game_id": data.get("game_id"),
+            "reason": reason,
+            "verified_solution_length": None,
+        })
+        return
+    game_id, username = seat
+    scorer.submit(game_id, username, request.sid, moves)
 
 @socketio.on("disconnect")
 def handle_disconnect(data):
     print(f"Client disconnected {data}")
-    handle_leave_game({
-        "game_id": flask_session.get("game_id"),
-        "username": flask_session.get("username")
-    })
+    game_id = flask_session.get("game_id")
+    username = flask_session.get("username")
+    if not snapshots.is_current(game_id, username, request.sid):
+        return  # the player already resumed on a newer socket
+    if snapshots.ttl and get_game_state(game_id) is not None:
+        # running game: hold the seat, see snapshots.py
+        snapshots.drop(game_id, username, get_game_state(game_id).progress(username))
+        emit("player_dropped", {"username": username, "resume_seconds": snapshots.ttl},
+             room=f"game_{game_id}")
+    else:
+        handle_leave_game({"game_id": game_id, "username": username})
     emit("server_msg", {"message": f"A user has disconnected. {data}"}, broadcast=True)
 
+@socketio.on("resume_game")
+def handle_resume_game(data):
+    """
+    Client emits: { "session_token": "...", "encoding": "json" | "compact", "batch_updates": false }
+    on a new socket, with the token from its game_session event. The game goes
+    on from the server's state, without a new board:
+    game_resumed { game_id, username, players, board, solution, robots, moves, best }
+    """
+    seat = snapshots.lookup(data.get("session_token"))
+    state = get_game_state(seat[0]) if seat is not None else None
+    if state is None:
+        emit("resume_rejected", {"reason": "no running game for this session"})
+        return
+    game_id, username = seat
+    encoding, delivery = client_options(data)
+    progress = snapshots.progress(game_id, username)
+    if progress is not None:
+        state.restore(username, progress)  # the seat was dropped on another worker
+    snapshots.resume(game_id, username, request.sid)
+
+    room = f"game_{game_id}"
+    join_game_rooms(room, encoding, delivery)
+    flask_session["username"] = username
+    flask_session["game_id"] = game_id
+
+    lobby = matchmaker.lobby_of(game_id)
+    compact = encoding == "compact"
+    emit("game_resumed", {
+        "game_id": game_id,
+        "username": username,
+        "players": list(lobby.usernames) if lobby is not None else [],
+        "board": encode_board(state.board) if compact else state.board,
+        "solution": encode_moves(state.solution) if compact else state.solution,
+        **state.snapshot(username),
+    })
+    emit("player_resumed", {"username": username}, room=room, include_self=False)
+
 # ----------------------------
 # Run server
 # ----------------------------
 if __name__ == "__main__":
-    socketio.run(app, debug=True, port=5000)
+    socketio.run(create_app(), debug=True, port=5000)
@@ -0,0 +1,157 @@
+from array import array
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # in requirements.txt; solve_boards falls back to solve_board without it
+    np = None
+
+from solver import prepare_search, rebuild_moves, solve_board
+
+# ----------------------------
+# Batch BFS over many boards at once
+# ----------------------------
+# Boards use the same dict format as solver.solve_board. Boards with the same
+# (rows, cols, robot count) are solved together: each BFS level is expanded
+# for every board in one set of NumPy array operations, so the per-node Python
+# overhead of solve_board is paid once per level instead of once per state.
+
+def solve_boards(boards: List[Dict]) -> List[Optional[List[Dict]]]:
+    """
+    Optimal solutions for a list of boards, in input order (None = unsolvable).
+    Falls back to one solve_board call per board when NumPy isn't installed.
+    """
+    if np is None:
+        return [solve_board(board) for board in boards]
+
+    results: List[Optional[List[Dict]]] = [None] * len(boards)
+    groups: Dict[tuple, List[int]] = {}
+    for i, board in enumerate(boards):
+        shape = (len(board["grid"]), len(board["grid"][0]), len(board["robots"]))
+        groups.setdefault(shape, []).append(i)
+
+    for indices in groups.values():
+        solutions = _solve_group([boards[i] for i in indices])
+        for i, solution in zip(indices, solutions):
+            results[i] = solution
+    return results
+
+def solution_lengths(boards: List[Dict]) -> List[Optional[int]]:
+    """Optimal move counts for a list of boards (None = unsolvable)."""
+    return [None if s is None else len(s) for s in solve_boards(boards)]
+
+def _pack(cells: "np.ndarray", bits: int) -> "np.ndarray":
+    """Row-wise pack_positions for rows of robot cells that are already sorted."""
+    shifts = np.arange(cells.shape[1], dtype=np.int64) * bits
+    return (cells.astype(np.int64) << shifts).sum(axis=1)
+
+def _solve_group(boards: List[Dict]) -> List[Optional[List[Dict]]]:
+    """Level-synchronous BFS over boards that share rows, cols and robot count."""
+    ctxs = [prepare_search(board) for board in boards]
+    cols = ctxs[0].cols
+    bits = ctxs[0].bits
+    num_robots = len(ctxs[0].robots)
+    state_bits = bits * num_robots
+
+    # stops[b, d, cell] = wall-only stop; steps[d] = cell offset of direction d
+    stops = np.array([[d_stops for _, _, d_stops in ctx.moves] for ctx in ctxs], dtype=np.int64)
+    steps = [step for _, step, _ in ctxs[0].moves]
+    targets = np.array([ctx.target for ctx in ctxs], dtype=np.int64)
+
+    results: List[Optional[List[Dict]]] = [None] * len(boards)
+    done = np.zeros(len(boards), dtype=bool)
+
+    # frontier rows: board index, robot cells (sorted), and per-level history
+    # of (key, parent row in previous level, direction) for rebuilding paths
+    start = np.array([sorted(ctx.robots) for ctx in ctxs], dtype=np.int64)
+    board_idx = np.arange(len(boards), dtype=np.int64)
+    cells = start
+    for b, ctx in enumerate(ctxs):
+        if ctx.target in ctx.robots:
+            results[b] = []
+            done[b] = True
+    keep = ~done
+    board_idx, cells = board_idx[keep], cells[keep]
+    keys = (board_idx << state_bits) | _pack(cells, bits)
+    visited = np.sort(keys)
+    levels = [(keys, np.full(len(keys), -1, dtype=np.int64), np.zeros(len(keys), dtype=np.int64))]
+
+    while len(board_idx):
+        child_board, child_cells, child_parent, child_dir = [], [], [], []
+        rows = np.arange(len(board_idx), dtype=np.int64)
+
+        for ridx in range(num_robots):
+            cell = cells[:, ridx]
+            for didx, step in enumerate(steps):
+                end = stops[board_idx, didx, cell]
+                # same robot-blocker rule as solver.slide_cell, one column at a time
+                for other_idx in range(num_robots):
+                    if other_idx == ridx:
+                        continue
+                    other = cells[:, other_idx]
+                    if step > 0:
+                        hit = (cell < other) & (other <= end)
+                    else:
+                        hit = (end <= other) & (other < cell)
+                    if abs(step) != 1:
+                        hit &= (other - cell) % cols == 0
+                    end = np.where(hit, other - step, end)
+
+                moved = end != cell
+                new_cells = cells[moved].copy()
+                new_cells[:, ridx] = end[moved]
+                child_board.append(board_idx[moved])
+                child_cells.append(new_cells)
+                child_parent.append(rows[moved])
+                child_dir.append(np.full(int(moved.sum()), didx, dtype=np.int64))
+
+        child_board = np.concatenate(child_board)
+        child_cells = np.sort(np.concatenate(child_cells), axis=1)
+        child_parent = np.concatenate(child_parent)
+        child_dir = np.concatenate(child_dir)
+        child_keys = (child_board << state_bits) | _pack(child_cells, bits)
+
+        # drop states seen on earlier levels, then duplicates within this level
+        pos = np.searchsorted(visited, child_keys)
+        seen = (pos < len(visited)) & (visited[np.minimum(pos, len(visited) - 1)] == child_keys)
+        fresh = ~seen
+        child_keys, first = np.unique(child_keys[fresh], return_index=True)
+        child_board = child_board[fresh][first]
+        child_cells = child_cells[fresh][first]
+        child_parent = child_parent[fresh][first]
+        child_dir = child_dir[fresh][first]
+        # both halves are sorted and disjoint; a stable sort merges the two runs
+        visited = np.sort(np.concatenate((visited, child_keys)), kind="stable")
+        levels.append((child_keys, child_parent, child_dir))
+
+        # boards with a robot on the target are solved at this depth
+        reached = (child_cells == targets[child_board][:, None]).any(axis=1)
+        for row in np.flatnonzero(reached):
+            b = int(child_board[row])
+            if not done[b]:
+                done[b] = True
+                results[b] = _rebuild(levels, int(row), ctxs[b])
+
+        keep = ~done[child_board]
+        board_idx, cells = child_board[keep], child_cells[keep]
+        # keep history rows aligned with the trimmed frontier
+        keys, parents, dirs = levels[-1]
+        levels[-1] = (keys[keep], parents[keep], dirs[keep])
+
+    return results
+
+def _rebuild(levels, row: int, ctx) -> List[Dict]:
+    """Follow parent rows back to level 0 and replay them with solver.rebuild_moves."""
+    mask = (1 << (ctx.bits * len(ctx.robots))) - 1
+    path = []
+    for depth in range(len(levels) - 1, -1, -1):
+        keys, parents, dirs = levels[depth]
+        path.append((int(keys[row]) & mask, int(dirs[row])))
+        row = int(parents[row])
+    path.reverse()
+
+    states = array("Q", [state for state, _ in path])
+    parents = array("l", [-1] + list(range(len(path) - 1)))
+    dirs = array("B", [d for _, d in path])
+    return rebuild_moves(states, parents, dirs, len(path) - 1,
+                         ctx.robots, len(ctx.robots), ctx.bits, ctx.cols)
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from boards import generate_board
+from game_state import GameState
+from solver import solve_board
+
+pytest.importorskip("numpy")  # batch_solver falls back to solve_board without it
+from batch_solver import solution_lengths, solve_boards
+
+def corpus():
+    """Seeded random boards of mixed shapes, an already solved one and an unsolvable one."""
+    rng_state = random.getstate()
+    random.seed(8)
+    boards = [generate_board(rows, cols, robots, 0.15)
+              for rows, cols, robots in [(5, 5, 2), (6, 6, 2), (6, 6, 3), (8, 8, 2), (6, 8, 2)] * 4]
+    random.setstate(rng_state)
+
+    solved = generate_board(6, 6, 2, 0.15)
+    solved["target"] = list(solved["robots"][1])
+    walled = generate_board(6, 6, 2, 0.15)
+    tx, ty = walled["target"]
+    walled["grid"][ty][tx] = 15  # walls on every side: no robot can stop there
+    return boards[:7] + [solved] + boards[7:14] + [walled] + boards[14:]
+
+def test_batch_lengths_match_solve_board():
+    boards = corpus()
+    expected = [None if s is None else len(s) for s in map(solve_board, boards)]
+    assert expected[7] == 0 and expected[15] is None
+    assert solution_lengths(boards) == expected
+
+def test_batch_solutions_replay_on_their_boards():
+    boards = corpus()
+    for board, solution in zip(boards, solve_boards(boards)):
+        if solution:
+            assert GameState(board).replay(solution) == len(solution)
@@ -0,0 +1,174 @@
+"""
+Solver and matchmaking benchmarks.
+
+    python benchmarks.py                          # run and print JSON results
+    python benchmarks.py --output bench.json      # also write them to a file
+    python benchmarks.py --compare bench_baseline.json --tolerance 0.15
+
+Every run uses the same seeded board corpus, so numbers are comparable between
+commits on the same machine. --compare exits with status 1 when a metric got
+worse than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from boards import generate_board, generate_classic_board
+from solver import SOLVERS, SolverStats, solve_board
+
+SEED = 1234
+
+# (name, rows, cols, num_robots, wall_prob, boards)
+CORPUS = [
+    ("8x8-r2-w0.10", 8, 8, 2, 0.10, 40),
+    ("10x10-r2-w0.10", 10, 10, 2, 0.10, 40),
+    ("10x10-r3-w0.05", 10, 10, 3, 0.05, 10),
+    ("10x10-r3-w0.10", 10, 10, 3, 0.10, 10),
+    ("10x10-r3-w0.20", 10, 10, 3, 0.20, 10),
+    ("16x16-r2-w0.10", 16, 16, 2, 0.10, 20),
+]
+
+# classic quadrant-tile boards: (name, num_robots, boards)
+CLASSIC_CORPUS = [
+    ("classic-r4", 4, 20),
+    ("classic-r5", 5, 10),
+]
+
+def build_corpus(seed: int = SEED, scale: float = 1.0) -> Dict[str, List[Dict]]:
+    """Deterministic boards for every CORPUS entry."""
+    random.seed(seed)
+    corpus = {
+        name: [generate_board(rows, cols, robots, wall_prob) for _ in range(max(1, int(count * scale)))]
+        for name, rows, cols, robots, wall_prob, count in CORPUS
+    }
+    for name, robots, count in CLASSIC_CORPUS:
+        corpus[name] = [generate_classic_board(robots) for _ in range(max(1, int(count * scale)))]
+    return corpus
+
+def bench_solvers(corpus: Dict[str, List[Dict]], methods: List[str]) -> Dict[str, float]:
+    """Throughput, states/sec and peak memory per corpus entry and solver engine."""
+    metrics = {}
+    for method in methods:
+        for name, boards in corpus.items():
+            stats = SolverStats()
+            started = time.perf_counter()
+            for board in boards:
+                solve_board(board, method=method, stats=stats)
+            elapsed = time.perf_counter() - started
+
+            # memory is measured in a second pass: tracemalloc slows solving down
+            peak = 0
+            for board in boards:
+                tracemalloc.start()
+                solve_board(board, method=method)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            prefix = f"solver.{method}.{name}"
+            metrics[f"{prefix}.boards_per_sec"] = len(boards) / elapsed
+            metrics[f"{prefix}.states_per_sec"] = stats.expanded / elapsed
+            metrics[f"{prefix}.peak_memory_kb"] = peak / 1024
+            print(f"{prefix}: {len(boards) / elapsed:.1f} boards/s, "
+                  f"{stats.expanded / elapsed:.0f} states/s, {peak / 1024:.0f} KiB peak", file=sys.stderr)
+    return metrics
+
+def bench_join(games: int = 20) -> Dict[str, float]:
+    """
+    End-to-end join_game -> game_start latency through the Flask-SocketIO test
+    client, against a throwaway SQLite DB and a warmed board pool.
+    """
+    db_dir = tempfile.mkdtemp(prefix="bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'game.db')}"
+    os.environ.setdefault("SOLVED_BOARD_CACHE", os.path.join(db_dir, "solved_boards.db"))
+    import app as server  # imported late: monkey-patches eventlet and opens the DB
+
+    first = server.socketio.test_client(server.app)
+    deadline = time.monotonic() + 30
+    while min(server.board_pool.sizes().values()) < server.board_pool.low and time.monotonic() < deadline:
+        server.socketio.sleep(0.1)
+    first.disconnect()
+
+    latencies = []
+    for i in range(games):
+        a = server.socketio.test_client(server.app)
+        b = server.socketio.test_client(server.app)
+        a.emit("join_game", {"username": f"bench_a{i}"})
+        started = time.perf_counter()
+        b.emit("join_game", {"username": f"bench_b{i}"})
+        received = b.get_received()
+        latencies.append(time.perf_counter() - started)
+        start = next(e for e in received if e["name"] == "game_start")
+        a.emit("leave_game", {"game_id": start["args"][0]["game_id"], "username": f"bench_a{i}"})
+        a.disconnect()
+        b.disconnect()
+
+    latencies.sort()
+    return {
+        "join.p50_ms": statistics.median(latencies) * 1000,
+        "join.p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_sec")
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Metrics that are worse than the baseline by more than `tolerance` (a fraction)."""
+    regressions = []
+    for metric, base in sorted(baseline["metrics"].items()):
+        current = results["metrics"].get(metric)
+        if current is None or not base:
+            continue
+        change = (current - base) / base
+        worse = change < -tolerance if higher_is_better(metric) else change > tolerance
+        flag = "REGRESSION" if worse else "ok"
+        print(f"{flag:10} {metric}: {base:.2f} -> {current:.2f} ({change:+.1%})", file=sys.stderr)
+        if worse:
+            regressions.append(metric)
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown (default 0.15)")
+    parser.add_argument("--methods", nargs="+", default=sorted(SOLVERS), help="solver engines to run")
+    parser.add_argument("--scale", type=float, default=1.0, help="fraction of the corpus to run")
+    parser.add_argument("--join-games", type=int, default=20, help="games for the join benchmark (0 = skip)")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "seed": SEED,
+            "scale": args.scale,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.time(),
+        },
+        "metrics": bench_solvers(build_corpus(SEED, args.scale), args.methods),
+    }
+    if args.join_games:
+        results["metrics"].update(bench_join(args.join_games))
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from solver import AUTO_SOLVER, DIRECTIONS, SolverStats, solve_board
+from symmetry import SYMMETRIES, Symmetry, inverse, transform_board, transform_cell, transform_vector
+
+# ----------------------------
+# Solved-board cache
+# ----------------------------
+# Content-addressed: the key is a hash of the board itself, so the same board
+# generated twice, replayed or re-validated never goes through the solver again.
+# Boards are stored in canonical form: the rotation or mirror image that
+# serializes smallest, robots sorted by cell (any robot may finish on the
+# target, so their order doesn't matter). Rotated, mirrored and robot-permuted
+# copies of a board share one entry, and its solution is mapped back per lookup.
+DEFAULT_CACHE_PATH = os.path.join("instance", "solved_boards.db")
+
+DIRECTION_NAMES = {vector: name for name, vector in DIRECTIONS.items()}
+
+def _serialize(board: Dict) -> str:
+    return json.dumps(
+        [board["grid"], [list(r) for r in board["robots"]], list(board["target"])],
+        separators=(",", ":"),
+    )
+
+def canonical_form(board: Dict) -> Tuple[Dict, Symmetry, List[int]]:
+    """
+    (canonical board, symmetry that maps the board onto it, robot order), where
+    order[i] is the board's index of the canonical board's robot i.
+    """
+    best = None
+    for sym in SYMMETRIES:
+        image = transform_board(board, sym)
+        order = sorted(range(len(image["robots"])), key=lambda i: image["robots"][i][::-1])
+        image["robots"] = [image["robots"][i] for i in order]
+        serialized = _serialize(image)
+        if best is None or serialized < best[0]:
+            best = (serialized, image, sym, order)
+    return best[1], best[2], best[3]
+
+def _digest(canonical: Dict) -> str:
+    return hashlib.blake2b(_serialize(canonical).encode(), digest_size=16).hexdigest()
+
+def board_fingerprint(board: Dict) -> str:
+    """Hash of a board's canonical form, the same for all its symmetric copies."""
+    return _digest(canonical_form(board)[0])
+
+def map_solution(solution: List[Dict], sym: Symmetry, rows: int, cols: int,
+                 robot_index: List[int]) -> List[Dict]:
+    """A solution on a rows x cols board as the same moves on its image under `sym`,
+    with robot i renumbered to robot_index[i]."""
+    mapped = []
+    for move in solution:
+        x, y = transform_cell(sym, *move["to"], rows, cols)
+        mapped.append({
+            "robot": robot_index[move["robot"]],
+            "dir": DIRECTION_NAMES[transform_vector(sym, *DIRECTIONS[move["dir"]])],
+            "to": [x, y],
+        })
+    return mapped
+
+class SolutionCache:
+    """
+    LRU dict of recently used boards in front of a SQLite table that keeps every
+    solved board. Unsolvable boards are cached too (solution None).
+    Entries are dicts: { "board": ..., "solution": [...] or None }, stored in
+    canonical form; get() returns them for the board that was asked for.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, capacity: int = 1024):
+        self.capacity = capacity
+        self.memory: "OrderedDict[str, Dict]" = OrderedDict()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # several worker processes write here, so let SQLite wait for the lock
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS solved_board (
+                fingerprint TEXT PRIMARY KEY,
+                board TEXT NOT NULL,
+                solution TEXT,
+                moves INTEGER
+            )
+        """)
+        self.conn.commit()
+
+    def _remember(self, fingerprint: str, entry: Dict) -> None:
+        self.memory[fingerprint] = entry
+        self.memory.move_to_end(fingerprint)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def _lookup(self, fingerprint: str) -> Optional[Dict]:
+        entry = self.memory.get(fingerprint)
+        if entry is not None:
+            self.memory.move_to_end(fingerprint)
+            return entry
+
+        row = self.conn.execute(
+            "SELECT board, solution FROM solved_board WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = {"board": json.loads(row[0]), "solution": json.loads(row[1])}
+        self._remember(fingerprint, entry)
+        return entry
+
+    def get(self, board: Dict) -> Optional[Dict]:
+        """Cached entry for this board or any symmetric copy, or None if it was never solved."""
+        canonical, sym, order = canonical_form(board)
+        entry = self._lookup(_digest(canonical))
+        if entry is None:
+            return None
+        solution = entry["solution"]
+        if solution is not None:
+            solution = map_solution(solution, inverse(sym), canonical["rows"], canonical["cols"], order)
+        return {"board": board, "solution": solution}
+
+    def put(self, board: Dict, solution: Optional[List[Dict]]) -> None:
+        """Store a board with its optimal solution (None = unsolvable)."""
+        canonical, sym, order = canonical_form(board)
+        fingerprint = _digest(canonical)
+        if solution is not None:
+            grid = board["grid"]
+            solution = map_solution(solution, sym, len(grid), len(grid[0]),
+                                    [order.index(i) for i in range(len(order))])
+        self._remember(fingerprint, {"board": canonical, "solution": solution})
+        self.conn.execute(
+            "INSERT OR REPLACE INTO solved_board (fingerprint, board, solution, moves) VALUES (?, ?, ?, ?)",
+            (fingerprint, json.dumps(canonical), json.dumps(solution),
+             None if solution is None else len(solution)),
+        )
+        self.conn.commit()
+
+# One cache per path per process: sqlite connections can't be shared with
+# (or pickled into) the worker processes, so each process opens its own.
+_caches: Dict[str, SolutionCache] = {}
+
+def get_cache(path: str = DEFAULT_CACHE_PATH) -> SolutionCache:
+    if path not in _caches:
+        _caches[path] = SolutionCache(path)
+    return _caches[path]
+
+def solve_cached(board: Dict, cache: SolutionCache, method: str = AUTO_SOLVER,
+                 deadline: Optional[float] = None, stats: Optional[SolverStats] = None,
+                 max_nodes: Optional[int] = None) -> Optional[List[Dict]]:
+    """solve_board through the cache; an aborted solve is not cached and its SolveAborted propagates."""
+    entry = cache.get(board)
+    if entry is not None:
+        return entry["solution"]
+    solution = solve_board(board, method=method, deadline=deadline, stats=stats, max_nodes=max_nodes)
+    cache.put(board, solution)
+    return solution
@@ -0,0 +1,48 @@
+import pytest
+
+import board_cache
+from board_cache import SolutionCache, board_fingerprint, solve_cached
+from boards import generate_board
+from game_state import GameState
+from symmetry import SYMMETRIES, transform_board
+
+@pytest.fixture
+def cache(tmp_path):
+    return SolutionCache(str(tmp_path / "solved_boards.db"))
+
+def permuted(board, order):
+    return {**board, "robots": [board["robots"][i] for i in order]}
+
+def test_symmetric_copies_share_one_entry(board):
+    fingerprint = board_fingerprint(board)
+    for sym in SYMMETRIES:
+        assert board_fingerprint(transform_board(board, sym)) == fingerprint
+    assert board_fingerprint(permuted(board, [2, 0, 1])) == fingerprint
+    assert board_fingerprint({**board, "target": [4, 7]}) != fingerprint
+
+@pytest.mark.parametrize("sym", SYMMETRIES)
+def test_lookup_maps_the_solution_onto_the_asked_board(cache, board, solution, sym):
+    cache.put(board, solution)
+    image = permuted(transform_board(board, sym), [1, 2, 0])
+    entry = cache.get(image)
+    assert entry["board"] is image
+    # the mapped solution is legal on the image and as short as the original
+    assert GameState(image).replay(entry["solution"]) == len(solution)
+
+def test_lookups_survive_a_new_process(tmp_path, board, solution):
+    SolutionCache(str(tmp_path / "cache.db")).put(board, solution)
+    image = transform_board(board, SYMMETRIES[5])
+    entry = SolutionCache(str(tmp_path / "cache.db")).get(image)
+    assert GameState(image).replay(entry["solution"]) == len(solution)
+
+def test_solve_cached_solves_each_board_once(cache, monkeypatch):
+    board = generate_board(6, 6, 2, 0.1)
+    solves = []
+    real_solve = board_cache.solve_board
+    monkeypatch.setattr(board_cache, "solve_board", lambda *a, **kw: solves.append(1) or real_solve(*a, **kw))
+    first = solve_cached(board, cache)
+    mirrored = solve_cached(transform_board(board, SYMMETRIES[1]), cache)
+    assert len(solves) == 1
+    assert (first is None) == (mirrored is None)
+    if first is not None:
+        assert len(mirrored) == len(first)
@@ -0,0 +1,166 @@
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from boards import LayoutTargets, TABLE_METHOD
+from board_cache import board_fingerprint
+from workers import BOARD_WORKERS, BrokenProcessPool, PoolShutDown, submit_board
+
+# ----------------------------
+# Warm pool of solved boards
+# ----------------------------
+# Difficulty buckets by optimal solution length: name -> (min_moves, max_moves)
+DIFFICULTIES = {
+    "easy": (3, 4),
+    "medium": (5, 7),
+    "hard": (8, None),
+}
+
+def difficulty_of(solution_length: int) -> Optional[str]:
+    """Bucket name for an optimal solution length, or None if it fits no bucket."""
+    for name, (low, high) in DIFFICULTIES.items():
+        if solution_length >= low and (high is None or solution_length <= high):
+            return name
+    return None
+
+class BoardPool:
+    """
+    In-memory buckets of (board, solution, stats) entries, refilled in the background.
+
+    A bucket starts refilling once it drops below `low` boards and keeps
+    refilling until it holds `high`, so the producer works in bursts instead of
+    chasing every single pop. Boards are produced by the worker process pool,
+    with at most `max_in_flight` jobs queued at a time.
+
+    Jobs that searched every target of their layout (BOARD_TARGET_TABLE) also
+    return its LayoutTargets; the pool keeps up to `max_layouts` of them, keyed
+    by the fingerprint of the board they came with, and refills buckets from
+    their unused targets before it queues new jobs.
+    """
+
+    def __init__(self, low: int = 2, high: int = 6, max_in_flight: int = BOARD_WORKERS,
+                 board_kwargs: Optional[Dict] = None,
+                 submit: Callable[..., Future] = submit_board, max_layouts: int = 32):
+        self.low = low
+        self.high = high
+        self.max_in_flight = max(1, max_in_flight)
+        self.board_kwargs = board_kwargs or {}
+        self.submit = submit
+        self.buckets: Dict[str, List[Tuple[Dict, List[Dict], Dict, str]]] = {name: [] for name in DIFFICULTIES}
+        self.refilling = set(DIFFICULTIES)
+        self.in_flight: List[Future] = []
+        self.fingerprints: Set[str] = set()  # board_fingerprint of every pooled board
+        self.max_layouts = max_layouts
+        self.layouts: Dict[str, LayoutTargets] = {}  # oldest first
+        self.started = False
+
+    def add(self, board: Dict, solution: List[Dict], stats: Optional[Dict] = None,
+            layout: Optional[LayoutTargets] = None) -> bool:
+        """
+        Store a solved board in its bucket; False if the bucket is full, none fits,
+        or the pool already holds the board or a rotated/mirrored copy of it.
+        The layout's other targets are kept either way.
+        """
+        fingerprint = board_fingerprint(board)
+        if layout:
+            self.keep_layout(fingerprint, layout)
+        name = difficulty_of(len(solution))
+        if name is None or len(self.buckets[name]) >= self.high:
+            return False
+        if fingerprint in self.fingerprints:
+            return False
+        self.fingerprints.add(fingerprint)
+        self.buckets[name].append((board, solution, stats or {}, fingerprint))
+        if len(self.buckets[name]) >= self.high:
+            self.refilling.discard(name)
+        return True
+
+    def pop(self, difficulty: Optional[str] = None) -> Optional[Tuple[Dict, List[Dict], Dict]]:
+        """
+        Take a board of the given difficulty (any difficulty if None) in O(1).
+        Returns None when the matching bucket is empty.
+        """
+        if difficulty is None:
+            # fullest bucket first, so popping keeps the pool balanced
+            difficulty = max(self.buckets, key=lambda name: len(self.buckets[name]))
+        bucket = self.buckets.get(difficulty)
+        if not bucket:
+            return None
+        board, solution, stats, fingerprint = bucket.pop()
+        self.fingerprints.discard(fingerprint)
+        if len(bucket) < self.low:
+            self.refilling.add(difficulty)
+        return board, solution, stats
+
+    def sizes(self) -> Dict[str, int]:
+        return {name: len(bucket) for name, bucket in self.buckets.items()}
+
+    def keep_layout(self, fingerprint: str, layout: LayoutTargets) -> None:
+        """Keep a layout's unused targets (evicting the oldest past max_layouts)."""
+        self.layouts.pop(fingerprint, None)
+        self.layouts[fingerprint] = layout
+        while len(self.layouts) > self.max_layouts:
+            del self.layouts[next(iter(self.layouts))]
+
+    def layout_targets(self) -> Dict[str, int]:
+        """Unused targets of the kept layouts per bucket, from their difficulty maps."""
+        return {name: sum(len(layout.targets(low, high)) for layout in self.layouts.values())
+                for name, (low, high) in DIFFICULTIES.items()}
+
+    def refill_from_layouts(self, name: str) -> None:
+        """Move kept layouts' targets into a refilling bucket; drop layouts that run out."""
+        low, high = DIFFICULTIES[name]
+        for fingerprint, layout in list(self.layouts.items()):
+            while name in self.refilling:
+                found = layout.take(low, high)
+                if found is None:
+                    break
+                # no search went into this board: its table was paid for by the first one
+                self.add(*found, {"method": TABLE_METHOD, "attempts": 0, "generation_time": 0.0})
+            if not layout:
+                del self.layouts[fingerprint]
+
+    def step(self) -> None:
+        """Harvest finished jobs and queue new ones while any bucket is refilling."""
+        for future in [f for f in self.in_flight if f.done()]:
+            self.in_flight.remove(future)
+            if future.cancelled() or future.exception() is not None:
+                continue
+            result = future.result()
+            if result is not None:
+                self.add(*result)
+
+        for name in list(self.refilling):
+            self.refill_from_layouts(name)
+
+        while self.refilling and len(self.in_flight) < self.max_in_flight:
+            # aim the job at one refilling bucket so rare (hard) boards still
+            # get generated instead of being crowded out by easy ones
+            name = min(self.refilling, key=lambda n: len(self.buckets[n]))
+            min_moves, max_moves = DIFFICULTIES[name]
+            try:
+                future = self.submit(min_moves=min_moves, max_moves=max_moves, **self.board_kwargs)
+            except PoolShutDown:
+                return  # the server is exiting
+            except BrokenProcessPool as e:
+                # even a fresh pool broke (e.g. workers can't start); try again next tick
+                print("Board pool refill failed:", e)
+                return
+            self.in_flight.append(future)
+
+    def run_producer(self, sleep: Callable[[float], None] = time.sleep,
+                     interval: float = 0.1) -> None:
+        """Producer loop; run it as a background task with a cooperative `sleep`."""
+        while True:
+            try:
+                self.step()
+            except Exception as e:
+                # must not end the producer, or the pool would never refill again
+                print("Board pool step failed:", repr(e))
+            sleep(interval)
+
+    def start(self, start_background_task: Callable, sleep: Callable[[float], None]) -> None:
+        """Start the producer once, e.g. with socketio.start_background_task."""
+        if not self.started:
+            self.started = True
+            start_background_task(self.run_producer, sleep)
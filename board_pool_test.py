@@ -0,0 +1,130 @@
+from concurrent.futures import Future
+
+import pytest
+
+from board_pool import BoardPool
+from boards import LayoutTargets, TABLE_METHOD
+from conftest import connect, received, run_ticks
+from solver import solve_all_targets
+
+class Jobs:
+    """BoardPool.submit stand-in: records each job, which never finishes on its own."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def __call__(self, **kwargs):
+        future = Future()
+        self.submitted.append((kwargs, future))
+        return future
+
+    def moves(self):
+        return [(kwargs["min_moves"], kwargs["max_moves"]) for kwargs, _ in self.submitted]
+
+@pytest.fixture
+def layout(layout_board):
+    return LayoutTargets(layout_board, solve_all_targets(layout_board))
+
+def finished(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+def test_a_bucket_refills_from_below_low_up_to_high(layout):
+    jobs = Jobs()
+    pool = BoardPool(low=1, high=2, max_in_flight=1, submit=jobs)
+    for low, high in ((3, 4), (5, 7), (8, None)):
+        for _ in range(2):
+            pool.add(*layout.take(low, high))
+    assert pool.sizes() == {"easy": 2, "medium": 2, "hard": 2}
+    assert pool.refilling == set()
+    pool.step()
+    assert jobs.submitted == []  # every bucket is at its high watermark
+
+    pool.pop("easy")
+    pool.step()
+    assert jobs.submitted == []  # still at the low watermark
+    pool.pop("easy")
+    assert pool.refilling == {"easy"}
+    pool.step()
+    assert jobs.moves() == [(3, 4)]
+
+    # refilling goes on past the low watermark until the bucket is full
+    for expected_jobs in (2, 2):
+        jobs.submitted[-1][1].set_result((*layout.take(3, 4), {"method": "bfs"}, None))
+        pool.step()
+        assert len(jobs.submitted) == expected_jobs
+    assert pool.sizes()["easy"] == 2
+    assert pool.refilling == set()
+
+def test_pop_takes_from_the_asked_bucket_or_the_fullest(layout):
+    pool = BoardPool(low=1, high=3, submit=Jobs())
+    for low, high, count in ((3, 4, 1), (5, 7, 3), (8, None, 2)):
+        for _ in range(count):
+            pool.add(*layout.take(low, high))
+    board, solution, stats = pool.pop("easy")
+    assert 3 <= len(solution) <= 4
+    assert pool.pop("easy") is None  # the caller generates one on demand
+    assert 5 <= len(pool.pop()[1]) <= 7
+    assert 8 <= len(pool.pop("hard")[1])
+    assert pool.sizes() == {"easy": 0, "medium": 2, "hard": 1}
+
+def test_buckets_refill_from_a_layout_before_queueing_jobs(layout):
+    jobs = Jobs()
+    pool = BoardPool(low=2, high=6, max_in_flight=4, submit=jobs)
+    pool.keep_layout("layout", layout)
+    hard = len(layout.targets(8))
+    assert hard < 6 <= min(len(layout.targets(3, 4)), len(layout.targets(5, 7)))
+
+    pool.step()
+    assert pool.sizes() == {"easy": 6, "medium": 6, "hard": hard}
+    assert pool.refilling == {"hard"}
+    assert jobs.moves() == [(8, None)] * 4  # only the bucket the layout couldn't fill
+    assert pool.layouts == {"layout": layout}  # easy and medium targets are left
+    assert pool.pop("easy")[2]["method"] == TABLE_METHOD
+
+def test_refill_stops_when_the_layout_runs_out(layout):
+    # keep three easy targets and nothing else
+    for low, high in ((1, 2), (5, None)):
+        while layout.take(low, high):
+            pass
+    while len(layout) > 3:
+        layout.take(3, 4)
+    pool = BoardPool(low=2, high=6, submit=Jobs())
+    pool.keep_layout("layout", layout)
+
+    pool.refill_from_layouts("easy")
+    assert pool.sizes()["easy"] == 3
+    assert "easy" in pool.refilling  # jobs make up the rest
+    assert pool.layouts == {}
+
+def test_producer_keeps_running_after_a_failed_step():
+    jobs = Jobs()
+    failures = [RuntimeError("bad job result")]
+
+    def submit(**kwargs):
+        if failures:
+            raise failures.pop()
+        return jobs(**kwargs)
+
+    pool = BoardPool(low=1, high=1, max_in_flight=1, submit=submit)
+    run_ticks(pool.run_producer, lambda: None)
+    assert len(jobs.submitted) == 1  # the second step queued a job
+
+def test_join_generates_a_board_when_its_bucket_is_empty(server, layout, monkeypatch):
+    easy_board, easy_solution = layout.take(3, 4)
+    asked = []
+
+    def submit_board(**kwargs):
+        asked.append((kwargs["min_moves"], kwargs["max_moves"]))
+        return finished((easy_board, easy_solution, {"method": "bfs"}, None))
+
+    monkeypatch.setattr(server, "submit_board", submit_board)
+    assert server.board_pool.sizes()["easy"] == 0  # the pool only holds a hard board
+    alice, bob = connect(server), connect(server)
+    alice.emit("join_game", {"username": "alice", "difficulty": "easy"})
+    bob.emit("join_game", {"username": "bob", "difficulty": "easy"})
+    (start,) = received(bob, "game_start")
+    assert asked == [(3, 4)]
+    assert start["board"]["target"] == list(easy_board["target"])
+    assert start["solution"] == easy_solution
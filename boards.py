@@ -0,0 +1,283 @@
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from solver import AUTO_SOLVER, pick_solver, solve_all_targets, solve_board, SolveAborted, SolverStats, TargetTable
+from board_cache import get_cache, solve_cached
+
+def generate_board(rows=10, cols=10, num_robots=3, wall_prob=0.1):
+    grid = [[0 for _ in range(cols)] for _ in range(rows)]
+
+    # Add random walls + borders
+    for y in range(rows):
+        for x in range(cols):
+            cell = 0
+            # North wall
+            if y == 0 or random.random() < wall_prob:
+                cell |= 1
+            # East wall
+            if x == cols - 1:
+                cell |= 2
+            # South wall
+            if y == rows - 1:
+                cell |= 4
+            # West wall
+            if x == 0 or random.random() < wall_prob:
+                cell |= 8
+            grid[y][x] = cell
+
+    # Place robots randomly
+    robots = []
+    for _ in range(num_robots):
+        while True:
+            rx, ry = random.randrange(cols), random.randrange(rows)
+            if (rx, ry) not in robots:  # don't stack robots
+                robots.append((rx, ry))
+                break
+
+    # Place target at least distance 3 from any robot
+    while True:
+        tx, ty = random.randrange(cols), random.randrange(rows)
+        if all(abs(tx - rx) + abs(ty - ry) >= 3 for (rx, ry) in robots):
+            target = (tx, ty)
+            break
+
+    return {
+        "rows": rows,
+        "cols": cols,
+        "grid": grid,       # 2D wall bitmask array
+        "robots": robots,   # list of robot coords
+        "target": target,   # (x,y) target position
+    }
+
+# ----------------------------
+# Classic 16x16 boards
+# ----------------------------
+# The classic board is four 8x8 quadrant tiles around a walled-off 2x2 centre.
+# Tiles are described as the top-left quadrant (centre in their bottom-right
+# corner) and rotated clockwise into place. Every tile has two "spoke" walls
+# on its outer edges and one L-shaped wall pair per target, with the target
+# in the corner of the L; one tile also has the vortex. The physical game
+# colors its targets and robots, but the solver lets any robot finish on the
+# target, so boards only mark target cells (every target plays like the vortex).
+
+N, E, S, W = 1, 2, 4, 8
+CLASSIC_SIZE = 16
+
+# walls and targets: (x, y, wall bits) in tile coordinates
+QUADRANT_TILES = [
+    {
+        "walls": [(4, 0, E), (0, 5, S)],
+        "targets": [(1, 3, S | E), (6, 1, N | W), (4, 5, N | E), (2, 6, S | W)],
+    },
+    {
+        "walls": [(2, 0, E), (0, 3, S)],
+        "targets": [(3, 1, S | W), (1, 5, N | E), (5, 3, S | E), (6, 6, N | W), (2, 3, N | W)],
+    },
+    {
+        "walls": [(5, 0, E), (0, 4, S)],
+        "targets": [(2, 2, N | E), (5, 1, S | E), (1, 6, N | W), (6, 4, S | W)],
+    },
+    {
+        "walls": [(3, 0, E), (0, 6, S)],
+        "targets": [(4, 2, N | W), (1, 4, S | W), (5, 5, S | E), (3, 6, N | E)],
+    },
+]
+
+# direction bit -> (dx, dy, bit of the same wall seen from the neighbour)
+WALL_SIDES = {N: (0, -1, S), E: (1, 0, W), S: (0, 1, N), W: (-1, 0, E)}
+
+def rotate_cell(x: int, y: int, size: int = CLASSIC_SIZE) -> Tuple[int, int]:
+    """(x, y) after a quarter turn clockwise around the board centre."""
+    return size - 1 - y, x
+
+def rotate_walls(bits: int) -> int:
+    """Wall bits after a quarter turn clockwise (N->E->S->W->N)."""
+    return ((bits << 1) | (bits >> 3)) & 0xF
+
+def add_walls(grid: List[List[int]], x: int, y: int, bits: int) -> None:
+    """Set walls on a cell and the matching walls on its neighbours."""
+    grid[y][x] |= bits
+    for side, (dx, dy, opposite) in WALL_SIDES.items():
+        nx, ny = x + dx, y + dy
+        if bits & side and 0 <= ny < len(grid) and 0 <= nx < len(grid[0]):
+            grid[ny][nx] |= opposite
+
+def generate_classic_board(num_robots: int = 4) -> Dict:
+    """
+    A 16x16 board from the four quadrant tiles in random order and orientation.
+    Any of the 17 targets can be the active one; "targets" lists all of them.
+    """
+    size = CLASSIC_SIZE
+    grid = [[0] * size for _ in range(size)]
+    for i in range(size):
+        add_walls(grid, i, 0, N)
+        add_walls(grid, size - 1, i, E)
+        add_walls(grid, i, size - 1, S)
+        add_walls(grid, 0, i, W)
+
+    # central block: robots can't enter, so wall it in from the outside
+    center = [(size // 2 - 1, size // 2 - 1), (size // 2, size // 2 - 1),
+              (size // 2 - 1, size // 2), (size // 2, size // 2)]
+    for x, y in center:
+        add_walls(grid, x, y, N | E | S | W)
+
+    targets = []
+    tiles = random.sample(QUADRANT_TILES, len(QUADRANT_TILES))
+    for quarter_turns, tile in enumerate(tiles):
+        placed = [(x, y, bits, False) for x, y, bits in tile["walls"]] + \
+                 [(x, y, bits, True) for x, y, bits in tile["targets"]]
+        for x, y, bits, is_target in placed:
+            for _ in range(quarter_turns):
+                x, y = rotate_cell(x, y)
+                bits = rotate_walls(bits)
+            add_walls(grid, x, y, bits)
+            if is_target:
+                targets.append((x, y))
+
+    target = random.choice(targets)
+    blocked = set(center) | {target}
+    robots = []
+    while len(robots) < num_robots:
+        cell = (random.randrange(size), random.randrange(size))
+        if cell not in blocked and cell not in robots:
+            robots.append(cell)
+
+    return {
+        "rows": size,
+        "cols": size,
+        "grid": grid,
+        "robots": robots,
+        "target": target,
+        "targets": targets,  # every target cell on the board, (x,y)
+    }
+
+BOARD_STYLES = {
+    "random": generate_board,
+    "classic": lambda rows, cols, num_robots, wall_prob: generate_classic_board(num_robots),
+}
+
+# GameRound.method of boards whose target was picked from a solve_all_targets table
+TABLE_METHOD = "table"
+
+def generate_solvable_board(rows=10, cols=10, num_robots=3, wall_prob=0.1,
+                            style: str = "random",
+                            method: str = AUTO_SOLVER, board_budget: float = 2.0,
+                            time_limit: Optional[float] = None,
+                            min_moves: int = 1, max_moves: Optional[int] = None,
+                            cache_path: Optional[str] = None,
+                            max_nodes: Optional[int] = None,
+                            target_table: bool = False) -> Optional[Tuple[Dict, List[Dict], Dict, Optional["LayoutTargets"]]]:
+    """
+    Keep generating boards until one has a solution of min_moves..max_moves moves.
+    Each board gets `board_budget` seconds and `max_nodes` expansions of solving
+    before it is thrown away, and the whole call gives up after `time_limit`
+    seconds (None = never).
+    `style` is a BOARD_STYLES key; "classic" boards are always 16x16.
+    Returns (board, solution, stats, layout) or None when the time limit runs
+    out; stats is the SolverStats dict of the accepted board plus the number of
+    attempts.
+    With `cache_path`, every solved board is also stored in that SolutionCache.
+    With `target_table` and a bounded max_moves, each layout is searched once
+    for every target (solver.solve_all_targets, max_moves deep) and the target
+    is picked among the cells whose optimal length fits, instead of solving
+    the generated target alone; `layout` then holds the layout's other targets
+    (see LayoutTargets), otherwise it is None.
+    """
+    cache = get_cache(cache_path) if cache_path else None
+    started = time.monotonic()
+    attempts = 0
+    while time_limit is None or time.monotonic() - started < time_limit:
+        attempts += 1
+        board = BOARD_STYLES[style](rows, cols, num_robots, wall_prob)
+        deadline = time.monotonic() + board_budget
+        if time_limit is not None:
+            deadline = min(deadline, started + time_limit)
+        stats = SolverStats()
+        if target_table and max_moves is not None:
+            found = pick_table_target(board, min_moves, max_moves, deadline, stats, max_nodes)
+            if found is None:
+                continue
+            board, solution, layout = found
+            if cache is not None:
+                cache.put(board, solution)
+            # solved by the all-targets search, not by `method`
+            return board, solution, _generation_stats(stats, TABLE_METHOD, attempts, started), layout
+        engine = pick_solver(board) if method == AUTO_SOLVER else method
+        try:
+            if cache is not None:
+                solution = solve_cached(board, cache, method=engine, deadline=deadline,
+                                        stats=stats, max_nodes=max_nodes)
+            else:
+                solution = solve_board(board, method=engine, deadline=deadline,
+                                       stats=stats, max_nodes=max_nodes)
+        except SolveAborted:
+            continue  # pathological board, draw another one
+        if solution is None or len(solution) < min_moves:
+            continue
+        if max_moves is None or len(solution) <= max_moves:
+            return board, solution, _generation_stats(stats, engine, attempts, started), None
+    return None
+
+def _generation_stats(stats: SolverStats, method: str, attempts: int, started: float) -> Dict:
+    result_stats = stats.as_dict()
+    result_stats["method"] = method
+    result_stats["attempts"] = attempts
+    result_stats["generation_time"] = time.monotonic() - started
+    return result_stats
+
+class LayoutTargets:
+    """
+    The playable targets of one layout and robot configuration with their
+    optimal solutions, kept from its solve_all_targets table so later rounds on
+    the layout need no search. Targets are (x, y) and each is handed out once.
+    """
+
+    def __init__(self, board: Dict, table: TargetTable):
+        self.board = board
+        self.difficulty = table.difficulty_map()  # difficulty[y][x], None = not reached
+        self.solutions = {cell: table.solution(cell) for cell in playable_targets(board, table.targets(1))}
+
+    def __len__(self) -> int:
+        return len(self.solutions)
+
+    def targets(self, min_moves: int = 0, max_moves: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Targets not handed out yet whose optimal move count is within min_moves..max_moves."""
+        return [(x, y) for x, y in self.solutions
+                if self.difficulty[y][x] >= min_moves and (max_moves is None or self.difficulty[y][x] <= max_moves)]
+
+    def take(self, min_moves: int = 0, max_moves: Optional[int] = None) -> Optional[Tuple[Dict, List[Dict]]]:
+        """(board, solution) for a random target within min_moves..max_moves, or None."""
+        candidates = self.targets(min_moves, max_moves)
+        if not candidates:
+            return None
+        target = random.choice(candidates)
+        return dict(self.board, target=target), self.solutions.pop(target)
+
+def playable_targets(board: Dict, cells: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    The cells that may be a board's target: classic boards only use their
+    marked targets; other boards keep generate_board's rule of at least
+    distance 3 from every robot.
+    """
+    if "targets" in board:
+        marked = {tuple(cell) for cell in board["targets"]}
+        return [cell for cell in cells if cell in marked]
+    return [(tx, ty) for tx, ty in cells
+            if all(abs(tx - rx) + abs(ty - ry) >= 3 for rx, ry in board["robots"])]
+
+def pick_table_target(board: Dict, min_moves: int, max_moves: Optional[int],
+                      deadline: Optional[float], stats: SolverStats,
+                      max_nodes: Optional[int]) -> Optional[Tuple[Dict, List[Dict], LayoutTargets]]:
+    """
+    Random playable target (and its optimal solution) among the board's cells
+    that need min_moves..max_moves moves, plus the layout's remaining targets,
+    or None if there is none.
+    """
+    table = solve_all_targets(board, max_depth=max_moves, deadline=deadline,
+                              stats=stats, max_nodes=max_nodes)
+    layout = LayoutTargets(board, table)
+    found = layout.take(min_moves, max_moves)
+    if found is None:
+        return None
+    return (*found, layout)
@@ -0,0 +1,36 @@
+from boards import LayoutTargets, playable_targets
+from game_state import GameState
+from solver import solve_all_targets, solve_board
+
+def test_table_lengths_match_solve_board(layout_board):
+    table = solve_all_targets(layout_board)
+    assert table.complete
+    robots = {tuple(robot) for robot in layout_board["robots"]}
+    unreached = 0
+    for y in range(8):
+        for x in range(8):
+            if (x, y) in robots:
+                continue
+            board = dict(layout_board, target=[x, y])
+            solution = solve_board(board, method="bfs")
+            assert table.length((x, y)) == (None if solution is None else len(solution))
+            if solution is None:
+                unreached += 1
+            else:
+                assert GameState(board).replay(table.solution((x, y))) == len(solution)
+    assert unreached == 2
+
+def test_layout_hands_out_each_target_once_within_its_bounds(layout_board):
+    table = solve_all_targets(layout_board)
+    layout = LayoutTargets(layout_board, table)
+    playable = set(playable_targets(layout_board, table.targets(1)))
+    assert set(layout.solutions) == playable
+    taken = []
+    while (found := layout.take(3, 4)) is not None:
+        board, solution = found
+        assert 3 <= len(solution) <= 4
+        assert GameState(board).replay(solution) == len(solution)
+        taken.append(tuple(board["target"]))
+    assert len(taken) == len(set(taken)) > 0
+    assert layout.targets(3, 4) == []
+    assert len(layout) == len(playable) - len(taken)  # other difficulties are left
@@ -0,0 +1,135 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from wire import ENCODINGS
+
+# ----------------------------
+# Coalesced room broadcasts
+# ----------------------------
+# Clients are split into sub-rooms of the game room by the encoding and
+# delivery mode they asked for in join_game:
+#
+#   {room}:{encoding}:each     one event per update, moves sent right away
+#   {room}:{encoding}:batched  one "game_updates" event per window:
+#                              { "events": [ { "event": name, "data": payload }, ... ] }
+#
+# Only sub-rooms someone joined get emits (see SubRooms), and moves are only
+# buffered for rooms with a batched sub-room; one background green thread sends
+# the buffers every `window` seconds, for all rooms at once. Updates keep
+# their order. improved_solution_update events are merged to the lowest length
+# per player in the window for every client, "each" ones included (a later
+# length replaces an earlier one on the client anyway), and sent after that
+# window's moves.
+
+DELIVERY_MODES = ("each", "batched")
+
+def sub_room(room: str, encoding: str, mode: str) -> str:
+    return f"{room}:{encoding}:{mode}"
+
+def _length(payload: Dict) -> float:
+    length = payload.get("current_solution_length")
+    return float("inf") if length is None else length
+
+class SubRooms:
+    """
+    The sub-rooms of each game room that have had a member, in this process
+    (shared_state.SharedSubRooms is the multi-worker version). Members are not
+    removed when they leave: a game's sub-rooms are forgotten when it closes.
+    """
+
+    def __init__(self):
+        self.rooms: Dict[str, Set[str]] = {}
+
+    def add(self, room: str, sub: str) -> None:
+        self.rooms.setdefault(room, set()).add(sub)
+
+    def get(self, room: str) -> Set[str]:
+        return self.rooms.get(room, set())
+
+    def clear(self, room: str) -> None:
+        self.rooms.pop(room, None)
+
+class RoomBroadcaster:
+    """Per-room outbound buffers, see the module comment."""
+
+    def __init__(self, emit: Callable, window: float = 0.02, sub_rooms: Optional[SubRooms] = None):
+        self.emit = emit  # socketio.emit
+        self.window = window
+        self.sub_rooms = sub_rooms or SubRooms()
+        self.pending: Dict[str, List[Tuple[str, Dict, Dict]]] = {}  # room -> [(event, json, compact)]
+        self.best: Dict[str, Dict[str, Dict]] = {}  # room -> username -> best-solution payload
+        self.running = False
+
+    def join(self, room: str, encoding: str, mode: str) -> None:
+        """Record that a client joined sub_room(room, encoding, mode)."""
+        self.sub_rooms.add(room, sub_room(room, encoding, mode))
+
+    def close(self, room: str) -> None:
+        """Send what is buffered for a game room and forget its sub-rooms."""
+        self.flush_room(room)
+        self.sub_rooms.clear(room)
+
+    def _send_each(self, room: str, subs: Set[str], event: str, *encoded: Dict) -> None:
+        for encoding, payload in zip(ENCODINGS, encoded):
+            if sub_room(room, encoding, "each") in subs:
+                self.emit(event, payload, room=sub_room(room, encoding, "each"))
+
+    def _batched(self, room: str, subs: Set[str]) -> bool:
+        return any(sub_room(room, encoding, "batched") in subs for encoding in ENCODINGS)
+
+    def push(self, room: str, event: str, payload: Dict, compact_payload: Optional[Dict] = None) -> None:
+        """Send an event to everyone in the game room (compact_payload defaults to payload)."""
+        compact_payload = payload if compact_payload is None else compact_payload
+        subs = self.sub_rooms.get(room)
+        self._send_each(room, subs, event, payload, compact_payload)
+        if not self._batched(room, subs):
+            return
+        self.pending.setdefault(room, []).append((event, payload, compact_payload))
+        if not self.window:
+            self.flush_room(room)
+
+    def push_best(self, room: str, username: str, payload: Dict) -> None:
+        """Queue an improved_solution_update; every client only gets the player's lowest length per window."""
+        players = self.best.setdefault(room, {})
+        current = players.get(username)
+        if current is None or _length(payload) < _length(current):
+            players[username] = payload
+        if not self.window:
+            self.flush_room(room)
+
+    def flush_room(self, room: str) -> None:
+        """Send a room's buffered events now (e.g. before end_game)."""
+        events = self.pending.pop(room, [])
+        bests = list(self.best.pop(room, {}).values())
+        if not events and not bests:
+            return
+        subs = self.sub_rooms.get(room)
+        for payload in bests:
+            self._send_each(room, subs, "improved_solution_update", payload, payload)
+        events += [("improved_solution_update", payload, payload) for payload in bests]
+        for index, encoding in enumerate(ENCODINGS):
+            if sub_room(room, encoding, "batched") not in subs:
+                continue
+            self.emit("game_updates", {
+                "events": [{"event": event, "data": encoded[index]} for event, *encoded in events],
+            }, room=sub_room(room, encoding, "batched"))
+
+    def flush(self) -> None:
+        for room in list(self.pending.keys() | self.best.keys()):
+            self.flush_room(room)
+
+    def run(self, sleep: Callable[[float], None]) -> None:
+        while True:
+            sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                # e.g. the message queue is unreachable: that room's window is lost,
+                # the rooms after it go out on the next tick
+                print("Broadcast flush failed:", repr(e))
+
+    def start(self, start_background_task, sleep) -> None:
+        """Start the flusher once (called from the first socket connect)."""
+        if self.running or not self.window:
+            return
+        self.running = True
+        start_background_task(self.run, sleep)
@@ -0,0 +1,131 @@
+from broadcast import RoomBroadcaster, sub_room
+from conftest import run_ticks
+from shared_state import FakeRedis, SharedSubRooms
+
+ROOM = "game_1"
+
+class Emits:
+    """socketio.emit stand-in: (event, payload, room) of every emit."""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, event, payload, room=None):
+        self.sent.append((event, payload, room))
+
+    def to(self, encoding, mode):
+        room = sub_room(ROOM, encoding, mode)
+        return [(event, payload) for event, payload, to in self.sent if to == room]
+
+def move(n):
+    return {"username": "alice", "move": {"moves": n}}, {"username": "alice", "move": bytes([n])}
+
+def best(username, length):
+    return {"username": username, "current_solution_length": length}
+
+def broadcaster(*members, window=0.02, sub_rooms=None):
+    emits = Emits()
+    rooms = RoomBroadcaster(emits, window=window, sub_rooms=sub_rooms)
+    for encoding, mode in members:
+        rooms.join(ROOM, encoding, mode)
+    return rooms, emits
+
+def test_each_clients_get_moves_at_once_and_merged_bests_per_window():
+    rooms, emits = broadcaster(("json", "each"), ("compact", "each"))
+    rooms.push(ROOM, "game_update", *move(1))
+    rooms.push_best(ROOM, "alice", best("alice", 9))
+    rooms.push_best(ROOM, "bob", best("bob", 8))
+    rooms.push_best(ROOM, "alice", best("alice", 7))
+    assert emits.to("json", "each") == [("game_update", move(1)[0])]
+    assert emits.to("compact", "each") == [("game_update", move(1)[1])]
+
+    rooms.flush()
+    expected = [("improved_solution_update", best("alice", 7)), ("improved_solution_update", best("bob", 8))]
+    assert emits.to("json", "each")[1:] == expected
+    assert emits.to("compact", "each")[1:] == expected
+    assert emits.to("json", "batched") == []  # nobody joined it
+    rooms.flush()
+    assert len(emits.sent) == 6
+
+def test_batched_clients_get_one_event_per_window_with_moves_first():
+    rooms, emits = broadcaster(("json", "batched"), ("compact", "each"))
+    rooms.push_best(ROOM, "alice", best("alice", 9))
+    rooms.push(ROOM, "game_update", *move(1))
+    rooms.push(ROOM, "game_update", *move(2))
+    rooms.push_best(ROOM, "alice", best("alice", 7))
+    assert emits.to("json", "batched") == []
+
+    rooms.flush()
+    ((event, payload),) = emits.to("json", "batched")
+    assert event == "game_updates"
+    assert payload["events"] == [
+        {"event": "game_update", "data": move(1)[0]},
+        {"event": "game_update", "data": move(2)[0]},
+        {"event": "improved_solution_update", "data": best("alice", 7)},
+    ]
+    assert [event for event, _ in emits.to("compact", "each")] == ["game_update"] * 2 + ["improved_solution_update"]
+
+def test_without_a_window_everything_is_sent_at_once():
+    rooms, emits = broadcaster(("json", "each"), ("json", "batched"), window=0)
+    rooms.push_best(ROOM, "alice", best("alice", 9))
+    assert emits.to("json", "each") == [("improved_solution_update", best("alice", 9))]
+    assert emits.to("json", "batched") == [("game_updates", {"events": [
+        {"event": "improved_solution_update", "data": best("alice", 9)}]})]
+
+def test_close_sends_what_is_buffered_and_forgets_the_sub_rooms():
+    rooms, emits = broadcaster(("json", "batched"))
+    rooms.push(ROOM, "game_update", *move(1))
+    rooms.close(ROOM)
+    assert len(emits.to("json", "batched")) == 1
+    rooms.push(ROOM, "game_update", *move(2))
+    rooms.flush()
+    assert len(emits.sent) == 1
+
+class CountingRedis(FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def hgetall(self, key):
+        self.reads += 1
+        return super().hgetall(key)
+
+def test_shared_sub_rooms_are_read_from_redis_once_per_refresh():
+    redis, now = CountingRedis(), [0.0]
+    here = SharedSubRooms(redis, refresh=1.0, clock=lambda: now[0])
+    elsewhere = SharedSubRooms(redis, refresh=1.0, clock=lambda: now[0])
+    rooms, emits = broadcaster(("json", "each"), sub_rooms=here)
+    for n in range(10):
+        rooms.push(ROOM, "game_update", *move(n))
+    assert redis.reads == 1
+    assert len(emits.to("json", "each")) == 10
+
+    rooms.join(ROOM, "compact", "each")  # this worker's joins show up at once
+    elsewhere.add(ROOM, sub_room(ROOM, "json", "batched"))
+    assert here.get(ROOM) == {sub_room(ROOM, "json", "each"), sub_room(ROOM, "compact", "each")}
+    now[0] = 1.0
+    assert sub_room(ROOM, "json", "batched") in here.get(ROOM)
+    assert redis.reads == 2
+
+def test_shared_sub_rooms_forget_rooms_closed_on_other_workers():
+    now = [0.0]
+    here = SharedSubRooms(FakeRedis(), refresh=1.0, clock=lambda: now[0])
+    here.get("game_1")
+    now[0] = 2.0
+    here.get("game_2")
+    assert set(here.cache) == {"game_2"}
+
+def test_run_keeps_flushing_after_a_failed_emit():
+    rooms, emits = broadcaster(("json", "batched"))
+    failures = [ConnectionError("message queue went away")]
+
+    def emit(event, payload, room=None):
+        if failures:
+            raise failures.pop()
+        emits(event, payload, room)
+
+    rooms.emit = emit
+    run_ticks(rooms.run,
+              lambda: rooms.push(ROOM, "game_update", *move(1)),
+              lambda: rooms.push(ROOM, "game_update", *move(2)))
+    assert emits.to("json", "batched") == [("game_updates", {"events": [{"event": "game_update", "data": move(2)[0]}]})]
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+# app monkey-patches the standard library for eventlet on import; do it before
+# any test module imports threading or concurrent.futures, as the server does
+import app as server_module
+
+# Board of bfs_test.py: its optimal solution is 10 moves ("hard")
+BOARD = {"rows": 10, "cols": 10, "grid": [[9, 1, 1, 1, 1, 1, 1, 1, 1, 3], [8, 0, 0, 8, 1, 8, 0, 8, 0, 2], [8, 0, 0, 0, 8, 0, 0, 0, 8, 10], [8, 0, 0, 0, 0, 1, 0, 8, 0, 2], [8, 0, 0, 0, 0, 0, 0, 0, 1, 10], [8, 0, 0, 8, 0, 0, 0, 9, 8, 2], [8, 0, 0, 0, 0, 1, 0, 0, 0, 2], [8, 0, 0, 1, 0, 0, 0, 0, 0, 2], [8, 0, 0, 1, 8, 8, 0, 0, 0, 2], [12, 4, 12, 4, 4, 5, 5, 4, 4, 6]], "robots": [[7, 4], [0, 1], [4, 0]], "target": [5, 7]}
+
+@pytest.fixture
+def board():
+    return {**BOARD, "grid": [list(row) for row in BOARD["grid"]], "robots": [list(r) for r in BOARD["robots"]]}
+
+@pytest.fixture
+def solution(board):
+    from solver import solve_board
+    return solve_board(board)
+
+@pytest.fixture
+def layout_board():
+    """A seeded 8x8 board with three robots, for all-targets tables; two of its cells can't be reached."""
+    from boards import generate_board
+
+    rng_state = random.getstate()
+    random.seed(4)
+    board = generate_board(8, 8, 3, 0.12)
+    random.setstate(rng_state)
+    return board
+
+@pytest.fixture
+def server_config():
+    """create_app overrides on top of the server fixture's; override it in a test module."""
+    return {}
+
+@pytest.fixture
+def server(tmp_path, board, solution, server_config):
+    """
+    The app module with a fresh app on a throwaway SQLite DB. Updates and
+    scores are sent at once, no background task is started, and the board
+    pool holds `board`, so the first full lobby starts a game on it.
+    """
+    from shared_state import get_redis
+
+    get_redis("memory://").data.clear()
+    server = server_module
+    server.create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'game.db'}",
+        "SOLVED_BOARD_CACHE": str(tmp_path / "solved_boards.db"),
+        "MESSAGE_QUEUE": None,
+        "SHARED_STATE_URL": None,
+        "BROADCAST_WINDOW": 0,
+        "SCORING_INTERVAL": 0,
+        "RECONNECT_GRACE": 0,
+        **server_config,
+    })
+    for service in (server.write_behind, server.snapshots):
+        service.running = True  # their loops would outlive the test
+    server.board_pool.started = True
+    server.board_pool.add(board, solution)
+    server.game_states.clear()
+    server.rounds.clear()
+    yield server
+    server.write_behind.flush()
+
+class Stop(Exception):
+    """Leaves a background loop under test, see run_ticks."""
+
+def run_ticks(run, *ticks):
+    """
+    Drive a service's `run(sleep)` loop: its n-th sleep calls ticks[n] (so
+    the loop body runs after each tick), and the sleep after the last tick
+    leaves the loop.
+    """
+    remaining = list(ticks)
+
+    def sleep(seconds):
+        if not remaining:
+            raise Stop
+        remaining.pop(0)()
+
+    with pytest.raises(Stop):
+        run(sleep)
+
+def connect(server):
+    client = server.socketio.test_client(server.app)
+    client.get_received()  # welcome message
+    return client
+
+def received(client, event):
+    return [message["args"][0] for message in client.get_received() if message["name"] == event]
+
+@pytest.fixture
+def players(server):
+    """Two connected clients seated in one started game; returns (game_id, alice, bob)."""
+    alice, bob = connect(server), connect(server)
+    alice.emit("join_game", {"username": "alice"})
+    bob.emit("join_game", {"username": "bob"})
+    (start,) = received(bob, "game_start")
+    alice.get_received()
+    return start["game_id"], alice, bob
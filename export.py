@@ -0,0 +1,323 @@
+"""
+Columnar export of finished rounds, players, games, sessions and solved
+boards, for offline analysis.
+
+    python export.py --out exports                      # new rounds + boards, fresh snapshots of the rest
+    python export.py --out exports --tables rounds boards --batch 50000
+    python export.py --read exports/rounds.rrc          # row count and columns of an export file
+
+Rows are read in fixed-size batches ordered by their key (`id`, or the cache's
+rowid): each batch is one short read-only query `WHERE key > last key`, so the
+server never waits on the export. SQLite has no server-side cursors; on
+backends that do, the batch queries run with stream_results. Every batch
+becomes one chunk of <out>/<table>.rrc.
+
+Only append-only tables are exported incrementally: game_round (one row per
+finished game, never changed) and the solved-board cache (a board re-solved
+after an INSERT OR REPLACE comes again under a new rowid; keep the last row
+per fingerprint). Their chunks are appended, then <out>/watermarks.json
+records the key and file size reached; a run interrupted between the two is
+cut back to the recorded size on the next one, so every row is exported
+exactly once. A file deleted or cut short below its watermark is exported
+again from the first row.
+
+player, game and game_session ids say nothing about insert order: each worker
+hands them out from its own IdAllocator block, and SQLite reuses the ids of
+deleted sessions. Those tables are rewritten as a full snapshot on every run
+(replaced only once complete). game and game_session rows only exist while a
+game runs, so their files hold whatever was live at the export.
+
+Chunk format (little-endian), readable with read_chunks():
+    b"RRC1" | u32 header length | header JSON | column blobs
+    header: {"rows": n, "columns": [{"name", "kind", "size"}, ...]}
+    blob:   zlib(null bitmap | values), values by kind:
+            int   - i64 per row          float - f64 per row (datetimes as epoch seconds)
+            str   - u32 offsets (rows+1) followed by the UTF-8 data
+            bytes - u32 offsets (rows+1) followed by the data
+"""
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, LargeBinary, Table, create_engine, inspect, select
+from sqlalchemy.engine import Engine, make_url
+
+from models import db
+from wire import encode_board, encode_moves
+
+MAGIC = b"RRC1"
+WATERMARKS = "watermarks.json"
+DEFAULT_BATCH = 10000
+
+# export name -> game DB table
+GAME_TABLES = {
+    "rounds": "game_round",
+    "players": "player",
+    "games": "game",
+    "sessions": "game_session",
+}
+TABLES = (*GAME_TABLES, "boards")
+INCREMENTAL = ("rounds", "boards")  # append-only in key order; the rest are snapshots
+
+Column = Tuple[str, str]  # (name, kind)
+
+# ----------------------------
+# Columnar chunks
+# ----------------------------
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def _encode_column(kind: str, values: List) -> bytes:
+    nulls = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value is None:
+            nulls[i >> 3] |= 1 << (i & 7)
+    if kind in ("int", "float"):
+        default = 0 if kind == "int" else 0.0
+        payload = _little_endian(array("q" if kind == "int" else "d",
+                                       (default if v is None else v for v in values)))
+    else:
+        data = [b"" if v is None else (v.encode() if kind == "str" else bytes(v)) for v in values]
+        offsets = array("I", [0])
+        for item in data:
+            offsets.append(offsets[-1] + len(item))
+        payload = _little_endian(offsets) + b"".join(data)
+    return zlib.compress(bytes(nulls) + payload)
+
+def _decode_column(kind: str, rows: int, blob: bytes) -> List:
+    raw = zlib.decompress(blob)
+    nulls, payload = raw[:(rows + 7) // 8], raw[(rows + 7) // 8:]
+    if kind in ("int", "float"):
+        values = list(_from_little_endian("q" if kind == "int" else "d", payload))
+    else:
+        offsets = _from_little_endian("I", payload[:4 * (rows + 1)])
+        data = payload[4 * (rows + 1):]
+        values = [data[offsets[i]:offsets[i + 1]] for i in range(rows)]
+        if kind == "str":
+            values = [value.decode() for value in values]
+    return [None if nulls[i >> 3] & (1 << (i & 7)) else value for i, value in enumerate(values)]
+
+def encode_chunk(columns: List[Column], rows: List[Tuple]) -> bytes:
+    blobs = [_encode_column(kind, [row[i] for row in rows]) for i, (_, kind) in enumerate(columns)]
+    header = json.dumps({
+        "rows": len(rows),
+        "columns": [{"name": name, "kind": kind, "size": len(blob)}
+                    for (name, kind), blob in zip(columns, blobs)],
+    }, separators=(",", ":")).encode()
+    return MAGIC + struct.pack("<I", len(header)) + header + b"".join(blobs)
+
+def read_chunks(path: str) -> Iterator[Dict[str, List]]:
+    """Every chunk of an export file as {column name: values}."""
+    with open(path, "rb") as f:
+        while True:
+            magic = f.read(4)
+            if not magic:
+                return
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not an export chunk at offset {f.tell() - 4}")
+            header = json.loads(f.read(struct.unpack("<I", f.read(4))[0]))
+            yield {column["name"]: _decode_column(column["kind"], header["rows"], f.read(column["size"]))
+                   for column in header["columns"]}
+
+# ----------------------------
+# Sources
+# ----------------------------
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    # the app stores naive UTC datetimes (datetime.utcnow)
+    return None if value is None else value.replace(tzinfo=timezone.utc).timestamp()
+
+def _kind(column_type) -> str:
+    if isinstance(column_type, (Integer, Boolean)):
+        return "int"
+    if isinstance(column_type, (Float, DateTime)):
+        return "float"
+    if isinstance(column_type, LargeBinary):
+        return "bytes"
+    return "str"
+
+def _sqlite_read_only(path: str):
+    return lambda: sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+def open_game_db(url: str) -> Engine:
+    """Engine on the game DB; SQLite files are opened read-only."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url)
+    path = parsed.database
+    # Flask-SQLAlchemy resolves relative SQLite paths against the instance folder
+    if path and not os.path.isabs(path):
+        path = os.path.join("instance", path)
+    return create_engine("sqlite://", creator=_sqlite_read_only(path))
+
+class TableSource:
+    """Batches of a game DB table in id order."""
+
+    def __init__(self, engine: Engine, table: Table):
+        self.engine = engine
+        self.table = table
+        self.key = table.c.id
+        self.columns: List[Column] = [(c.name, _kind(c.type)) for c in table.columns]
+        self.datetimes = [i for i, c in enumerate(table.columns) if isinstance(c.type, DateTime)]
+
+    def batches(self, after: int, size: int) -> Iterator[Tuple[List[Tuple], int]]:
+        while True:
+            with self.engine.connect() as conn:
+                rows = conn.execution_options(stream_results=True).execute(
+                    select(self.table).where(self.key > after).order_by(self.key).limit(size)
+                ).fetchall()
+            if not rows:
+                return
+            rows = [tuple(row) for row in rows]
+            if self.datetimes:
+                rows = [tuple(_epoch(v) if i in self.datetimes else v for i, v in enumerate(row))
+                        for row in rows]
+            after = rows[-1][0]
+            yield rows, after
+
+class BoardCacheSource:
+    """Batches of board_cache's solved_board table in rowid order, boards and
+    solutions in their wire encoding."""
+
+    columns: List[Column] = [("rowid", "int"), ("fingerprint", "str"), ("board", "bytes"),
+                             ("solution", "bytes"), ("moves", "int")]
+
+    def __init__(self, path: str):
+        self.connect = _sqlite_read_only(path)
+
+    def batches(self, after: int, size: int) -> Iterator[Tuple[List[Tuple], int]]:
+        conn = self.connect()
+        try:
+            while True:
+                # one statement per batch, so no read transaction outlives it
+                rows = conn.execute(
+                    "SELECT rowid, fingerprint, board, solution, moves FROM solved_board"
+                    " WHERE rowid > ? ORDER BY rowid LIMIT ?", (after, size)
+                ).fetchall()
+                if not rows:
+                    return
+                after = rows[-1][0]
+                yield [(rowid, fingerprint, encode_board(json.loads(board)),
+                        None if moves is None else encode_moves(json.loads(solution)), moves)
+                       for rowid, fingerprint, board, solution, moves in rows], after
+        finally:
+            conn.close()
+
+# ----------------------------
+# Export runs
+# ----------------------------
+
+def load_watermarks(out: str) -> Dict[str, Dict]:
+    try:
+        with open(os.path.join(out, WATERMARKS)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_watermarks(out: str, watermarks: Dict[str, Dict]) -> None:
+    path = os.path.join(out, WATERMARKS)
+    with open(path + ".tmp", "w") as f:
+        json.dump(watermarks, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+def export_table(name: str, source, out: str, watermarks: Dict[str, Dict], batch: int) -> int:
+    """Append every row past the table's watermark to <out>/<name>.rrc; returns the row count."""
+    path = os.path.join(out, f"{name}.rrc")
+    mark = watermarks.get(name, {"key": 0, "offset": 0})
+    if (os.path.getsize(path) if os.path.exists(path) else 0) < mark["offset"]:
+        # the file was deleted or cut short: truncate() would pad it with zero
+        # bytes, so start over with every row
+        print(f"{name}: {path} is shorter than its watermark, exporting every row again")
+        mark = {"key": 0, "offset": 0}
+    exported = 0
+    with open(path, "ab") as f:
+        f.truncate(mark["offset"])  # drop a chunk written after the last saved watermark
+        f.seek(mark["offset"])
+        for rows, last_key in source.batches(mark["key"], batch):
+            f.write(encode_chunk(source.columns, rows))
+            f.flush()
+            os.fsync(f.fileno())
+            mark = {"key": last_key, "offset": f.tell()}
+            watermarks[name] = mark
+            save_watermarks(out, watermarks)
+            exported += len(rows)
+    return exported
+
+def snapshot_table(name: str, source, out: str, batch: int) -> int:
+    """Rewrite <out>/<name>.rrc with every current row; returns the row count."""
+    path = os.path.join(out, f"{name}.rrc")
+    exported = 0
+    with open(path + ".tmp", "wb") as f:
+        for rows, _ in source.batches(0, batch):
+            f.write(encode_chunk(source.columns, rows))
+            exported += len(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+    return exported
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default=os.environ.get("DATABASE_URL", "sqlite:///game.db"))
+    parser.add_argument("--cache", default=os.environ.get("SOLVED_BOARD_CACHE",
+                                                          os.path.join("instance", "solved_boards.db")))
+    parser.add_argument("--out", default="exports", help="directory of the .rrc files and watermarks")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="rows per query and per chunk")
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=list(TABLES))
+    parser.add_argument("--read", metavar="FILE", help="summarize an export file instead")
+    args = parser.parse_args()
+
+    if args.read:
+        rows, columns = 0, []
+        for chunk in read_chunks(args.read):
+            columns = list(chunk)
+            rows += len(chunk[columns[0]]) if columns else 0
+        print(json.dumps({"file": args.read, "rows": rows, "columns": columns}, indent=2))
+        return
+
+    os.makedirs(args.out, exist_ok=True)
+    watermarks = load_watermarks(args.out)
+    engine = existing = None
+    if any(name in GAME_TABLES for name in args.tables):
+        engine = open_game_db(args.database)
+        existing = set(inspect(engine).get_table_names())
+
+    for name in args.tables:
+        if name == "boards":
+            if not os.path.exists(args.cache):
+                print(f"{name}: no solved-board cache at {args.cache}")
+                continue
+            source = BoardCacheSource(args.cache)
+        elif GAME_TABLES[name] not in existing:
+            print(f"{name}: no {GAME_TABLES[name]} table yet")
+            continue
+        else:
+            source = TableSource(engine, db.metadata.tables[GAME_TABLES[name]])
+        if name in INCREMENTAL:
+            exported = export_table(name, source, args.out, watermarks, args.batch)
+            print(f"{name}: {exported} new rows, up to key {watermarks.get(name, {}).get('key', 0)}")
+        else:
+            print(f"{name}: snapshot of {snapshot_table(name, source, args.out, args.batch)} rows")
+
+if __name__ == "__main__":
+    main()
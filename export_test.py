@@ -0,0 +1,84 @@
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from export import TableSource, encode_chunk, export_table, load_watermarks, read_chunks
+from models import db, GameRound
+
+COLUMNS = [("id", "int"), ("wall_time", "float"), ("players", "str"), ("board", "bytes")]
+
+def test_chunks_round_trip_with_nulls(tmp_path):
+    first = [(1, 0.5, "{}", b"\x00\x01"), (None, None, None, None), (-2 ** 63, 1e300, "ünï", b"")]
+    second = [(7, -0.0, "", None)]
+    path = tmp_path / "t.rrc"
+    path.write_bytes(encode_chunk(COLUMNS, first) + encode_chunk(COLUMNS, second))
+    chunks = list(read_chunks(str(path)))
+    assert [list(zip(*chunk.values())) for chunk in chunks] == [first, second]
+    assert [list(chunk) for chunk in chunks] == [[name for name, _ in COLUMNS]] * 2
+
+def test_read_chunks_rejects_other_files(tmp_path):
+    path = tmp_path / "t.rrc"
+    path.write_bytes(encode_chunk(COLUMNS, []) + b"junk")
+    with pytest.raises(ValueError):
+        list(read_chunks(str(path)))
+
+@pytest.fixture
+def rounds(tmp_path):
+    """TableSource over game_round, and a function that adds n finished rounds to it."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    db.metadata.create_all(engine)
+    table = GameRound.__table__
+
+    def add(n):
+        with engine.begin() as conn:
+            conn.execute(table.insert(), [{"game_id": i, "started_at": datetime(2026, 1, 1),
+                                           "ended_at": datetime(2026, 1, 1, 0, 5), "best_moves": None}
+                                          for i in range(n)])
+
+    return TableSource(engine, table), add
+
+def exported_ids(out):
+    return [key for chunk in read_chunks(os.path.join(out, "rounds.rrc")) for key in chunk["id"]]
+
+def test_export_only_appends_rows_past_the_watermark(tmp_path, rounds):
+    source, add = rounds
+    out = str(tmp_path / "out")
+    os.makedirs(out)
+    add(5)
+    watermarks = load_watermarks(out)
+    assert export_table("rounds", source, out, watermarks, batch=2) == 5
+    assert load_watermarks(out)["rounds"]["key"] == 5
+    assert export_table("rounds", source, out, watermarks, batch=2) == 0
+    add(3)
+    assert export_table("rounds", source, out, load_watermarks(out), batch=2) == 3
+    assert exported_ids(out) == list(range(1, 9))
+    assert next(read_chunks(os.path.join(out, "rounds.rrc")))["best_moves"] == [None, None]
+
+def test_a_chunk_written_after_the_watermark_is_cut_back(tmp_path, rounds):
+    source, add = rounds
+    out = str(tmp_path / "out")
+    os.makedirs(out)
+    add(4)
+    export_table("rounds", source, out, {}, batch=10)
+    with open(os.path.join(out, "rounds.rrc"), "ab") as f:
+        f.write(encode_chunk(COLUMNS, [(99, 0.0, "", b"")])[:20])  # interrupted before its watermark
+    add(1)
+    assert export_table("rounds", source, out, load_watermarks(out), batch=10) == 1
+    assert exported_ids(out) == [1, 2, 3, 4, 5]
+
+@pytest.mark.parametrize("damage", ["delete", "shorten"])
+def test_a_missing_or_short_file_is_exported_again(tmp_path, rounds, damage):
+    source, add = rounds
+    out = str(tmp_path / "out")
+    os.makedirs(out)
+    add(4)
+    export_table("rounds", source, out, {}, batch=2)
+    path = os.path.join(out, "rounds.rrc")
+    if damage == "delete":
+        os.remove(path)
+    else:
+        os.truncate(path, os.path.getsize(path) // 2)
+    assert export_table("rounds", source, out, load_watermarks(out), batch=2) == 4
+    assert exported_ids(out) == [1, 2, 3, 4]
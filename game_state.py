@@ -0,0 +1,132 @@
+from typing import Dict, List, Optional, Tuple
+
+from solver import DIRECTIONS, prepare_search, slide_cell
+
+# ----------------------------
+# Authoritative per-game board state
+# ----------------------------
+DIRECTION_INDEX = {name: i for i, name in enumerate(DIRECTIONS)}
+
+class IllegalMove(ValueError):
+    """Raised when a client move can't be applied to the server's board state."""
+
+class GameState:
+    """
+    Server copy of one game's board. Every player works on their own copy of the
+    robots, starting from the board's initial positions; moves use the same
+    sliding rules as solver.slide_until_block, via the precomputed stop tables, so
+    applying one costs a table lookup plus a check of the other robots.
+    """
+
+    def __init__(self, board: Dict, solution: Optional[List[Dict]] = None):
+        self.board = board
+        self.solution = solution
+        self.ctx = prepare_search(board)
+        self.positions: Dict[str, List[int]] = {}  # username -> robot cells, board order
+        self.move_counts: Dict[str, int] = {}      # username -> moves since last reset
+        self.best: Dict[str, int] = {}             # username -> shortest verified solution
+
+    def _cell_xy(self, cell: int) -> List[int]:
+        return [cell % self.ctx.cols, cell // self.ctx.cols]
+
+    def reset(self, username: str) -> None:
+        """Put the player's robots back on their starting cells."""
+        self.positions[username] = list(self.ctx.robots)
+        self.move_counts[username] = 0
+
+    def apply_move(self, username: str, robot, direction) -> Dict:
+        """
+        Slide one of the player's robots. Returns the move delta:
+        { 'robot': i, 'dir': 'Right', 'to': [x,y], 'moves': n, 'solved': bool }.
+        Raises IllegalMove for an unknown robot/direction or a move that goes nowhere.
+        """
+        if username not in self.positions:
+            self.reset(username)
+        cells = self.positions[username]
+        new_cell = self._slide(cells, robot, direction)
+
+        cells[robot] = new_cell
+        self.move_counts[username] += 1
+        solved = new_cell == self.ctx.target
+        if solved:
+            self.record_solution(username, self.move_counts[username])
+
+        return {
+            "robot": robot,
+            "dir": direction,
+            "to": self._cell_xy(new_cell),
+            "moves": self.move_counts[username],
+            "solved": solved,
+        }
+
+    def _slide(self, cells: List[int], robot, direction) -> int:
+        """Cell `robot` stops on when slid from `cells`; raises IllegalMove like apply_move."""
+        # bool is an int subclass, but True is not robot 1
+        if not isinstance(robot, int) or isinstance(robot, bool) or not 0 <= robot < len(cells):
+            raise IllegalMove(f"unknown robot {robot!r}")
+        # checked before the lookup: a list or dict isn't hashable
+        if not isinstance(direction, str) or direction not in DIRECTION_INDEX:
+            raise IllegalMove(f"unknown direction {direction!r}")
+
+        _, step, stops = self.ctx.moves[DIRECTION_INDEX[direction]]
+        cell = cells[robot]
+        new_cell = slide_cell(stops, step, self.ctx.cols, cell, cells)
+        if new_cell == cell:
+            raise IllegalMove("robot can't move in that direction")
+        return new_cell
+
+    def replay(self, moves: List[Dict]) -> int:
+        """
+        Play a whole solution ([{ 'robot': i, 'dir': 'Right' }, ...]) from the
+        starting robots, without touching any player's state. Returns its length;
+        raises IllegalMove unless exactly the last move puts a robot on the target.
+        """
+        cells = list(self.ctx.robots)
+        for index, move in enumerate(moves):
+            if not isinstance(move, dict):
+                raise IllegalMove(f"move {index} is not a move")
+            try:
+                new_cell = self._slide(cells, move.get("robot"), move.get("dir"))
+            except IllegalMove as e:
+                raise IllegalMove(f"move {index}: {e}") from None
+            cells[move["robot"]] = new_cell
+            if new_cell == self.ctx.target:
+                if index != len(moves) - 1:
+                    raise IllegalMove(f"target already reached after {index + 1} moves")
+                return len(moves)
+        raise IllegalMove("solution doesn't reach the target")
+
+    def record_solution(self, username: str, length: int) -> bool:
+        """Keep a verified solution length if it's the player's shortest; returns whether it was."""
+        if username in self.best and self.best[username] <= length:
+            return False
+        self.best[username] = length
+        return True
+
+    def ranking(self) -> List[Tuple[str, int]]:
+        """(username, shortest verified length) for every player who solved the board, best first."""
+        return sorted(self.best.items(), key=lambda item: item[1])
+
+    def snapshot(self, username: str) -> Dict:
+        """A player's view of the game, for resuming it: their robots and move count, and every best length."""
+        return {
+            "robots": [self._cell_xy(cell) for cell in self.positions.get(username, self.ctx.robots)],
+            "moves": self.move_counts.get(username, 0),
+            "best": dict(self.best),
+        }
+
+    def progress(self, username: str) -> Dict:
+        """A player's robot cells and move count, JSON-safe, for restore on another worker."""
+        return {
+            "robots": list(self.positions.get(username, self.ctx.robots)),
+            "moves": self.move_counts.get(username, 0),
+        }
+
+    def restore(self, username: str, progress: Dict) -> None:
+        """Put back a player's robots and move count saved with progress()."""
+        self.positions[username] = list(progress["robots"])
+        self.move_counts[username] = progress["moves"]
+
+    def best_length(self, username: str) -> Optional[int]:
+        """Shortest solution the server has seen this player reach, if any."""
+        return self.best.get(username)
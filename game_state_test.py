@@ -0,0 +1,106 @@
+import pytest
+
+from conftest import received
+from game_state import GameState, IllegalMove
+
+MALFORMED_MOVES = [
+    {"robot": 0, "dir": []},
+    {"robot": 0, "dir": {"d": "Up"}},
+    {"robot": 0, "dir": "Sideways"},
+    {"robot": 0},
+    {"robot": "0", "dir": "Up"},
+    {"robot": [0], "dir": "Up"},
+    {"robot": True, "dir": "Up"},
+    {"robot": 3, "dir": "Up"},
+    {"dir": "Up"},
+]
+
+def test_apply_move_slides_until_blocked(board):
+    state = GameState(board)
+    delta = state.apply_move("alice", 1, "Up")
+    assert delta == {"robot": 1, "dir": "Up", "to": [0, 0], "moves": 1, "solved": False}
+    assert state.positions["alice"][1] == 0
+    # other players keep their own robots
+    assert state.apply_move("bob", 1, "Up")["moves"] == 1
+
+def test_apply_move_rejects_a_move_that_goes_nowhere(board):
+    state = GameState(board)
+    state.apply_move("alice", 1, "Up")
+    with pytest.raises(IllegalMove):
+        state.apply_move("alice", 1, "Up")
+    assert state.move_counts["alice"] == 1
+
+@pytest.mark.parametrize("move", MALFORMED_MOVES)
+def test_apply_move_rejects_malformed_moves(board, move):
+    state = GameState(board)
+    with pytest.raises(IllegalMove):
+        state.apply_move("alice", move.get("robot"), move.get("dir"))
+    assert state.positions["alice"] == state.ctx.robots
+
+def test_playing_the_solution_records_it(board, solution):
+    state = GameState(board, solution)
+    for move in solution:
+        delta = state.apply_move("alice", move["robot"], move["dir"])
+        assert delta["to"] == move["to"]
+    assert delta["solved"]
+    assert state.best_length("alice") == len(solution)
+    state.reset("alice")
+    assert state.move_counts["alice"] == 0
+    assert state.best_length("alice") == len(solution)
+
+def test_replay_checks_the_whole_solution(board, solution):
+    state = GameState(board, solution)
+    assert state.replay(solution) == len(solution)
+    with pytest.raises(IllegalMove):
+        state.replay(solution[:-1])
+    with pytest.raises(IllegalMove):
+        state.replay(solution + solution[-1:])
+    with pytest.raises(IllegalMove):
+        state.replay([{"robot": 0, "dir": []}])
+
+def test_move_events_are_validated_against_the_seat(server, players, solution):
+    game_id, alice, bob = players
+    move = solution[0]
+    alice.emit("move", {"game_id": game_id, "move": {"robot": move["robot"], "dir": move["dir"]}})
+    (update,) = received(bob, "game_update")
+    assert update["username"] == "alice"
+    assert update["move"]["to"] == move["to"]
+
+    bob.emit("move", {"game_id": game_id + 1, "move": {"robot": 0, "dir": "Up"}})
+    (rejected,) = received(bob, "move_rejected")
+    assert rejected["reason"] == "not seated in this game"
+
+@pytest.mark.parametrize("move", MALFORMED_MOVES + ["Up", 7])
+def test_malformed_move_events_are_rejected(server, players, move):
+    game_id, alice, bob = players
+    alice.emit("move", {"game_id": game_id, "move": move})
+    assert received(alice, "move_rejected")
+    assert received(bob, "game_update") == []
+    # the game goes on
+    alice.emit("move", {"game_id": game_id, "move": {"robot": 1, "dir": "Up"}})
+    assert received(bob, "game_update")
+
+def test_move_events_reject_payloads_that_are_not_objects(players):
+    game_id, alice, bob = players
+    alice.emit("move", ["move"])
+    (rejected,) = received(alice, "move_rejected")
+    assert rejected["move"] is None
+
+def test_best_solution_claims_need_a_verified_integer_length(server, players, solution):
+    game_id, alice, bob = players
+    for length in ("3", 3.5, [3], True):
+        alice.emit("update_best_solution", {"game_id": game_id, "current_solution_length": length})
+        (rejected,) = received(alice, "solution_rejected")
+        assert rejected["reason"] == "current_solution_length must be an integer"
+
+    # a length the server hasn't seen the player reach
+    alice.emit("update_best_solution", {"game_id": game_id, "current_solution_length": 1})
+    (rejected,) = received(alice, "solution_rejected")
+    assert rejected["verified_solution_length"] is None
+
+    for move in solution:
+        alice.emit("move", {"game_id": game_id, "move": {"robot": move["robot"], "dir": move["dir"]}})
+    bob.get_received()
+    alice.emit("update_best_solution", {"game_id": game_id, "current_solution_length": len(solution)})
+    (update,) = received(bob, "improved_solution_update")
+    assert update == {"username": "alice", "current_solution_length": len(solution)}
@@ -0,0 +1,422 @@
+"""
+Socket.IO load generator for the game server.
+
+    python loadtest.py --spawn --servers 1 --clients 1000 --ramp 20
+    python loadtest.py --url http://127.0.0.1:5000 --server-pid 1234 --clients 500
+
+Every simulated client connects, sends join_game, waits for game_start,
+replays the solution it was sent as move events, claims it with
+update_best_solution, then sends leave_game (and waits for the server to
+acknowledge it) or just disconnects. Reported: join -> game_start latency,
+move -> own game_update and best-solution -> improved_solution_update round
+trips (p50/p99), how each client's game ended ("left": acknowledged
+leave_game, "disconnected_seated": disconnected with the seat still held,
+"ended_by_other": another player ended the game first), errors, and the CPU time of
+the server and every process it spawns over the run, board workers included
+(from /proc, so Linux only).
+
+--spawn starts single-worker `gunicorn -k eventlet` servers on free ports
+against one throwaway SQLite DB. With --servers N (or N --url options) client
+i always talks to server i % N, as a sticky load balancer would route it; more
+than one server also needs MESSAGE_QUEUE=redis://... in the environment (see
+shared_state.py). Needs the Socket.IO client transports:
+pip install "python-socketio[client]".
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import socketio
+
+# ----------------------------
+# Server process helpers
+# ----------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def spawn_servers(count: int, env: Optional[Dict[str, str]] = None) -> List[Tuple[subprocess.Popen, int]]:
+    """
+    `count` gunicorn + eventlet processes, one worker each (Flask-SocketIO
+    can't share sids between a process's workers), on free 127.0.0.1 ports
+    with one fresh DB; returns (process, port) pairs once all accept
+    connections. Server output goes to server<i>.log next to the DB.
+    """
+    db_dir = tempfile.mkdtemp(prefix="loadtest-")
+    env = {**os.environ, **(env or {})}
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'game.db')}"
+    env.setdefault("SOLVED_BOARD_CACHE", os.path.join(db_dir, "solved_boards.db"))
+    servers = []
+    for i in range(count):
+        port = free_port()
+        log = open(os.path.join(db_dir, f"server{i}.log"), "w")
+        server = subprocess.Popen(
+            ["gunicorn", "-k", "eventlet", "-w", "1", "-b", f"127.0.0.1:{port}", "app:create_app()"],
+            env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        print(f"server log: {log.name}", file=sys.stderr)
+        servers.append((server, port))
+    try:
+        for server, port in servers:
+            wait_for_server(server, port)
+    except RuntimeError:
+        stop_servers(servers)
+        raise
+    return servers
+
+def wait_for_server(server: subprocess.Popen, port: int) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            time.sleep(0.2)
+    raise RuntimeError("server did not start listening within 30s")
+
+def stop_servers(servers: List[Tuple[subprocess.Popen, int]]) -> None:
+    for server, _ in servers:
+        server.terminate()
+    for server, _ in servers:
+        server.wait()
+
+def process_tree(root: int) -> List[int]:
+    """root plus all of its descendants, from /proc."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the command name may contain spaces; fields after it are fixed
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pids, todo = [], [root]
+    while todo:
+        pid = todo.pop()
+        pids.append(pid)
+        todo.extend(children.get(pid, []))
+    return pids
+
+def process_cpu(pids: List[int]) -> Dict[Tuple[int, int], float]:
+    """(pid, start time) -> user + system CPU seconds, for each of pids still running."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    times = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue  # exited
+        # start time tells a reused pid apart
+        times[(pid, int(fields[19]))] = (int(fields[11]) + int(fields[12])) / ticks  # utime, stime
+    return times
+
+class ServerCpu:
+    """
+    CPU time of the server process trees since start(). The trees are walked
+    again on every sample, so processes spawned during the run (the board
+    worker pool starts on the first connect) are counted from zero, and ones
+    that exit keep the time of their last sample.
+    """
+
+    def __init__(self, roots: List[int]):
+        self.roots = roots
+        self.before: Dict[Tuple[int, int], float] = {}
+        self.latest: Dict[Tuple[int, int], float] = {}
+
+    def sample(self) -> None:
+        self.latest.update(process_cpu([pid for root in self.roots for pid in process_tree(root)]))
+
+    def start(self) -> None:
+        self.sample()
+        self.before = dict(self.latest)
+
+    def run(self, interval: float = 1.0) -> None:
+        while True:
+            eventlet.sleep(interval)
+            self.sample()
+
+    def seconds(self) -> float:
+        return sum(cpu - self.before.get(key, 0.0) for key, cpu in self.latest.items())
+
+def raise_fd_limit() -> None:
+    """Every client holds a socket; lift the soft open-files limit to the hard one."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+# ----------------------------
+# Simulated client
+# ----------------------------
+
+class Results:
+    """Latency samples (seconds) and counters shared by every client."""
+
+    def __init__(self):
+        self.join: List[float] = []
+        self.move_rtt: List[float] = []
+        self.best_rtt: List[float] = []
+        self.counts: Dict[str, int] = {}
+
+    def count(self, name: str) -> None:
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+class SimClient:
+    """One player: join, play the sent solution, claim it, leave."""
+
+    def __init__(self, url: str, username: str, args, results: Results):
+        self.url = url
+        self.username = username
+        self.args = args
+        self.results = results
+        self.sio = socketio.Client(reconnection=False)
+        self.started = eventlet.Event()
+        self.start: Optional[Dict] = None
+        self.ended = False
+        self.move_sent: List[float] = []   # send times of moves awaiting their game_update
+        self.best_sent: Optional[float] = None
+
+        self.sio.on("game_start", self.on_game_start)
+        self.sio.on("game_update", self.on_game_update)
+        self.sio.on("game_updates", self.on_game_updates)
+        self.sio.on("move_rejected", self.on_move_rejected)
+        self.sio.on("improved_solution_update", self.on_improved_solution)
+        self.sio.on("solution_rejected", self.on_solution_rejected)
+        self.sio.on("end_game", self.on_end_game)
+
+    def on_game_start(self, data):
+        if not self.started.ready():
+            self.start = data
+            self.started.send(time.perf_counter())
+
+    def on_game_update(self, data):
+        if data.get("username") == self.username and self.move_sent:
+            self.results.move_rtt.append(time.perf_counter() - self.move_sent.pop(0))
+
+    def on_game_updates(self, data):
+        for item in data["events"]:
+            handler = {
+                "game_update": self.on_game_update,
+                "improved_solution_update": self.on_improved_solution,
+            }.get(item["event"])
+            if handler:
+                handler(item["data"])
+
+    def on_move_rejected(self, data):
+        self.results.count("move_rejected")
+        if self.move_sent:
+            self.results.move_rtt.append(time.perf_counter() - self.move_sent.pop(0))
+
+    def on_improved_solution(self, data):
+        if data.get("username") == self.username and self.best_sent is not None:
+            self.results.best_rtt.append(time.perf_counter() - self.best_sent)
+            self.best_sent = None
+
+    def on_solution_rejected(self, data):
+        self.results.count("solution_rejected")
+        self.best_sent = None
+
+    def on_end_game(self, data):
+        self.ended = True
+
+    def wait_until(self, done, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not done():
+            if self.ended or time.monotonic() > deadline:
+                return False
+            eventlet.sleep(0.01)
+        return True
+
+    def leave(self, game_id: int) -> None:
+        """leave_game, waiting for the server to acknowledge it before disconnecting."""
+        try:
+            self.sio.call("leave_game", {"game_id": game_id, "username": self.username},
+                          timeout=self.args.timeout)
+        except socketio.exceptions.TimeoutError:
+            self.results.count("leave_timeout")
+            return
+        self.results.count("left")
+
+    def run(self) -> None:
+        args, results = self.args, self.results
+        try:
+            self.sio.connect(self.url, transports=[args.transport])
+        except Exception:
+            results.count("connect_failed")
+            return
+        results.count("connected")
+        try:
+            sent = time.perf_counter()
+            self.sio.emit("join_game", {
+                "username": self.username,
+                "max_players": args.max_players,
+                "difficulty": args.difficulty,
+                "batch_updates": args.batch_updates,
+            })
+            started = self.started.wait(args.timeout)
+            if started is None:
+                results.count("join_timeout")
+                return
+            results.join.append(started - sent)
+            results.count("game_start")
+
+            game_id = self.start["game_id"]
+            for move in self.start["solution"]:
+                if self.ended:
+                    break
+                self.move_sent.append(time.perf_counter())
+                self.sio.emit("move", {"game_id": game_id,
+                                       "move": {"robot": move["robot"], "dir": move["dir"]}})
+                eventlet.sleep(args.move_interval)
+            if not self.wait_until(lambda: not self.move_sent, args.timeout):
+                results.count("move_timeout" if not self.ended else "ended_early")
+                return
+
+            self.best_sent = time.perf_counter()
+            self.sio.emit("update_best_solution", {
+                "game_id": game_id,
+                "username": self.username,
+                "current_solution_length": len(self.start["solution"]),
+            })
+            if not self.wait_until(lambda: self.best_sent is None, args.timeout):
+                results.count("best_timeout" if not self.ended else "ended_early")
+
+            eventlet.sleep(args.linger)
+            if self.ended:
+                results.count("ended_by_other")
+            elif random.random() < args.leave_ratio:
+                self.leave(game_id)
+            else:
+                # the server holds the seat for RECONNECT_GRACE, then ends the game
+                results.count("disconnected_seated")
+        except Exception:
+            results.count("client_error")
+        finally:
+            self.sio.disconnect()
+
+# ----------------------------
+# Report
+# ----------------------------
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def summarize(samples: List[float]) -> Dict:
+    ms = lambda v: None if v is None else v * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": ms(percentile(samples, 0.50)),
+        "p99_ms": ms(percentile(samples, 0.99)),
+        "max_ms": ms(max(samples)) if samples else None,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", default=[],
+                        help="server to load (repeatable; default: the spawned ones)")
+    parser.add_argument("--spawn", action="store_true", help="start gunicorn servers for the run")
+    parser.add_argument("--servers", type=int, default=1, help="single-worker gunicorn processes with --spawn")
+    parser.add_argument("--server-pid", type=int, action="append", default=[],
+                        help="server process to measure CPU of, with its children (repeatable)")
+    parser.add_argument("--clients", type=int, default=100, help="simulated clients")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which clients connect")
+    parser.add_argument("--max-players", type=int, default=2, help="max_players sent in join_game")
+    parser.add_argument("--difficulty", choices=["easy", "medium", "hard"], help="difficulty sent in join_game")
+    parser.add_argument("--batch-updates", action="store_true", help="ask for coalesced game_updates")
+    parser.add_argument("--move-interval", type=float, default=0.1, help="seconds between a client's moves")
+    parser.add_argument("--linger", type=float, default=1.0, help="seconds to stay after claiming")
+    parser.add_argument("--leave-ratio", type=float, default=0.5,
+                        help="fraction of clients that send leave_game instead of just disconnecting")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for any reply")
+    parser.add_argument("--transport", choices=["websocket", "polling"], default="websocket")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    if not args.url and not args.spawn:
+        parser.error("pass --url or --spawn")
+    raise_fd_limit()
+
+    servers = []
+    if args.spawn:
+        servers = spawn_servers(args.servers)
+        args.url = args.url or [f"http://127.0.0.1:{port}" for _, port in servers]
+        args.server_pid.extend(server.pid for server, _ in servers)
+
+    server_cpu = ServerCpu(args.server_pid)
+    results = Results()
+    run_id = f"{random.randrange(16 ** 6):06x}"
+    pool = eventlet.GreenPool(args.clients)
+    try:
+        server_cpu.start()
+        sampler = eventlet.spawn(server_cpu.run)
+        client_cpu_before = sum(os.times()[:2])
+        started = time.perf_counter()
+        for i in range(args.clients):
+            client = SimClient(args.url[i % len(args.url)], f"load{run_id}_{i}", args, results)
+            pool.spawn_n(client.run)
+            eventlet.sleep(args.ramp / args.clients)
+        pool.waitall()
+        elapsed = time.perf_counter() - started
+        sampler.kill()
+        server_cpu.sample()
+        cpu = server_cpu.seconds()
+        client_cpu = sum(os.times()[:2]) - client_cpu_before
+    finally:
+        stop_servers(servers)
+
+    report = {
+        "meta": {
+            "clients": args.clients,
+            "servers": len(args.url),
+            "transport": args.transport,
+            "batch_updates": args.batch_updates,
+            "duration_s": elapsed,
+        },
+        "join_to_start": summarize(results.join),
+        "move_rtt": summarize(results.move_rtt),
+        "best_rtt": summarize(results.best_rtt),
+        "counts": results.counts,
+        "server_cpu": {
+            "seconds": cpu if server_cpu.latest else None,
+            "percent_of_one_core": 100 * cpu / elapsed if server_cpu.latest else None,
+            "processes": len(server_cpu.latest),
+        },
+        # near 100% means the load generator, not the server, is the bottleneck
+        "client_cpu": {
+            "seconds": client_cpu,
+            "percent_of_one_core": 100 * client_cpu / elapsed,
+        },
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Set
+
+# ----------------------------
+# In-memory matchmaking queue
+# ----------------------------
+class Lobby:
+    """A game that players are being matched into."""
+    __slots__ = ("game_id", "lane", "max_players", "usernames")
+
+    def __init__(self, game_id: int, lane: Hashable, max_players: int):
+        self.game_id = game_id
+        self.lane = lane
+        self.max_players = max_players
+        self.usernames: List[str] = []
+
+    @property
+    def full(self) -> bool:
+        return len(self.usernames) >= self.max_players
+
+class Matchmaker:
+    """
+    Open lobbies grouped by lane (e.g. difficulty and player count). Each lane is
+    an insertion-ordered dict of game_id -> Lobby, so finding the oldest open
+    lobby, filling it and dropping it are all O(1), however many lobbies wait.
+    The DB is only written to, never scanned, to find a game.
+    """
+
+    def __init__(self):
+        self.open: Dict[Hashable, "OrderedDict[int, Lobby]"] = {}
+        self.lobbies: Dict[int, Lobby] = {}  # every lobby (open or started) by game id
+        self.started: Set[int] = set()
+
+    def find_lobby(self, lane: Hashable) -> Optional[Lobby]:
+        """Oldest lobby in `lane` that still has a free slot."""
+        lobbies = self.open.get(lane)
+        if not lobbies:
+            return None
+        return next(iter(lobbies.values()))
+
+    def open_lobby(self, game_id: int, lane: Hashable, max_players: int) -> Lobby:
+        lobby = Lobby(game_id, lane, max_players)
+        self.lobbies[game_id] = lobby
+        self.open.setdefault(lane, OrderedDict())[game_id] = lobby
+        return lobby
+
+    def add_player(self, lobby: Lobby, username: str) -> bool:
+        """Seat a player (False if the lobby is already full); a lobby that becomes full stops being offered."""
+        if username not in lobby.usernames:
+            if lobby.full:
+                return False
+            lobby.usernames.append(username)
+        if lobby.full:
+            self.open.get(lobby.lane, {}).pop(lobby.game_id, None)
+        return True
+
+    def claim_start(self, game_id: int) -> bool:
+        """True the first time it is called for a game, so only one join starts it."""
+        if game_id in self.started:
+            return False
+        self.started.add(game_id)
+        return True
+
+    def lobby_of(self, game_id: int) -> Optional[Lobby]:
+        return self.lobbies.get(game_id)
+
+    def remove_game(self, game_id: int) -> None:
+        """Forget a game that ended or was abandoned."""
+        lobby = self.lobbies.pop(game_id, None)
+        self.started.discard(game_id)
+        if lobby is not None:
+            self.open.get(lobby.lane, {}).pop(game_id, None)
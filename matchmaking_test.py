@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import connect
+from matchmaking import Matchmaker
+from shared_state import FakeRedis, SharedMatchmaker
+
+@pytest.fixture(params=["memory", "shared"])
+def matchmaker(request):
+    return Matchmaker() if request.param == "memory" else SharedMatchmaker(FakeRedis())
+
+def test_players_fill_the_oldest_lobby_of_their_lane(matchmaker):
+    lane = ("easy", 2)
+    assert matchmaker.find_lobby(lane) is None
+    first = matchmaker.open_lobby(1, lane, 2)
+    matchmaker.open_lobby(2, lane, 2)
+    matchmaker.open_lobby(3, ("hard", 2), 2)
+    assert matchmaker.find_lobby(lane).game_id == 1
+
+    assert matchmaker.add_player(first, "alice")
+    assert matchmaker.add_player(first, "alice")  # re-joining keeps one seat
+    assert not first.full
+    assert matchmaker.add_player(first, "bob")
+    assert first.full
+    assert matchmaker.lobby_of(1).usernames == ["alice", "bob"]
+    # a full lobby stops being offered
+    assert matchmaker.find_lobby(lane).game_id == 2
+    assert not matchmaker.add_player(first, "carol")
+
+def test_only_one_join_starts_a_game(matchmaker):
+    lobby = matchmaker.open_lobby(1, ("easy", 2), 2)
+    matchmaker.add_player(lobby, "alice")
+    matchmaker.add_player(lobby, "bob")
+    assert matchmaker.claim_start(1)
+    assert not matchmaker.claim_start(1)
+
+def test_removed_games_are_gone(matchmaker):
+    lane = (None, 3)
+    lobby = matchmaker.open_lobby(1, lane, 3)
+    matchmaker.add_player(lobby, "alice")
+    matchmaker.claim_start(1)
+    matchmaker.remove_game(1)
+    assert matchmaker.lobby_of(1) is None
+    assert matchmaker.find_lobby(lane) is None
+
+def test_join_reuses_cached_player_ids(server, monkeypatch):
+    lookups = []
+    real_lookup = server.player_id_for
+    monkeypatch.setattr(server, "player_id_for", lambda username: lookups.append(username) or real_lookup(username))
+    client = connect(server)
+    client.emit("join_game", {"username": "alice"})
+    client.emit("join_game", {"username": "alice"})
+    assert lookups == ["alice"]
+    assert server.player_ids.get("alice") is not None
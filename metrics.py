@@ -0,0 +1,54 @@
+import json
+import statistics
+from collections import deque
+from typing import Dict, List, Optional
+
+# ----------------------------
+# Per-game-start solver metrics
+# ----------------------------
+# Fields of a solver stats dict (see solver.SolverStats / boards.generate_solvable_board)
+# that get percentiles on the metrics endpoint
+SUMMARY_FIELDS = ["wall_time", "generation_time", "expanded", "peak_frontier", "max_depth", "memory_bytes"]
+
+def _summary(values: List[float]) -> Dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[int(0.95 * (len(ordered) - 1))],
+        "max": ordered[-1],
+    }
+
+class SolveMetrics:
+    """Counters plus a window of the most recent solver stats, one entry per game start."""
+
+    def __init__(self, window: int = 1000):
+        self.games_started = 0
+        self.failed_starts = 0
+        self.by_source: Dict[str, int] = {}
+        self.recent = deque(maxlen=window)
+
+    def record_start(self, game_id, source: str, stats: Optional[Dict]) -> None:
+        """Count a game start and print its stats as one JSON log line."""
+        self.games_started += 1
+        self.by_source[source] = self.by_source.get(source, 0) + 1
+        stats = stats or {}
+        self.recent.append(stats)
+        print(json.dumps({"event": "game_start", "game_id": game_id, "source": source, **stats}))
+
+    def record_failure(self, game_id) -> None:
+        self.failed_starts += 1
+        print(json.dumps({"event": "game_start_failed", "game_id": game_id}))
+
+    def snapshot(self) -> Dict:
+        return {
+            "games_started": self.games_started,
+            "failed_starts": self.failed_starts,
+            "by_source": dict(self.by_source),
+            "window": len(self.recent),
+            **{
+                field: _summary([s[field] for s in self.recent if s.get(field) is not None])
+                for field in SUMMARY_FIELDS
+            },
+        }
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from solver import SOLVERS, NodeBudgetExceeded, SolverStats, SolveTimeout, solve_all_targets, solve_board
+
+@pytest.mark.parametrize("method", SOLVERS)
+def test_a_node_budget_aborts_the_solve(board, solution, method):
+    stats = SolverStats()
+    with pytest.raises(NodeBudgetExceeded):
+        solve_board(board, method=method, stats=stats, max_nodes=20)
+    assert stats.aborted == "node_budget"
+    assert stats.solves == 1 and stats.expanded <= 21
+    # nothing is left behind: the same board solves with a budget that suffices
+    assert len(solve_board(board, method=method, max_nodes=10 ** 6)) == len(solution)
+
+@pytest.mark.parametrize("method", SOLVERS)
+def test_a_passed_deadline_aborts_the_solve(board, method):
+    stats = SolverStats()
+    with pytest.raises(SolveTimeout):
+        solve_board(board, method=method, stats=stats, deadline=time.monotonic() - 1)
+    assert stats.aborted == "deadline"
+
+def test_an_aborted_all_targets_search_keeps_what_it_found(layout_board):
+    full = solve_all_targets(layout_board)
+    stats = SolverStats()
+    partial = solve_all_targets(layout_board, stats=stats, max_nodes=50)
+    assert stats.aborted == "node_budget"
+    assert not partial.complete
+    assert 0 < len(partial.depths) < len(full.depths)
+    assert all(full.depths[cell] == depth for cell, depth in partial.depths.items())
+
+def test_metrics_endpoint_reports_the_recorded_counters(server, players):
+    game_id, alice, bob = players  # started on the pooled board
+    solve_metrics = server.solve_metrics
+    solve_metrics.record_start(game_id + 1, "on_demand", {"wall_time": 0.5, "expanded": 300})
+    solve_metrics.record_start(game_id + 2, "on_demand", {"wall_time": 1.5, "expanded": 100})
+    solve_metrics.record_failure(game_id + 3)
+
+    report = server.app.test_client().get("/metrics").get_json()
+    solver = report["solver"]
+    assert (solver["games_started"], solver["failed_starts"]) == (3, 1)
+    assert solver["by_source"] == {"pool": 1, "on_demand": 2}
+    assert solver["window"] == 3
+    assert (solver["wall_time"]["p50"], solver["wall_time"]["max"]) == (1.0, 1.5)
+    assert solver["expanded"]["max"] == 300
+    assert solver["memory_bytes"] == {}
+    assert report["board_pool"] == {"easy": 0, "medium": 0, "hard": 0}
+    assert report["player_ids_cached"] == 2
@@ -6,6 +6,7 @@ db = SQLAlchemy()
 
 class Player(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    # the UNIQUE constraint is already indexed; index=True would add a second one
     username = db.Column(db.String(50), unique=True, nullable=False)
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -19,7 +20,7 @@ class Player(db.Model):
 
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    status = db.Column(db.String(20), default="waiting")
+    status = db.Column(db.String(20), default="waiting", index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     max_players = db.Column(db.Integer, default=2)
 
@@ -31,6 +32,8 @@ class Game(db.Model):
 
 
 class GameSession(db.Model):
+    __table_args__ = (db.Index("ix_game_session_player_game", "player_id", "game_id"),)
+
     id = db.Column(db.Integer, primary_key=True)
     session_token = db.Column(db.String(36), default=lambda: str(uuid.uuid4()))
 
@@ -39,3 +42,45 @@ class GameSession(db.Model):
 
     player = db.relationship("Player", back_populates="sessions")
     game = db.relationship("Game", back_populates="players")
+
+
+class GameRound(db.Model):
+    # One row per finished game, inserted when it ends and never updated, so
+    # the id order is the export watermark (see export.py); AUTOINCREMENT keeps
+    # SQLite from ever handing out an id again. Not linked to Game: game rows
+    # are deleted when the game ends, rounds are kept.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    ended_at = db.Column(db.DateTime, nullable=False)
+    difficulty = db.Column(db.String(10))    # board_pool.DIFFICULTIES key, None = any
+    max_players = db.Column(db.Integer)
+    players = db.Column(db.Text)             # JSON {username: shortest verified solution or null}
+    best_moves = db.Column(db.Integer)       # shortest verified solution of any player
+    source = db.Column(db.String(10))        # "pool" or "on_demand"
+    board = db.Column(db.LargeBinary)        # wire.encode_board
+    optimal_moves = db.Column(db.Integer)
+    # solver stats of the board's generation (see boards._generation_stats)
+    method = db.Column(db.String(10))
+    attempts = db.Column(db.Integer)
+    solves = db.Column(db.Integer)
+    expanded = db.Column(db.Integer)
+    generated = db.Column(db.Integer)
+    peak_frontier = db.Column(db.Integer)
+    max_depth = db.Column(db.Integer)
+    memory_bytes = db.Column(db.Integer)
+    wall_time = db.Column(db.Float)
+    generation_time = db.Column(db.Float)
+
+
+# NameCounter rows
+NAME_COUNTER = 1       # generated-username indexes
+PLAYER_ID_COUNTER = 2  # Player.id values
+GAME_ID_COUNTER = 3    # Game.id values
+
+class NameCounter(db.Model):
+    # One row per counter above, each handing out blocks of values
+    id = db.Column(db.Integer, primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False, default=0)
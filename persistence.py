@@ -0,0 +1,304 @@
+import atexit
+import threading
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, event, func, insert, select, update
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models import db, Game, GameRound, GameSession, NameCounter, Player
+
+# ----------------------------
+# Engine tuning
+# ----------------------------
+# Every join/leave commits from an eventlet green thread. On SQLite the
+# default rollback journal makes each commit lock out readers too; in WAL
+# mode readers keep going while one writer commits, and busy_timeout makes a
+# second writer wait for the lock instead of failing with "database is locked".
+
+def engine_options(uri: str, pool_size: int = 10, busy_timeout: float = 5.0) -> Dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URI (set before db.init_app)."""
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite":
+        return {
+            "pool_size": pool_size,
+            "max_overflow": pool_size * 2,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        }
+    if url.database in (None, "", ":memory:"):
+        return {}  # in-memory DBs live on a single connection
+    return {
+        # green threads share one OS thread but each checks out its own connection
+        "pool_size": pool_size,
+        "max_overflow": pool_size * 2,
+        "pool_timeout": busy_timeout,
+        "connect_args": {"timeout": busy_timeout},
+    }
+
+def install_sqlite_pragmas(engine: Engine) -> None:
+    """Switch every new SQLite connection to WAL + synchronous=NORMAL."""
+    if engine.dialect.name != "sqlite" or engine.url.database in (None, "", ":memory:"):
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+def create_missing_indexes() -> None:
+    """db.create_all() skips tables that already exist; add indexes declared on the models since."""
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+# ----------------------------
+# Hot-path statements
+# ----------------------------
+# Built once at import; SQLAlchemy caches their compiled SQL, so each call
+# only binds parameters.
+
+PLAYER_ID_BY_USERNAME = select(Player.id).where(Player.username == bindparam("username"))
+
+ACTIVATE_GAME = (
+    update(Game)
+    .where(Game.id == bindparam("game_id"))
+    .values(status="active")
+    .execution_options(synchronize_session=False)
+)
+
+DELETE_GAME_SESSIONS = (
+    delete(GameSession)
+    .where(GameSession.game_id == bindparam("game_id"))
+    .execution_options(synchronize_session=False)
+)
+
+DELETE_GAME = (
+    delete(Game)
+    .where(Game.id == bindparam("game_id"))
+    .execution_options(synchronize_session=False)
+)
+
+def player_id_for(username: str):
+    return db.session.execute(PLAYER_ID_BY_USERNAME, {"username": username}).scalar()
+
+class PlayerIdCache:
+    """
+    username -> Player.id of recent players, so returning players skip
+    player_id_for. Bounded: past `max_size` entries the least recently used
+    one is evicted (its player is looked up again on their next join).
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.ids: "OrderedDict[str, int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, username: str) -> Optional[int]:
+        player_id = self.ids.get(username)
+        if player_id is not None:
+            self.ids.move_to_end(username)
+        return player_id
+
+    def __setitem__(self, username: str, player_id: int) -> None:
+        self.ids[username] = player_id
+        self.ids.move_to_end(username)
+        while len(self.ids) > self.max_size:
+            self.ids.popitem(last=False)
+
+    def pop(self, username: str, default=None) -> Optional[int]:
+        return self.ids.pop(username, default)
+
+    def clear(self) -> None:
+        self.ids.clear()
+
+# ----------------------------
+# Counter blocks
+# ----------------------------
+
+def reserve_block(counter_id: int, size: int, start: int = 0) -> Tuple[int, int]:
+    """
+    Reserve `size` consecutive values of a NameCounter row with one atomic
+    UPDATE, so every worker process draws from its own range. Returns
+    (first, end); a missing row is created to hand out values from `start`.
+    """
+    table = NameCounter.__table__
+    while True:
+        try:
+            with db.engine.begin() as conn:
+                updated = conn.execute(
+                    table.update().where(table.c.id == counter_id)
+                    .values(next_value=table.c.next_value + size)
+                ).rowcount
+                if not updated:
+                    conn.execute(table.insert().values(id=counter_id, next_value=start + size))
+                end = conn.execute(select(table.c.next_value).where(table.c.id == counter_id)).scalar_one()
+        except IntegrityError:
+            continue  # another worker created the row first; take a block from it
+        return end - size, end
+
+class IdAllocator:
+    """
+    Primary keys for one table, drawn from a counter row in blocks, so a row
+    can be queued for write-behind before it is inserted. The counter starts
+    above the table's highest existing id.
+    """
+
+    def __init__(self, counter_id: int, column, block_size: int = 100):
+        self.counter_id = counter_id
+        self.column = column
+        self.block_size = block_size
+        self.next = 0
+        self.end = 0
+
+    def allocate(self) -> int:
+        if self.next >= self.end:
+            start = (db.session.execute(select(func.max(self.column))).scalar() or 0) + 1
+            self.next, self.end = reserve_block(self.counter_id, self.block_size, start)
+        value = self.next
+        self.next += 1
+        return value
+
+# ----------------------------
+# Write-behind queue
+# ----------------------------
+# Socket handlers queue game lifecycle events instead of writing them; a
+# background green thread flushes them in batches, one transaction and one
+# executemany per event kind each. Batches are committed in queue order and
+# events leave the queue only once their batch committed, so the DB always
+# holds a prefix of the event stream. Inside a batch inserts run before
+# updates before deletes; ids are never reused, so that ends in the same
+# state as applying the events one by one.
+
+WRITE_STATEMENTS = {
+    "player_created": [insert(Player)],          # id, username
+    "game_created": [insert(Game)],              # id, status, max_players
+    "session_created": [insert(GameSession)],    # player_id, game_id, session_token
+    "round_finished": [insert(GameRound)],       # every GameRound column but id
+    "game_started": [ACTIVATE_GAME],             # game_id
+    "game_ended": [DELETE_GAME_SESSIONS, DELETE_GAME],  # game_id
+}
+
+# GameRound columns taken from a board's generation stats
+ROUND_STATS = ("method", "attempts", "solves", "expanded", "generated", "peak_frontier",
+               "max_depth", "memory_bytes", "wall_time", "generation_time")
+
+class WriteBehind:
+    """
+    Bounded queue of (event kind, row) pairs, see WRITE_STATEMENTS.
+
+    A player_created that collides with an existing username (e.g. the same
+    name joined on another worker first) is resolved to the existing player:
+    its queued and future session_created rows are rewritten to that id, and
+    on_player_id(username, id) lets the caller fix its cached id. If there is no
+    such player the sessions are dropped too and on_player_id gets None.
+    """
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 0.05,
+                 on_player_id: Optional[Callable[[str, Optional[int]], None]] = None):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_player_id = on_player_id
+        self.events: Deque[Tuple[str, Dict]] = deque()
+        self.lock = threading.Lock()  # one flush at a time (a green lock under eventlet)
+        self.engine: Optional[Engine] = None
+        self.running = False
+        self.player_ids: Dict[int, Optional[int]] = {}  # queued player id -> existing id (None = dropped)
+
+    def bind(self, engine: Engine) -> None:
+        """Write through this engine; flushes then need no app context (e.g. at exit)."""
+        self.engine = engine
+        atexit.register(self.flush)
+
+    def put(self, kind: str, **row) -> None:
+        self.events.append((kind, row))
+        if len(self.events) >= self.max_size:
+            self.flush()  # queue full: this caller waits for the DB instead of growing it
+
+    def flush(self) -> int:
+        """Write every queued event; returns how many were written."""
+        written = 0
+        with self.lock:
+            while self.events:
+                batch = list(islice(self.events, self.batch_size))
+                try:
+                    self._write(batch)
+                except OperationalError:
+                    raise  # transient (e.g. locked): the batch stays queued, see run
+                except Exception:
+                    # a constraint violation or bad row fails the whole batch again on every retry
+                    self._write_each(batch)
+                for _ in batch:
+                    self.events.popleft()
+                written += len(batch)
+        return written
+
+    def _write(self, batch: List[Tuple[str, Dict]]) -> None:
+        rows: Dict[str, List[Dict]] = {kind: [] for kind in WRITE_STATEMENTS}
+        for kind, row in batch:
+            if kind == "session_created" and row["player_id"] in self.player_ids:
+                player_id = self.player_ids[row["player_id"]]
+                if player_id is None:
+                    continue
+                row = {**row, "player_id": player_id}
+            rows[kind].append(row)
+        with self.engine.begin() as conn:
+            for kind, statements in WRITE_STATEMENTS.items():
+                if rows[kind]:
+                    for statement in statements:
+                        conn.execute(statement, rows[kind])
+
+    def _write_each(self, batch: List[Tuple[str, Dict]]) -> None:
+        """Fallback for a batch that failed on its rows: drop just the offending events."""
+        for kind, row in batch:
+            try:
+                self._write([(kind, row)])
+            except IntegrityError as e:
+                if kind == "player_created":
+                    self._resolve_player(row)
+                else:
+                    print(f"Dropping {kind} {row}: {e.orig}")
+            except OperationalError:
+                raise
+            except Exception as e:
+                print(f"Dropping {kind} {row}: {e!r}")
+
+    def _resolve_player(self, row: Dict) -> None:
+        with self.engine.connect() as conn:
+            existing = conn.execute(PLAYER_ID_BY_USERNAME, {"username": row["username"]}).scalar()
+        self.player_ids[row["id"]] = existing
+        if existing is None:
+            print(f"Dropping player_created {row} and its sessions")
+        else:
+            print(f"Player {row['username']!r} already exists as id {existing}; using it")
+        if self.on_player_id is not None:
+            self.on_player_id(row["username"], existing)
+
+    def run(self, sleep: Callable[[float], None]) -> None:
+        while True:
+            sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OperationalError as e:
+                # e.g. database locked for longer than the busy timeout; the
+                # batch stays queued and is retried on the next tick
+                print("Write-behind flush failed:", e)
+            except Exception as e:
+                # anything else must not end the flusher, or every later write
+                # would pile up in memory; the batch is retried on the next tick
+                print("Write-behind flush failed:", repr(e))
+
+    def start(self, start_background_task, sleep) -> None:
+        """Start the flusher once (called from the first socket connect)."""
+        if self.running:
+            return
+        self.running = True
+        start_background_task(self.run, sleep)
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine, select
+
+from conftest import run_ticks
+from models import db, Game, Player
+from persistence import PlayerIdCache, WriteBehind
+
+@pytest.fixture
+def write_behind(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    db.metadata.create_all(engine)
+    queue = WriteBehind()
+    queue.bind(engine)
+    yield queue
+    queue.events.clear()  # nothing left for the atexit flush
+
+def rows(queue, column):
+    with queue.engine.connect() as conn:
+        return sorted(conn.execute(select(column)).scalars())
+
+def test_a_bad_row_only_drops_its_own_event(write_behind):
+    write_behind.put("player_created", id=1, username="alice")
+    write_behind.put("game_created", id=1, status="waiting", max_players=object())  # can't be bound
+    write_behind.put("game_created", id=2, status="waiting", max_players=2)
+    write_behind.put("player_created", id=2, username="bob")
+    assert write_behind.flush() == 4
+    assert rows(write_behind, Player.username) == ["alice", "bob"]
+    assert rows(write_behind, Game.id) == [2]
+
+def test_run_keeps_flushing_after_an_unexpected_error(write_behind, monkeypatch):
+    flush = write_behind.flush
+    calls = []
+
+    def failing_once():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("unexpected")
+        return flush()
+
+    monkeypatch.setattr(write_behind, "flush", failing_once)
+    run_ticks(write_behind.run,
+              lambda: write_behind.put("player_created", id=1, username="player0"),
+              lambda: write_behind.put("player_created", id=2, username="player1"))
+    assert rows(write_behind, Player.username) == ["player0", "player1"]
+    assert not write_behind.events
+
+def test_player_id_cache_evicts_the_least_recently_used():
+    cache = PlayerIdCache(max_size=2)
+    cache["alice"] = 1
+    cache["bob"] = 2
+    assert cache.get("alice") == 1  # bob is now the oldest
+    cache["carol"] = 3
+    assert len(cache) == 2
+    assert cache.get("bob") is None
+    assert (cache.get("alice"), cache.get("carol")) == (1, 3)
@@ -0,0 +1,138 @@
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from game_state import GameState, IllegalMove
+
+# ----------------------------
+# Batched solution scoring
+# ----------------------------
+# Players submit whole move sequences with submit_solution. Submissions are
+# queued and scored by one background green thread every `interval` seconds:
+# each is replayed against the game's board (GameState.replay, the same slide
+# rules as live moves) and compared with the optimal solution the game
+# started with. The end of a round turns into a burst of submissions, so a
+# tick scores them in chunks of `chunk`, yielding to the event loop between
+# chunks, and identical sequences for the same game are replayed once.
+#
+# Each submitter gets "solution_scored" { game_id, length, optimal, excess, best }
+# or "solution_rejected" { game_id, reason, verified_solution_length }; every
+# game with a new best gets one "solution_ranking" per tick:
+#   { game_id, optimal, ranking: [ { username, length, excess }, ... ] }  (best first)
+
+MAX_SOLUTION_MOVES = 64  # longer submissions are rejected without a replay
+
+class Submission(NamedTuple):
+    game_id: int
+    username: str
+    sid: str  # Socket.IO session to reply to
+    moves: List[Dict]
+
+def _optimal(state: GameState) -> Optional[int]:
+    return None if state.solution is None else len(state.solution)
+
+def _excess(length: int, optimal: Optional[int]) -> Optional[int]:
+    return None if optimal is None else length - optimal
+
+def ranking_payload(game_id, state: GameState) -> Dict:
+    optimal = _optimal(state)
+    return {
+        "game_id": game_id,
+        "optimal": optimal,
+        "ranking": [
+            {"username": username, "length": length, "excess": _excess(length, optimal)}
+            for username, length in state.ranking()
+        ],
+    }
+
+class SolutionScorer:
+    """Queue of submitted solutions, verified in batches, see the module comment."""
+
+    def __init__(self, get_state: Callable[..., Optional[GameState]], emit: Callable,
+                 publish_ranking: Callable[[int, Dict], None],
+                 interval: float = 0.05, chunk: int = 200):
+        self.get_state = get_state              # game id -> GameState (app.get_game_state)
+        self.emit = emit                        # socketio.emit, replies go to=sid
+        self.publish_ranking = publish_ranking  # (game id, ranking payload) -> room broadcast
+        self.interval = interval
+        self.chunk = chunk
+        self.pending: List[Submission] = []
+        self.running = False
+
+    def submit(self, game_id, username: str, sid: str, moves: List[Dict]) -> None:
+        self.pending.append(Submission(game_id, username, sid, moves))
+        if not self.interval:
+            self.flush()
+
+    def flush(self, sleep: Optional[Callable[[float], None]] = None) -> int:
+        """Score every queued submission; returns how many were scored."""
+        batch, self.pending = self.pending, []
+        by_game: Dict[object, List[Submission]] = {}
+        for submission in batch:
+            by_game.setdefault(submission.game_id, []).append(submission)
+
+        scored = 0
+        for game_id, submissions in by_game.items():
+            improved = False
+            replays: Dict[str, object] = {}  # repr of the move sequence -> length or IllegalMove
+            for submission in submissions:
+                state = self.get_state(game_id)
+                if state is None:
+                    self._reject(submission, "no running game", None)
+                    continue
+                key = repr(submission.moves)
+                if key not in replays:
+                    replays[key] = self._replay(state, submission.moves)
+                outcome = replays[key]
+                if isinstance(outcome, IllegalMove):
+                    self._reject(submission, str(outcome), state.best_length(submission.username))
+                else:
+                    improved |= self._score(submission, state, outcome)
+                scored += 1
+                if sleep is not None and scored % self.chunk == 0:
+                    sleep(0)  # let other green threads run during a burst
+            state = self.get_state(game_id)
+            if improved and state is not None:
+                self.publish_ranking(game_id, ranking_payload(game_id, state))
+        return scored
+
+    def _replay(self, state: GameState, moves: List[Dict]):
+        if len(moves) > MAX_SOLUTION_MOVES:
+            return IllegalMove(f"more than {MAX_SOLUTION_MOVES} moves")
+        try:
+            return state.replay(moves)
+        except IllegalMove as e:
+            return e
+
+    def _score(self, submission: Submission, state: GameState, length: int) -> bool:
+        improved = state.record_solution(submission.username, length)
+        optimal = _optimal(state)
+        self.emit("solution_scored", {
+            "game_id": submission.game_id,
+            "length": length,
+            "optimal": optimal,
+            "excess": _excess(length, optimal),
+            "best": state.best_length(submission.username),
+        }, to=submission.sid)
+        return improved
+
+    def _reject(self, submission: Submission, reason: str, verified: Optional[int]) -> None:
+        self.emit("solution_rejected", {
+            "game_id": submission.game_id,
+            "reason": reason,
+            "verified_solution_length": verified,
+        }, to=submission.sid)
+
+    def run(self, sleep: Callable[[float], None]) -> None:
+        while True:
+            sleep(self.interval)
+            try:
+                self.flush(sleep)
+            except Exception as e:
+                # the batch already left `pending`: drop it rather than stop scoring
+                print("Scoring batch failed:", repr(e))
+
+    def start(self, start_background_task, sleep) -> None:
+        """Start the scorer once (called from the first socket connect)."""
+        if self.running or not self.interval:
+            return
+        self.running = True
+        start_background_task(self.run, sleep)
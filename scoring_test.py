@@ -0,0 +1,86 @@
+from conftest import received, run_ticks
+from game_state import GameState
+from scoring import SolutionScorer
+
+class Recorder:
+    def __init__(self):
+        self.emitted = []
+        self.rankings = []
+
+    def emit(self, event, payload, to=None):
+        self.emitted.append((event, payload, to))
+
+    def publish(self, game_id, payload):
+        self.rankings.append((game_id, payload))
+
+def make_scorer(states, recorder):
+    return SolutionScorer(states.get, recorder.emit, recorder.publish)
+
+def test_scores_a_replayed_solution_and_ranks_it(board, solution):
+    recorder = Recorder()
+    scorer = make_scorer({1: GameState(board, solution)}, recorder)
+    scorer.submit(1, "alice", "sid-a", solution)
+    assert scorer.flush() == 1
+    ((event, payload, to),) = recorder.emitted
+    assert (event, to) == ("solution_scored", "sid-a")
+    assert payload["length"] == payload["optimal"] == len(solution)
+    assert payload["excess"] == 0
+    ((game_id, ranking),) = recorder.rankings
+    assert ranking["ranking"] == [{"username": "alice", "length": len(solution), "excess": 0}]
+
+def test_rejects_solutions_that_miss_the_target(board, solution):
+    recorder = Recorder()
+    scorer = make_scorer({1: GameState(board, solution)}, recorder)
+    scorer.submit(1, "alice", "sid-a", solution[:-1])
+    scorer.submit(2, "bob", "sid-b", solution)
+    scorer.flush()
+    assert [(event, to) for event, _, to in recorder.emitted] == [
+        ("solution_rejected", "sid-a"), ("solution_rejected", "sid-b")]
+    assert recorder.emitted[1][1]["reason"] == "no running game"
+    assert recorder.rankings == []
+
+def test_malformed_moves_are_rejected_not_raised(board, solution):
+    recorder = Recorder()
+    scorer = make_scorer({1: GameState(board, solution)}, recorder)
+    for moves in ([{"dir": []}], [{"robot": 0, "dir": {}}], [{"robot": "0", "dir": "Up"}],
+                  [{"robot": True, "dir": "Up"}], ["Up"]):
+        scorer.submit(1, "alice", "sid-a", moves)
+    scorer.submit(1, "bob", "sid-b", solution)
+    assert scorer.flush() == 6
+    assert [event for event, _, _ in recorder.emitted] == ["solution_rejected"] * 5 + ["solution_scored"]
+
+def test_run_keeps_scoring_after_a_failed_batch(board, solution):
+    recorder = Recorder()
+    states = {1: GameState(board, solution)}
+    lookups = []
+
+    def get_state(game_id):
+        lookups.append(game_id)
+        if len(lookups) == 1:
+            raise RuntimeError("state lookup failed")
+        return states.get(game_id)
+
+    scorer = SolutionScorer(get_state, recorder.emit, recorder.publish)
+    # one submission per tick: bob's batch fails, alice's comes after it
+    run_ticks(scorer.run,
+              lambda: scorer.submit(1, "bob", "sid-b", solution),
+              lambda: scorer.submit(1, "alice", "sid-a", solution))
+    assert scorer.pending == []
+    assert [(event, to) for event, _, to in recorder.emitted] == [("solution_scored", "sid-a")]
+
+def test_submit_solution_rejects_malformed_payloads(players):
+    game_id, alice, bob = players
+    for data in ("moves", ["moves"], {"game_id": game_id, "moves": {"dir": "Up"}},
+                 {"game_id": game_id, "moves": [{"dir": []}]}):
+        alice.emit("submit_solution", data)
+        (rejected,) = received(alice, "solution_rejected")
+        assert rejected["verified_solution_length"] is None
+
+def test_submit_solution_scores_after_a_malformed_one(server, players, solution):
+    game_id, alice, bob = players
+    alice.emit("submit_solution", {"game_id": game_id, "moves": [{"dir": []}]})
+    assert received(alice, "solution_rejected")
+    bob.emit("submit_solution", {"game_id": game_id, "moves": solution})
+    (scored,) = received(bob, "solution_scored")
+    assert scored["length"] == len(solution)
+    assert server.scorer.pending == []
@@ -0,0 +1,339 @@
+import json
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from matchmaking import Lobby
+from snapshots import GameSnapshots, Seat
+
+# ----------------------------
+# Shared state for multi-worker deployments
+# ----------------------------
+# With MESSAGE_QUEUE / SHARED_STATE_URL set to redis://..., every server
+# process talks to the same Redis: Socket.IO broadcasts go through its pub/sub
+# channel and matchmaking + game boards live in its keys. Each process runs a
+# single gunicorn worker (see the Procfile): Flask-SocketIO can't route a
+# long-polling client between workers of one process, so scale by running more
+# processes or dynos behind a load balancer with sticky sessions.
+# SHARED_STATE_URL=memory:// swaps Redis for FakeRedis, a stand-in with the same
+# method names that lives in one process: it runs the SharedMatchmaker,
+# SharedBoards, SharedSubRooms and SharedSnapshots code paths without a server,
+# but no other process can see it, so it says nothing about cross-process
+# behaviour. shared_state_test.py covers that against a real server when
+# TEST_REDIS_URL is set.
+
+class FakeRedis:
+    """The subset of the redis-py client API used here, in this process's memory only."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: Dict[str, object] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False):
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+            return True
+
+    def delete(self, *keys):
+        with self.lock:
+            return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    def rpush(self, key, *values):
+        with self.lock:
+            items = self.data.setdefault(key, [])
+            items.extend(str(v).encode() for v in values)
+            return len(items)
+
+    def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return list(items[start:] if end == -1 else items[start:end + 1])
+
+    def lindex(self, key, index):
+        items = self.data.get(key, [])
+        return items[index] if -len(items) <= index < len(items) else None
+
+    def lrem(self, key, count, value):
+        with self.lock:
+            items = self.data.get(key, [])
+            value = str(value).encode()
+            kept = [v for v in items if v != value]
+            self.data[key] = kept
+            return len(items) - len(kept)
+
+    def hset(self, key, mapping):
+        with self.lock:
+            self.data.setdefault(key, {}).update(
+                {k: str(v).encode() for k, v in mapping.items()}
+            )
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hsetnx(self, key, field, value):
+        with self.lock:
+            fields = self.data.setdefault(key, {})
+            if field in fields:
+                return 0
+            fields[field] = str(value).encode()
+            return 1
+
+    def hdel(self, key, *fields):
+        with self.lock:
+            values = self.data.get(key, {})
+            return sum(values.pop(field, None) is not None for field in fields)
+
+    def hgetall(self, key):
+        return {k.encode(): v for k, v in self.data.get(key, {}).items()}
+
+_fake_redis = FakeRedis()
+
+def get_redis(url: str):
+    """Client for a shared state URL: memory:// (process-wide FakeRedis) or redis://."""
+    if url.startswith("memory://"):
+        return _fake_redis
+    import redis  # in requirements.txt, but only imported for redis:// URLs
+    return redis.Redis.from_url(url)
+
+class SharedMatchmaker:
+    """
+    matchmaking.Matchmaker with lobbies stored in Redis, so joins arriving at
+    different workers fill the same lobbies. Seating uses RPUSH, whose return
+    value is the seat number, so two workers can never overfill a lobby or both
+    start the same game.
+    """
+
+    def __init__(self, redis, prefix: str = "rr"):
+        self.redis = redis
+        self.prefix = prefix
+
+    def _lane_key(self, lane: Hashable) -> str:
+        return f"{self.prefix}:lane:{json.dumps(lane)}"
+
+    def _lobby_key(self, game_id: int) -> str:
+        return f"{self.prefix}:lobby:{game_id}"
+
+    def _members_key(self, game_id: int) -> str:
+        return f"{self.prefix}:lobby:{game_id}:members"
+
+    def lobby_of(self, game_id: int) -> Optional[Lobby]:
+        info = self.redis.hgetall(self._lobby_key(game_id))
+        if not info:
+            return None
+        lobby = Lobby(game_id, json.loads(info[b"lane"]), int(info[b"max_players"]))
+        lobby.usernames = [m.decode() for m in self.redis.lrange(self._members_key(game_id), 0, -1)]
+        return lobby
+
+    def find_lobby(self, lane: Hashable) -> Optional[Lobby]:
+        lane_key = self._lane_key(lane)
+        while True:
+            head = self.redis.lindex(lane_key, 0)
+            if head is None:
+                return None
+            lobby = self.lobby_of(int(head))
+            if lobby is not None and not lobby.full:
+                return lobby
+            self.redis.lrem(lane_key, 0, head)  # full or gone: stop offering it
+
+    def open_lobby(self, game_id: int, lane: Hashable, max_players: int) -> Lobby:
+        self.redis.hset(self._lobby_key(game_id), mapping={
+            "lane": json.dumps(lane),
+            "max_players": max_players,
+        })
+        self.redis.rpush(self._lane_key(lane), game_id)
+        return Lobby(game_id, lane, max_players)
+
+    def add_player(self, lobby: Lobby, username: str) -> bool:
+        """Seat a player; False if the lobby filled up in another worker first."""
+        current = [m.decode() for m in self.redis.lrange(self._members_key(lobby.game_id), 0, -1)]
+        if username in current:
+            lobby.usernames = current
+            return True
+        seat = self.redis.rpush(self._members_key(lobby.game_id), username)
+        if seat > lobby.max_players:
+            self.redis.lrem(self._members_key(lobby.game_id), 1, username)
+            return False
+        lobby.usernames = [m.decode() for m in self.redis.lrange(self._members_key(lobby.game_id), 0, -1)]
+        if seat == lobby.max_players:
+            self.redis.lrem(self._lane_key(lobby.lane), 0, lobby.game_id)
+        return True
+
+    def claim_start(self, game_id: int) -> bool:
+        """True for exactly one caller per game, across all workers."""
+        return bool(self.redis.set(f"{self.prefix}:lobby:{game_id}:started", 1, nx=True))
+
+    def remove_game(self, game_id: int) -> None:
+        lobby = self.lobby_of(game_id)
+        if lobby is not None:
+            self.redis.lrem(self._lane_key(lobby.lane), 0, game_id)
+        self.redis.delete(self._lobby_key(game_id), self._members_key(game_id),
+                          f"{self.prefix}:lobby:{game_id}:started")
+
+class SharedBoards:
+    """
+    Board + solution of every running game, readable by all workers, with its
+    GameRound fields and every player's shortest verified solution so far:
+    whichever worker ends the game writes its round.
+    """
+
+    def __init__(self, redis, prefix: str = "rr"):
+        self.redis = redis
+        self.prefix = prefix
+
+    def _best_key(self, game_id: int) -> str:
+        return f"{self.prefix}:best:{game_id}"
+
+    def put(self, game_id: int, board: Dict, solution: List[Dict], round_fields: Optional[Dict] = None) -> None:
+        """round_fields: JSON-safe GameRound fields known at the start."""
+        self.redis.set(f"{self.prefix}:board:{game_id}",
+                       json.dumps({"board": board, "solution": solution, "round": round_fields}))
+
+    def get(self, game_id: int) -> Optional[Dict]:
+        raw = self.redis.get(f"{self.prefix}:board:{game_id}")
+        return json.loads(raw) if raw else None
+
+    def exists(self, game_id: int) -> bool:
+        return bool(self.redis.exists(f"{self.prefix}:board:{game_id}"))
+
+    def record_best(self, game_id: int, username: str, length: int) -> None:
+        """Keep `length` if it's the player's shortest on any worker. A player's socket
+        lives on one worker at a time, so its read-then-write can't race itself."""
+        best = self.bests(game_id).get(username)
+        if best is None or length < best:
+            self.redis.hset(self._best_key(game_id), mapping={username: length})
+
+    def bests(self, game_id: int) -> Dict[str, int]:
+        return {k.decode(): int(v) for k, v in self.redis.hgetall(self._best_key(game_id)).items()}
+
+    def delete(self, game_id: int) -> bool:
+        """Drop a game's entry; only the one call that removed it gets True."""
+        removed = self.redis.delete(f"{self.prefix}:board:{game_id}")
+        self.redis.delete(self._best_key(game_id))
+        return bool(removed)
+
+class SharedSubRooms:
+    """
+    broadcast.SubRooms in Redis, so a worker also emits to sub-rooms whose
+    members joined elsewhere. Every push reads the membership, so each room's
+    set is cached here for `refresh` seconds instead of costing a Redis round
+    trip per move. Sub-rooms added by this worker show up at once, ones added
+    on another worker (a resume with another encoding) within `refresh`.
+    """
+
+    def __init__(self, redis, prefix: str = "rr", refresh: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.redis = redis
+        self.prefix = prefix
+        self.refresh = refresh
+        self.clock = clock
+        self.cache: Dict[str, Tuple[float, Set[str]]] = {}  # room -> (read at, sub-rooms)
+        self.pruned = clock()
+
+    def _key(self, room: str) -> str:
+        return f"{self.prefix}:subrooms:{room}"
+
+    def add(self, room: str, sub: str) -> None:
+        self.redis.hset(self._key(room), mapping={sub: 1})
+        if room in self.cache:
+            self.cache[room][1].add(sub)
+
+    def get(self, room: str) -> Set[str]:
+        now = self.clock()
+        if now - self.pruned >= self.refresh:
+            # rooms closed on other workers are never cleared here
+            self.cache = {r: entry for r, entry in self.cache.items() if now - entry[0] < self.refresh}
+            self.pruned = now
+        entry = self.cache.get(room)
+        if entry is None or now - entry[0] >= self.refresh:
+            entry = self.cache[room] = (now, {sub.decode() for sub in self.redis.hgetall(self._key(room))})
+        return entry[1]
+
+    def clear(self, room: str) -> None:
+        self.redis.delete(self._key(room))
+        self.cache.pop(room, None)
+
+class SharedSnapshots(GameSnapshots):
+    """
+    snapshots.GameSnapshots with tokens, seat sockets, resume deadlines and
+    the progress of held seats in Redis, so a player can resume on any worker
+    and every worker's reaper sees every dropped seat; the one reaper that
+    claims an expired game ends it.
+    Deadlines are wall-clock times, since workers share no monotonic clock.
+    """
+
+    def __init__(self, redis, on_expired: Callable[[int], None], ttl: float = 30.0,
+                 clock: Callable[[], float] = time.time, prefix: str = "rr"):
+        super().__init__(on_expired, ttl, clock)
+        self.redis = redis
+        self.prefix = prefix
+
+    def _key(self, kind: str, game_id) -> str:
+        return f"{self.prefix}:{kind}:{game_id}"
+
+    def _dropped_games_key(self) -> str:
+        return f"{self.prefix}:dropped_games"  # game id -> 1, for every game with a held seat
+
+    def issue(self, game_id: int, username: str, sid: str) -> str:
+        token = str(uuid.uuid4())
+        if self.redis.hsetnx(self._key("seats", game_id), username, token):
+            self.redis.set(self._key("token", token), json.dumps([game_id, username]))
+        else:
+            token = self.redis.hget(self._key("seats", game_id), username).decode()
+        self.redis.hset(self._key("sids", game_id), mapping={username: sid})
+        return token
+
+    def lookup(self, token) -> Optional[Seat]:
+        raw = self.redis.get(self._key("token", token)) if isinstance(token, str) else None
+        return tuple(json.loads(raw)) if raw else None
+
+    def is_current(self, game_id, username, sid: str) -> bool:
+        current = self.redis.hget(self._key("sids", game_id), username) if username is not None else None
+        return current is None or current.decode() == sid
+
+    def drop(self, game_id: int, username: str, progress: Optional[Dict] = None) -> None:
+        if progress is not None:
+            self.redis.hset(self._key("progress", game_id), mapping={username: json.dumps(progress)})
+        self.redis.hset(self._key("dropped", game_id), mapping={username: self.clock() + self.ttl})
+        self.redis.hset(self._dropped_games_key(), mapping={str(game_id): 1})
+
+    def progress(self, game_id: int, username: str) -> Optional[Dict]:
+        raw = self.redis.hget(self._key("progress", game_id), username)
+        return json.loads(raw) if raw else None
+
+    def resume(self, game_id: int, username: str, sid: str) -> None:
+        # the game stays in dropped_games until it ends; expired() skips it meanwhile
+        self.redis.hset(self._key("sids", game_id), mapping={username: sid})
+        self.redis.hdel(self._key("dropped", game_id), username)
+        # the resuming worker has restored it; a later reconnect without a drop must not reuse it
+        self.redis.hdel(self._key("progress", game_id), username)
+
+    def forget(self, game_id) -> None:
+        tokens = self.redis.hgetall(self._key("seats", game_id)).values()
+        self.redis.delete(*[self._key("token", token.decode()) for token in tokens],
+                          self._key("seats", game_id), self._key("sids", game_id),
+                          self._key("dropped", game_id), self._key("progress", game_id))
+        self.redis.hdel(self._dropped_games_key(), str(game_id))
+
+    def retry(self, game_id: int) -> None:
+        # expired() claimed it out of dropped_games; put it back while seats are still held
+        if self.redis.hgetall(self._key("dropped", game_id)):
+            self.redis.hset(self._dropped_games_key(), mapping={str(game_id): 1})
+
+    def expired(self) -> List[int]:
+        now = self.clock()
+        games = []
+        for game_id in self.redis.hgetall(self._dropped_games_key()):
+            deadlines = self.redis.hgetall(self._key("dropped", game_id.decode())).values()
+            # HDEL returns 1 to one worker only: that one ends the game
+            if any(float(deadline) <= now for deadline in deadlines) and \
+                    self.redis.hdel(self._dropped_games_key(), game_id.decode()):
+                games.append(int(game_id))
+        return games
@@ -0,0 +1,59 @@
+import os
+import time
+
+import pytest
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL")  # a throwaway server: the test flushes it
+cross_process = pytest.mark.skipif(not REDIS_URL, reason="set TEST_REDIS_URL=redis://... to run")
+
+class Player:
+    """A Socket.IO client that records every event it receives."""
+
+    def __init__(self, url):
+        import socketio
+
+        self.events = []
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on("*", lambda event, *args: self.events.append((event, args[0] if args else None)))
+        self.sio.connect(url, transports=["polling"])  # polling is what needs sticky routing
+
+    def wait_for(self, event, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for name, data in self.events:
+                if name == event:
+                    return data
+            time.sleep(0.05)
+        raise AssertionError(f"no {event} within {timeout}s, got {[name for name, _ in self.events]}")
+
+@pytest.fixture
+def servers():
+    """Two single-worker server processes sharing one Redis, as behind a sticky load balancer."""
+    import redis
+    from loadtest import spawn_servers, stop_servers
+
+    redis.Redis.from_url(REDIS_URL).flushdb()
+    servers = spawn_servers(2, {
+        "MESSAGE_QUEUE": REDIS_URL, "RECONNECT_GRACE": "0",
+        "BOARD_ROWS": "6", "BOARD_COLS": "6", "BOARD_ROBOTS": "2",
+    })
+    yield [f"http://127.0.0.1:{port}" for _, port in servers]
+    stop_servers(servers)
+
+@cross_process
+def test_a_game_spans_two_server_processes(servers):
+    alice, bob = Player(servers[0]), Player(servers[1])
+    alice.sio.emit("join_game", {"username": "alice"})
+    bob.sio.emit("join_game", {"username": "bob"})
+    start = alice.wait_for("game_start")
+    assert bob.wait_for("game_start")["game_id"] == start["game_id"]
+
+    # a move handled by alice's process reaches bob through the message queue
+    move = start["solution"][0]
+    alice.sio.emit("move", {"move": {"robot": move["robot"], "dir": move["dir"]}})
+    assert bob.wait_for("game_update")["username"] == "alice"
+
+    # and so does the end of the game when she leaves
+    alice.sio.disconnect()
+    assert bob.wait_for("end_game")["message"]
+    bob.sio.disconnect()
@@ -0,0 +1,113 @@
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ----------------------------
+# Reconnect grace period
+# ----------------------------
+# Every seat gets a session token in join_game (also written to its
+# GameSession row). When a player's socket drops in a running game, the game is
+# kept as it is: its GameState already holds the board, solution, every
+# player's robots and best lengths, so it is the snapshot. The seat is held
+# for `ttl` seconds; resume_game with the token puts the player back on the new
+# socket, and a game with a seat that wasn't resumed in time is ended by the
+# background reaper as if the player had left.
+#
+# Seats also remember their current socket: mobile clients often reconnect
+# before the server notices the old socket died, and that old socket's
+# disconnect must not drop the resumed player.
+#
+# GameSnapshots keeps all of this in the worker's memory; with SHARED_STATE_URL
+# set, shared_state.SharedSnapshots keeps it in Redis instead, so a player can
+# resume on another worker (from the shared board, see app.get_game_state).
+# That worker has no GameState of the player, so a held seat also carries the
+# player's robots and move count (GameState.progress) from the worker it dropped on.
+
+Seat = Tuple[int, str]  # (game_id, username)
+
+class GameSnapshots:
+    """Session tokens, current sockets and resume deadlines of seats, see the module comment."""
+
+    def __init__(self, on_expired: Callable[[int], None], ttl: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.on_expired = on_expired  # game id -> end the game
+        self.ttl = ttl
+        self.clock = clock
+        self.tokens: Dict[str, Seat] = {}
+        self.seats: Dict[int, Dict[str, str]] = {}  # game id -> username -> token
+        self.sids: Dict[Seat, str] = {}
+        self.dropped: Dict[int, Dict[str, float]] = {}  # game id -> username -> resume deadline
+        self.running = False
+
+    def issue(self, game_id: int, username: str, sid: str) -> str:
+        """Session token of a seat (the same one if the player re-joins it), bound to `sid`."""
+        seats = self.seats.setdefault(game_id, {})
+        token = seats.get(username)
+        if token is None:
+            token = seats[username] = str(uuid.uuid4())
+            self.tokens[token] = (game_id, username)
+        self.sids[(game_id, username)] = sid
+        return token
+
+    def lookup(self, token) -> Optional[Seat]:
+        return self.tokens.get(token) if isinstance(token, str) else None
+
+    def is_current(self, game_id, username, sid: str) -> bool:
+        """False if the seat has moved to a newer socket than `sid`."""
+        return self.sids.get((game_id, username), sid) == sid
+
+    def drop(self, game_id: int, username: str, progress: Optional[Dict] = None) -> None:
+        """
+        Hold a disconnected player's seat for `ttl` seconds. `progress`
+        (GameState.progress) is only kept where another worker may resume the seat.
+        """
+        self.dropped.setdefault(game_id, {})[username] = self.clock() + self.ttl
+
+    def progress(self, game_id: int, username: str) -> Optional[Dict]:
+        """Progress saved with a held seat; None when this worker's GameState has it."""
+        return None
+
+    def resume(self, game_id: int, username: str, sid: str) -> None:
+        self.sids[(game_id, username)] = sid
+        players = self.dropped.get(game_id)
+        if players is not None:
+            players.pop(username, None)
+            if not players:
+                del self.dropped[game_id]
+
+    def forget(self, game_id) -> None:
+        """Drop every token and hold of an ended game."""
+        self.dropped.pop(game_id, None)
+        for username, token in self.seats.pop(game_id, {}).items():
+            del self.tokens[token]
+            self.sids.pop((game_id, username), None)
+
+    def expired(self) -> List[int]:
+        now = self.clock()
+        return [game_id for game_id, players in self.dropped.items()
+                if any(deadline <= now for deadline in players.values())]
+
+    def retry(self, game_id: int) -> None:
+        """Keep an expired game for the next tick after ending it failed (it is still in `dropped`)."""
+
+    def run(self, sleep: Callable[[float], None], interval: float = 1.0) -> None:
+        while True:
+            sleep(interval)
+            try:
+                for game_id in self.expired():
+                    try:
+                        self.on_expired(game_id)
+                    except Exception as e:
+                        # e.g. Redis or the DB is unreachable: hold the seat and try again
+                        print(f"Ending expired game {game_id} failed:", repr(e))
+                        self.retry(game_id)
+            except Exception as e:
+                # anything else must not end the reaper, or held seats would never expire
+                print("Reaper tick failed:", repr(e))
+
+    def start(self, start_background_task, sleep) -> None:
+        """Start the reaper once (called from the first socket connect)."""
+        if self.running:
+            return
+        self.running = True
+        start_background_task(self.run, sleep)
@@ -0,0 +1,85 @@
+import pytest
+
+from conftest import connect, received, run_ticks
+from shared_state import FakeRedis, SharedSnapshots
+from snapshots import GameSnapshots
+
+@pytest.fixture
+def server_config():
+    return {"SHARED_STATE_URL": "memory://", "RECONNECT_GRACE": 30}
+
+def join(server, username):
+    client = connect(server)
+    client.emit("join_game", {"username": username})
+    (seat,) = received(client, "game_session")
+    return client, seat["session_token"]
+
+def test_resume_on_another_worker_keeps_robots_and_moves(server, board, solution):
+    alice, token = join(server, "alice")
+    bob, _ = join(server, "bob")
+    for move in solution[:2]:
+        alice.emit("move", {"move": {"robot": move["robot"], "dir": move["dir"]}})
+    (state,) = server.game_states.values()
+    robots = state.snapshot("alice")["robots"]
+
+    alice.disconnect()
+    (dropped,) = received(bob, "player_dropped")
+    assert dropped["username"] == "alice"
+
+    # another worker only has the shared board
+    server.game_states.clear()
+    resumed = connect(server)
+    resumed.emit("resume_game", {"session_token": token})
+    (state,) = received(resumed, "game_resumed")
+    assert state["username"] == "alice"
+    assert state["moves"] == 2
+    assert state["robots"] == robots != board["robots"]
+
+    # the game goes on from there
+    for move in solution[2:]:
+        resumed.emit("move", {"move": {"robot": move["robot"], "dir": move["dir"]}})
+    updates = received(resumed, "game_update")
+    assert updates[-1]["move"]["solved"]
+    assert updates[-1]["move"]["moves"] == len(solution)
+
+def test_resume_without_a_drop_keeps_the_live_state(server, solution):
+    alice, token = join(server, "alice")
+    bob, _ = join(server, "bob")
+    move = solution[0]
+    alice.emit("move", {"move": {"robot": move["robot"], "dir": move["dir"]}})
+    resumed = connect(server)
+    resumed.emit("resume_game", {"session_token": token})
+    (state,) = received(resumed, "game_resumed")
+    assert state["moves"] == 1
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_reaper_survives_errors_and_retries_the_game(shared):
+    now, ended, reads = [0.0], [], []
+
+    def end_game(game_id):
+        ended.append(game_id)
+        if len(ended) == 1:
+            raise ConnectionError("redis went away")
+        reaper.forget(game_id)
+
+    if shared:
+        reaper = SharedSnapshots(FakeRedis(), on_expired=end_game, ttl=5, clock=lambda: now[0])
+    else:
+        reaper = GameSnapshots(on_expired=end_game, ttl=5, clock=lambda: now[0])
+    token = reaper.issue(1, "alice", "sid-a")
+    reaper.drop(1, "alice")
+    expired = reaper.expired
+
+    def expired_failing_once():
+        reads.append(1)
+        if len(reads) == 1:
+            raise ConnectionError("redis went away")
+        return expired()
+
+    reaper.expired = expired_failing_once
+    later = lambda: now.__setitem__(0, now[0] + 5)
+    # tick 1: reading the held seats fails, tick 2: ending the game fails, tick 3: it ends
+    run_ticks(reaper.run, later, later, later, later)
+    assert ended == [1, 1]
+    assert reaper.lookup(token) is None
+    assert expired() == []
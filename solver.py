@@ -0,0 +1,708 @@
+import heapq
+import sys
+import time
+from array import array
+from typing import List, Tuple, Optional, Dict, NamedTuple
+
+from symmetry import SYMMETRIES, IDENTITY, cell_permutation, transform_cell, transform_shape, transform_vector
+
+# Directions (dx, dy) and name
+DIRECTIONS = {
+    "Down": (0, 1),
+    "Up": (0, -1),
+    "Left": (-1, 0),
+    "Right": (1, 0),
+}
+
+def is_blocked_by_wall(grid: List[List[int]], x: int, y: int, dx: int, dy: int) -> bool:
+    """
+    Return True if movement from (x,y) to (x+dx, y+dy) is blocked by a wall (either current cell or target cell).
+    grid[y][x] uses bitmask: 1=N, 2=E, 4=S, 8=W
+    """
+    rows = len(grid)
+    cols = len(grid[0])
+    nx, ny = x + dx, y + dy
+    # out of bounds treated as blocked
+    if not (0 <= nx < cols and 0 <= ny < rows):
+        return True
+
+    # moving Up (dy == -1): blocked if current has North or target has South
+    if dx == 0 and dy == -1:
+        return (grid[y][x] & 1) != 0 or (grid[ny][nx] & 4) != 0
+    # moving Down (dy == 1): blocked if current has South or target has North
+    if dx == 0 and dy == 1:
+        return (grid[y][x] & 4) != 0 or (grid[ny][nx] & 1) != 0
+    # moving Right (dx == 1): blocked if current has East or target has West
+    if dx == 1 and dy == 0:
+        return (grid[y][x] & 2) != 0 or (grid[ny][nx] & 8) != 0
+    # moving Left (dx == -1): blocked if current has West or target has East
+    if dx == -1 and dy == 0:
+        return (grid[y][x] & 8) != 0 or (grid[ny][nx] & 2) != 0
+
+    return True  # fallback: block
+
+def slide_until_block(grid: List[List[int]], start: Tuple[int,int],
+                     dx: int, dy: int, occupied: set) -> Tuple[int,int]:
+    """
+    Slide from start (x,y) along (dx,dy) until the next cell would be blocked by wall or occupied.
+    Return final (x,y).
+    """
+    x, y = start
+    rows = len(grid)
+    cols = len(grid[0])
+
+    while True:
+        nx, ny = x + dx, y + dy
+        # stop if out of bounds or wall between current and next
+        if not (0 <= nx < cols and 0 <= ny < rows):
+            break
+        if is_blocked_by_wall(grid, x, y, dx, dy):
+            break
+        # stop if occupied (there is a robot at next cell)
+        if (nx, ny) in occupied:
+            break
+        # otherwise move to nx,ny and continue
+        x, y = nx, ny
+
+    return (x, y)
+
+def compile_board(grid: List[List[int]]) -> Dict[str, List[List[Tuple[int,int]]]]:
+    """
+    Precompute, for every cell and every direction in DIRECTIONS, the cell a robot
+    would stop on if only walls (no robots) were on the board.
+    Returns { dir_name: stops } where stops[y][x] is the wall-only stop (x,y).
+    """
+    rows = len(grid)
+    cols = len(grid[0])
+    tables = {}
+
+    for dname, (dx, dy) in DIRECTIONS.items():
+        stops = [[None] * cols for _ in range(rows)]
+        # visit cells starting from the edge we slide towards, so the
+        # neighbour's stop is always known before the cell itself
+        ys = range(rows - 1, -1, -1) if dy > 0 else range(rows)
+        xs = range(cols - 1, -1, -1) if dx > 0 else range(cols)
+        for y in ys:
+            for x in xs:
+                if is_blocked_by_wall(grid, x, y, dx, dy):
+                    stops[y][x] = (x, y)
+                else:
+                    stops[y][x] = stops[y + dy][x + dx]
+        tables[dname] = stops
+
+    return tables
+
+def pack_positions(cells: List[int], bits: int) -> int:
+    """
+    Canonical encoding for the visited set: robot cell indices (y*cols + x) sorted
+    and packed into a single int, `bits` bits per robot. Any robot may finish on
+    the target, so robots are interchangeable and sorting merges equivalent states.
+    """
+    state = 0
+    for shift, cell in enumerate(sorted(cells)):
+        state |= cell << (shift * bits)
+    return state
+
+def unpack_state(state: int, num_robots: int, bits: int) -> List[int]:
+    """Inverse of pack_positions: sorted list of robot cell indices."""
+    mask = (1 << bits) - 1
+    return [(state >> (i * bits)) & mask for i in range(num_robots)]
+
+def flatten_tables(tables: Dict, cols: int) -> List[Tuple[str, int, List[int]]]:
+    """
+    Turn compile_board tables into (dir_name, step, stops) with cells as indices
+    y*cols + x, so a slide is one list lookup on ints.
+    """
+    flat = []
+    for dname, (dx, dy) in DIRECTIONS.items():
+        stops = [x + y * cols for row in tables[dname] for (x, y) in row]
+        flat.append((dname, dx + dy * cols, stops))
+    return flat
+
+def slide_cell(stops: List[int], step: int, cols: int, cell: int, cells: List[int]) -> int:
+    """Slide the robot on `cell` to its wall stop, stopping early before any robot in `cells`."""
+    end = stops[cell]
+    if step > 0:
+        for other in cells:
+            if cell < other <= end and (step == 1 or (other - cell) % cols == 0):
+                end = other - step
+    else:
+        for other in cells:
+            if end <= other < cell and (step == -1 or (cell - other) % cols == 0):
+                end = other - step
+    return end
+
+# How many node expansions happen between deadline checks
+DEADLINE_CHECK_INTERVAL = 1024
+
+class SolveAborted(Exception):
+    """Raised by a solver engine that stops before the search ends."""
+    reason = "aborted"
+
+class SolveTimeout(SolveAborted):
+    """The solver's deadline passed."""
+    reason = "deadline"
+
+class NodeBudgetExceeded(SolveAborted):
+    """The solver expanded more states than its node budget allows."""
+    reason = "node_budget"
+
+def check_deadline(deadline: Optional[float]) -> None:
+    """Raise SolveTimeout once time.monotonic() is past `deadline` (None = no limit)."""
+    if deadline is not None and time.monotonic() > deadline:
+        raise SolveTimeout("solver deadline exceeded")
+
+def check_budget(expanded: int, deadline: Optional[float], max_nodes: Optional[int]) -> None:
+    """Per-expansion budget check; the clock is only read every DEADLINE_CHECK_INTERVAL nodes."""
+    if max_nodes is not None and expanded > max_nodes:
+        raise NodeBudgetExceeded(f"expanded more than {max_nodes} states")
+    if expanded % DEADLINE_CHECK_INTERVAL == 0:
+        check_deadline(deadline)
+
+# Rough size of one int object stored in a set/dict, for memory estimates
+INT_OBJECT_BYTES = 32
+
+class SolverStats:
+    """
+    What a solver engine did, filled in when it returns or aborts (pass one in
+    as `stats`). Reusing one SolverStats across solves aggregates them: counts
+    and times add up, peaks keep the maximum.
+    """
+
+    def __init__(self):
+        self.solves = 0
+        self.expanded = 0           # states taken off the queue
+        self.generated = 0          # distinct states stored
+        self.peak_frontier = 0      # largest open queue / heap
+        self.max_depth = 0          # deepest move count reached
+        self.depth_histogram: List[int] = []  # states reached per depth
+        self.wall_time = 0.0        # seconds
+        self.memory_bytes = 0       # estimated peak size of the search structures
+        self.aborted: Optional[str] = None  # SolveAborted.reason of the last abort
+
+    def record(self, expanded: int, generated: int, peak_frontier: int,
+               depth_histogram: List[int], wall_time: float, memory_bytes: int,
+               aborted: Optional[str] = None) -> None:
+        self.solves += 1
+        self.expanded += expanded
+        self.generated += generated
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+        self.max_depth = max(self.max_depth, len(depth_histogram) - 1)
+        for depth, count in enumerate(depth_histogram):
+            if depth < len(self.depth_histogram):
+                self.depth_histogram[depth] += count
+            else:
+                self.depth_histogram.append(count)
+        self.wall_time += wall_time
+        self.memory_bytes = max(self.memory_bytes, memory_bytes)
+        if aborted is not None:
+            self.aborted = aborted
+
+    def as_dict(self) -> Dict:
+        return {
+            "solves": self.solves,
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "peak_frontier": self.peak_frontier,
+            "max_depth": self.max_depth,
+            "depth_histogram": list(self.depth_histogram),
+            "wall_time": self.wall_time,
+            "memory_bytes": self.memory_bytes,
+            "aborted": self.aborted,
+        }
+
+def estimate_memory(states, parents, dirs, table) -> int:
+    """Approximate bytes held by the node arrays plus a visited set/dict of ints."""
+    arrays = sum(a.itemsize * len(a) for a in (states, parents, dirs))
+    return arrays + sys.getsizeof(table) + len(table) * INT_OBJECT_BYTES
+
+class SearchContext(NamedTuple):
+    """Board compiled once per solve and shared by every solver engine."""
+    rows: int
+    cols: int
+    robots: List[int]   # robot cell indices, in board order
+    target: int         # target cell index
+    bits: int           # bits per robot in a packed state
+    moves: List[Tuple[str, int, List[int]]]  # flatten_tables output
+
+def prepare_search(board: Dict) -> SearchContext:
+    """Compile a board dict ('grid', 'robots' [x,y], 'target' (x,y)) into a SearchContext."""
+    grid = board["grid"]
+    rows = len(grid)
+    cols = len(grid[0])
+    tx, ty = board["target"]
+    return SearchContext(
+        rows=rows,
+        cols=cols,
+        robots=[x + y * cols for (x, y) in board["robots"]],
+        target=tx + ty * cols,
+        bits=max(1, (rows * cols - 1).bit_length()),
+        moves=flatten_tables(compile_board(grid), cols),
+    )
+
+def board_automorphisms(ctx: SearchContext) -> List[List[int]]:
+    """
+    Cell permutations of the non-identity SYMMETRIES that map the board onto
+    itself (walls and target); usually none. Robots stay interchangeable under them, so states
+    that are images of each other have the same distance to the target.
+    """
+    size = ctx.rows * ctx.cols
+    index = {DIRECTIONS[dname]: i for i, (dname, _, _) in enumerate(ctx.moves)}
+    perms = []
+    for sym in SYMMETRIES:
+        if sym == IDENTITY or transform_shape(sym, ctx.rows, ctx.cols) != (ctx.rows, ctx.cols):
+            continue
+        target = (ctx.target % ctx.cols, ctx.target // ctx.cols)
+        if transform_cell(sym, *target, ctx.rows, ctx.cols) != target:
+            continue
+        perm = cell_permutation(sym, ctx.rows, ctx.cols)
+        if all(perm[stops[cell]] == ctx.moves[index[transform_vector(sym, *DIRECTIONS[dname])]][2][perm[cell]]
+               for dname, _, stops in ctx.moves for cell in range(size)):
+            perms.append(perm)
+    return perms
+
+def symmetric_key(cells: List[int], perms: List[List[int]], bits: int) -> int:
+    """Smallest pack_positions over a state and its images under board_automorphisms."""
+    best = pack_positions(cells, bits)
+    for perm in perms:
+        state = 0
+        for shift, cell in enumerate(sorted([perm[cell] for cell in cells])):
+            state |= cell << (shift * bits)
+        if state < best:
+            best = state
+    return best
+
+def solve_bfs(ctx: SearchContext, deadline: Optional[float] = None,
+              stats: Optional[SolverStats] = None,
+              max_nodes: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    Breadth-first search over packed states.
+
+    Each explored state is one packed int (see pack_positions). The queue is a set
+    of flat arrays indexed by node: state, parent node and direction, and the move
+    list is only rebuilt once the target is reached. On a board with symmetries
+    the visited set holds symmetric_key instead, so mirror images of a state are
+    expanded once. Real states are added too, so finding one again skips the
+    symmetry check; the queue keeps the real states for rebuild_moves.
+    """
+    cols, target, bits, moves = ctx.cols, ctx.target, ctx.bits, ctx.moves
+    num_robots = len(ctx.robots)
+    started = time.perf_counter()
+
+    start_key = pack_positions(ctx.robots, bits)
+    if target in ctx.robots:
+        return []
+    perms = board_automorphisms(ctx)
+
+    # BFS queue: node i = (states[i], parents[i], dirs[i]); head walks forward
+    states = array("Q", [start_key])
+    parents = array("l", [-1])
+    dirs = array("B", [0])
+    visited = {start_key, symmetric_key(ctx.robots, perms, bits)} if perms else {start_key}
+    head = 0
+    # nodes before level_end are at the current depth; histogram[d] = states at depth d
+    level_end = 1
+    histogram = [1]
+    peak_frontier = 1
+    aborted = None
+
+    try:
+        while head < len(states):
+            if head == level_end:
+                level_end = len(states)
+                histogram.append(level_end - head)
+                peak_frontier = max(peak_frontier, level_end - head)
+            check_budget(head + 1, deadline, max_nodes)
+            cells = unpack_state(states[head], num_robots, bits)
+
+            # for each robot, try sliding in each direction
+            for ridx in range(num_robots):
+                cell = cells[ridx]
+                for didx, (dname, step, stops) in enumerate(moves):
+                    new_cell = slide_cell(stops, step, cols, cell, cells)
+
+                    # if no movement, skip
+                    if new_cell == cell:
+                        continue
+
+                    new_cells = list(cells)
+                    new_cells[ridx] = new_cell
+                    key = pack_positions(new_cells, bits)
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                    if perms:
+                        seen = symmetric_key(new_cells, perms, bits)
+                        if seen != key:
+                            if seen in visited:
+                                continue
+                            visited.add(seen)
+
+                    states.append(key)
+                    parents.append(head)
+                    dirs.append(didx)
+
+                    # check if this robot reached the target
+                    if new_cell == target:
+                        histogram.append(len(states) - level_end)
+                        return rebuild_moves(states, parents, dirs, len(states) - 1,
+                                             ctx.robots, num_robots, bits, cols)
+            head += 1
+
+        # no solution
+        return None
+    except SolveAborted as e:
+        aborted = e.reason
+        raise
+    finally:
+        if stats is not None:
+            stats.record(
+                expanded=head,
+                generated=len(states),
+                peak_frontier=peak_frontier,
+                depth_histogram=histogram,
+                wall_time=time.perf_counter() - started,
+                memory_bytes=estimate_memory(states, parents, dirs, visited),
+                aborted=aborted,
+            )
+
+def target_distances(ctx: SearchContext) -> List[int]:
+    """
+    Lower bound on the moves any robot on a cell needs to reach the target.
+
+    Reverse BFS from the target that ignores other robots and lets a robot stop
+    on any cell of its slide (a robot could always be placed there as a blocker),
+    so it never overestimates. Unreachable cells get rows*cols.
+    """
+    size = ctx.rows * ctx.cols
+    dist = [size] * size
+    dist[ctx.target] = 0
+    frontier = [ctx.target]
+    depth = 0
+
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for cell in frontier:
+            for dname, step, stops in ctx.moves:
+                # walk backwards: every cell whose slide in this direction
+                # passes over `cell` can reach it in one relaxed move
+                prev = cell - step
+                while 0 <= prev < size and stops[prev] != prev and (
+                        abs(step) != 1 or prev // ctx.cols == cell // ctx.cols):
+                    if dist[prev] == size:
+                        dist[prev] = depth
+                        next_frontier.append(prev)
+                    prev -= step
+        frontier = next_frontier
+
+    return dist
+
+def solve_astar(ctx: SearchContext, deadline: Optional[float] = None,
+                stats: Optional[SolverStats] = None,
+                max_nodes: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    A* over packed states with target_distances as the heuristic.
+
+    The heuristic (minimum over robots) drops by at most one per move, so it is
+    consistent and f never decreases along the pop order. A move onto the target
+    comes from a state with h == 1, whose f already equals the goal's cost, so
+    the goal is accepted when generated (as solve_bfs does) and move counts
+    always match solve_bfs. Symmetric states share one `best` entry, as in solve_bfs.
+    """
+    cols, target, bits, moves = ctx.cols, ctx.target, ctx.bits, ctx.moves
+    num_robots = len(ctx.robots)
+    started = time.perf_counter()
+    dist = target_distances(ctx)
+    unreachable = ctx.rows * ctx.cols
+
+    start_key = pack_positions(ctx.robots, bits)
+    if target in ctx.robots:
+        return []
+    start_h = min(dist[c] for c in ctx.robots)
+    if start_h == unreachable:
+        return None
+    perms = board_automorphisms(ctx)
+
+    # node i = (states[i], parents[i], dirs[i]); heap holds (f, -g, node)
+    states = array("Q", [start_key])
+    parents = array("l", [-1])
+    dirs = array("B", [0])
+    best = {start_key: 0}
+    if perms:
+        best[symmetric_key(ctx.robots, perms, bits)] = 0
+    heap = [(start_h, 0, 0)]
+    expanded = 0
+    # histogram[g] = states expanded with g moves
+    histogram = []
+    peak_frontier = 1
+    aborted = None
+
+    try:
+        while heap:
+            peak_frontier = max(peak_frontier, len(heap))
+            _, neg_g, node = heapq.heappop(heap)
+            g = -neg_g
+            # every queued real state has its own `best` entry, so no symmetric_key
+            # here; a shorter path found to its mirror image costs one extra expansion
+            if best[states[node]] < g:
+                continue  # stale entry, a shorter path was found later
+            expanded += 1
+            check_budget(expanded, deadline, max_nodes)
+            if g == len(histogram):
+                histogram.append(0)
+            histogram[g] += 1
+            cells = unpack_state(states[node], num_robots, bits)
+            child_g = g + 1
+
+            for ridx in range(num_robots):
+                cell = cells[ridx]
+                # heuristic of the robots that stay put, shared by this robot's moves
+                others_h = min((dist[c] for i, c in enumerate(cells) if i != ridx), default=unreachable)
+                for didx, (dname, step, stops) in enumerate(moves):
+                    new_cell = slide_cell(stops, step, cols, cell, cells)
+                    if new_cell == cell:
+                        continue
+
+                    h = dist[new_cell]
+                    if others_h < h:
+                        h = others_h
+                    if h == unreachable:
+                        continue
+                    new_cells = list(cells)
+                    new_cells[ridx] = new_cell
+                    new_key = pack_positions(new_cells, bits)
+                    if best.get(new_key, unreachable * num_robots) <= child_g:
+                        continue
+                    best[new_key] = child_g
+                    if perms:
+                        seen = symmetric_key(new_cells, perms, bits)
+                        if seen != new_key:
+                            if best.get(seen, unreachable * num_robots) <= child_g:
+                                continue
+                            best[seen] = child_g
+
+                    states.append(new_key)
+                    parents.append(node)
+                    dirs.append(didx)
+                    if new_cell == target:
+                        if child_g == len(histogram):
+                            histogram.append(0)
+                        histogram[child_g] += 1
+                        return rebuild_moves(states, parents, dirs, len(states) - 1,
+                                             ctx.robots, num_robots, bits, cols)
+                    heapq.heappush(heap, (child_g + h, -child_g, len(states) - 1))
+
+        # no solution
+        return None
+    except SolveAborted as e:
+        aborted = e.reason
+        raise
+    finally:
+        if stats is not None:
+            stats.record(
+                expanded=expanded,
+                generated=len(states),
+                peak_frontier=peak_frontier,
+                depth_histogram=histogram,
+                wall_time=time.perf_counter() - started,
+                memory_bytes=estimate_memory(states, parents, dirs, best) + sys.getsizeof(heap),
+                aborted=aborted,
+            )
+
+def rebuild_moves(states, parents, dirs, node: int, robots: List[int],
+                  num_robots: int, bits: int, cols: int) -> List[Dict]:
+    """
+    Walk parent pointers back from `node` and replay the path forwards, mapping
+    each canonical (sorted) state change back to the original robot index.
+    """
+    path = []
+    while parents[node] != -1:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+
+    positions = list(robots)
+    result = []
+    for node in path:
+        before = set(unpack_state(states[parents[node]], num_robots, bits))
+        after = set(unpack_state(states[node], num_robots, bits))
+        (src,) = before - after
+        (dst,) = after - before
+        ridx = positions.index(src)
+        positions[ridx] = dst
+        result.append({
+            "robot": ridx,
+            "dir": list(DIRECTIONS)[dirs[node]],
+            "to": [dst % cols, dst // cols]
+        })
+    return result
+
+# Solver engines by name; every engine takes a SearchContext and optional
+# deadline (time.monotonic() value), SolverStats and node budget, and returns
+# an optimal move list or None (raising a SolveAborted when a budget runs out).
+SOLVERS = {
+    "bfs": solve_bfs,
+    "astar": solve_astar,
+}
+
+# method="auto" picks the engine benchmarks.py measured faster for the board:
+# with two robots target_distances barely prunes and the heap costs more than
+# it saves, with three or more (and on classic boards) A* expands far fewer states
+AUTO_SOLVER = "auto"
+
+def pick_solver(board: Dict) -> str:
+    """SOLVERS key that method="auto" uses for a board."""
+    return "astar" if len(board["robots"]) >= 3 else "bfs"
+
+def solve_board(board: Dict, method: str = AUTO_SOLVER,
+                deadline: Optional[float] = None,
+                stats: Optional[SolverStats] = None,
+                max_nodes: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    Solve a board with the engine registered under `method` in SOLVERS
+    (AUTO_SOLVER: the one pick_solver chooses).
+    Raises SolveTimeout if `deadline` (a time.monotonic() value) passes first, and
+    NodeBudgetExceeded after more than `max_nodes` expansions.
+    board: dict with keys: 'rows','cols','grid' (2D int list), 'robots' (list of [x,y]),
+           'target' (x,y)
+    Returns list of moves: [{ 'robot': i, 'dir': 'Right', 'to': [x,y] }, ...] or None.
+    """
+    if method == AUTO_SOLVER:
+        method = pick_solver(board)
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown solver {method!r}, expected {AUTO_SOLVER!r} or one of {sorted(SOLVERS)}")
+    return SOLVERS[method](prepare_search(board), deadline=deadline, stats=stats, max_nodes=max_nodes)
+
+# ----------------------------
+# All-targets search
+# ----------------------------
+
+class TargetTable:
+    """
+    Optimal move count and solution for every cell some robot can be moved to,
+    from one robot configuration (see solve_all_targets). Cells are (x, y).
+    """
+
+    def __init__(self, ctx: SearchContext, states, parents, dirs,
+                 nodes: Dict[int, int], depths: Dict[int, int], complete: bool):
+        self.ctx = ctx
+        self.states = states
+        self.parents = parents
+        self.dirs = dirs
+        self.nodes = nodes      # cell index -> first node with a robot on it
+        self.depths = depths    # cell index -> optimal move count
+        self.complete = complete  # False: cells missing from the table may still be reachable
+
+    def _cell(self, target) -> int:
+        x, y = target
+        return x + y * self.ctx.cols
+
+    def length(self, target) -> Optional[int]:
+        """Optimal move count for a target, or None if it wasn't reached."""
+        return self.depths.get(self._cell(target))
+
+    def solution(self, target) -> Optional[List[Dict]]:
+        """Optimal move list for a target (same format as solve_board), or None."""
+        node = self.nodes.get(self._cell(target))
+        if node is None:
+            return None
+        return rebuild_moves(self.states, self.parents, self.dirs, node, self.ctx.robots,
+                             len(self.ctx.robots), self.ctx.bits, self.ctx.cols)
+
+    def targets(self, min_moves: int = 0, max_moves: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Cells whose optimal move count is within min_moves..max_moves."""
+        cols = self.ctx.cols
+        return [(cell % cols, cell // cols) for cell, depth in sorted(self.depths.items())
+                if depth >= min_moves and (max_moves is None or depth <= max_moves)]
+
+    def difficulty_map(self) -> List[List[Optional[int]]]:
+        """difficulty[y][x] = optimal move count to get any robot onto (x, y) (None = not reached)."""
+        cols = self.ctx.cols
+        return [[self.depths.get(x + y * cols) for x in range(cols)] for y in range(self.ctx.rows)]
+
+def solve_all_targets(board: Dict, max_depth: Optional[int] = None,
+                      deadline: Optional[float] = None,
+                      stats: Optional[SolverStats] = None,
+                      max_nodes: Optional[int] = None) -> TargetTable:
+    """
+    One BFS from the board's robots that records, for every cell, the first
+    (so shortest) path that stops a robot on it. The board's own target is
+    ignored. The search ends when every enterable cell is covered, the state space is
+    exhausted, or it passes `max_depth` moves. Running out of deadline or node
+    budget doesn't raise: the table found so far is returned with
+    complete=False, and every entry in it is still optimal.
+    """
+    ctx = prepare_search(board)
+    cols, bits, moves = ctx.cols, ctx.bits, ctx.moves
+    num_robots = len(ctx.robots)
+    started = time.perf_counter()
+
+    states = array("Q", [pack_positions(ctx.robots, bits)])
+    parents = array("l", [-1])
+    dirs = array("B", [0])
+    visited = {states[0]}
+    nodes = {cell: 0 for cell in ctx.robots}
+    depths = {cell: 0 for cell in ctx.robots}
+    # cells a robot can ever stand on: its start, or any cell with an open side
+    # (walled-in cells such as the classic centre block can't be entered)
+    cell_count = len(set(ctx.robots) | {
+        cell for cell in range(ctx.rows * ctx.cols)
+        if any(stops[cell] != cell for _, _, stops in moves)
+    })
+    head = 0
+    level_end = 1
+    depth = 0
+    histogram = [1]
+    peak_frontier = 1
+    aborted = None
+
+    try:
+        while head < len(states) and len(depths) < cell_count:
+            if head == level_end:
+                depth += 1
+                level_end = len(states)
+                histogram.append(level_end - head)
+                peak_frontier = max(peak_frontier, level_end - head)
+            if max_depth is not None and depth >= max_depth:
+                break
+            check_budget(head + 1, deadline, max_nodes)
+            cells = unpack_state(states[head], num_robots, bits)
+
+            for ridx in range(num_robots):
+                cell = cells[ridx]
+                for didx, (dname, step, stops) in enumerate(moves):
+                    new_cell = slide_cell(stops, step, cols, cell, cells)
+                    if new_cell == cell:
+                        continue
+
+                    new_cells = list(cells)
+                    new_cells[ridx] = new_cell
+                    key = pack_positions(new_cells, bits)
+                    if key in visited:
+                        continue
+                    visited.add(key)
+
+                    states.append(key)
+                    parents.append(head)
+                    dirs.append(didx)
+                    if new_cell not in depths:
+                        nodes[new_cell] = len(states) - 1
+                        depths[new_cell] = depth + 1
+            head += 1
+    except SolveAborted as e:
+        aborted = e.reason
+    finally:
+        if stats is not None:
+            stats.record(
+                expanded=head,
+                generated=len(states),
+                peak_frontier=peak_frontier,
+                depth_histogram=histogram,
+                wall_time=time.perf_counter() - started,
+                memory_bytes=estimate_memory(states, parents, dirs, visited),
+                aborted=aborted,
+            )
+
+    complete = head >= len(states) or len(depths) == cell_count
+    return TargetTable(ctx, states, parents, dirs, nodes, depths, complete)
@@ -0,0 +1,74 @@
+"""
+Startup cost of the server, phase by phase.
+
+    python startup.py            # print a JSON report
+    STARTUP_TIMING=1 gunicorn -k eventlet -w 1 "app:create_app()"   # log it from a real worker
+
+The report covers the imports app.py does (in its own order), create_app(),
+the DB setup that runs on the first socket connect (ensure_ready), and the
+first board generated in-process and in a freshly spawned board worker.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+class StartupTimer:
+    """Wall-clock seconds per named startup phase, in the order they ran."""
+
+    def __init__(self):
+        self.phases: List[Dict] = []
+        self.last = time.perf_counter()
+        self.enabled = os.environ.get("STARTUP_TIMING") == "1"
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous mark (or measure) as phase `name`."""
+        now = time.perf_counter()
+        self.phases.append({"phase": name, "seconds": now - self.last})
+        self.last = now
+
+    @contextmanager
+    def measure(self, name: str):
+        self.last = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    def report(self) -> Dict:
+        return {
+            "phases": list(self.phases),
+            "total_seconds": sum(p["seconds"] for p in self.phases),
+        }
+
+    def log(self, label: str) -> None:
+        """Print the report in STARTUP_TIMING=1 mode."""
+        if self.enabled:
+            print(f"startup timing ({label}):", json.dumps(self.report()), file=sys.stderr)
+
+timer = StartupTimer()
+
+def main() -> int:
+    # app.py imports this file as `startup`, a different module from __main__
+    from startup import timer
+    import app as server  # import phases are marked inside app.py
+
+    flask_app = server.create_app()
+    with flask_app.app_context():
+        server.ensure_ready()
+
+    from boards import generate_solvable_board
+    from workers import submit_board, wait_for_board
+    kwargs = server.board_pool.board_kwargs
+    with timer.measure("first board (generate + solve, in-process)"):
+        generate_solvable_board(**kwargs)
+    with timer.measure("first pooled board (spawn worker + generate + solve)"):
+        wait_for_board(submit_board(**kwargs), kwargs["time_limit"] + 5, sleep=server.socketio.sleep)
+
+    print(json.dumps(timer.report(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
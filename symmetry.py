@@ -0,0 +1,82 @@
+from typing import Dict, List, NamedTuple, Tuple
+
+# ----------------------------
+# Board symmetries
+# ----------------------------
+# The 8 symmetries of the square (4 of them keep a non-square board's shape):
+# an optional transpose (x, y) -> (y, x), then optional mirrors of x and y.
+# Slides commute with every one of them: a wall on one side of a cell becomes a
+# wall on the mapped side of the mapped cell, so a board and its image have the
+# same optimal move count and their solutions map move for move.
+
+class Symmetry(NamedTuple):
+    transpose: bool
+    mirror_x: bool
+    mirror_y: bool
+
+SYMMETRIES = [Symmetry(t, mx, my) for t in (False, True) for mx in (False, True) for my in (False, True)]
+IDENTITY = SYMMETRIES[0]
+
+# wall bit (1=N, 2=E, 4=S, 8=W) -> unit vector through that side
+WALL_VECTORS = {1: (0, -1), 2: (1, 0), 4: (0, 1), 8: (-1, 0)}
+_WALL_BITS = {vector: bit for bit, vector in WALL_VECTORS.items()}
+
+def inverse(sym: Symmetry) -> Symmetry:
+    # mirroring x before a transpose is mirroring y after it
+    return Symmetry(True, sym.mirror_y, sym.mirror_x) if sym.transpose else sym
+
+def transform_shape(sym: Symmetry, rows: int, cols: int) -> Tuple[int, int]:
+    """(rows, cols) of the image of a rows x cols board."""
+    return (cols, rows) if sym.transpose else (rows, cols)
+
+def transform_cell(sym: Symmetry, x: int, y: int, rows: int, cols: int) -> Tuple[int, int]:
+    """Image of (x, y) on a rows x cols board."""
+    if sym.transpose:
+        x, y, rows, cols = y, x, cols, rows
+    if sym.mirror_x:
+        x = cols - 1 - x
+    if sym.mirror_y:
+        y = rows - 1 - y
+    return x, y
+
+def transform_vector(sym: Symmetry, dx: int, dy: int) -> Tuple[int, int]:
+    if sym.transpose:
+        dx, dy = dy, dx
+    return (-dx if sym.mirror_x else dx), (-dy if sym.mirror_y else dy)
+
+def transform_walls(sym: Symmetry, bits: int) -> int:
+    mapped = 0
+    for bit, vector in WALL_VECTORS.items():
+        if bits & bit:
+            mapped |= _WALL_BITS[transform_vector(sym, *vector)]
+    return mapped
+
+def cell_permutation(sym: Symmetry, rows: int, cols: int) -> List[int]:
+    """perm[y*cols + x] = index of the image cell, on the image's own columns."""
+    image_cols = transform_shape(sym, rows, cols)[1]
+    perm = []
+    for y in range(rows):
+        for x in range(cols):
+            nx, ny = transform_cell(sym, x, y, rows, cols)
+            perm.append(nx + ny * image_cols)
+    return perm
+
+# sym -> mapped bits for every 4-bit wall mask
+_WALL_TABLES = {sym: [transform_walls(sym, bits) for bits in range(16)] for sym in SYMMETRIES}
+
+def transform_board(board: Dict, sym: Symmetry) -> Dict:
+    """Image of a board's solver fields (rows, cols, grid, robots in the same order, target)."""
+    grid = board["grid"]
+    rows, cols = len(grid), len(grid[0])
+    image_rows, image_cols = transform_shape(sym, rows, cols)
+    walls = _WALL_TABLES[sym]
+    cells = [0] * (rows * cols)
+    for index, image_index in enumerate(cell_permutation(sym, rows, cols)):
+        cells[image_index] = walls[grid[index // cols][index % cols]]
+    return {
+        "rows": image_rows,
+        "cols": image_cols,
+        "grid": [cells[y * image_cols:(y + 1) * image_cols] for y in range(image_rows)],
+        "robots": [transform_cell(sym, x, y, rows, cols) for x, y in board["robots"]],
+        "target": transform_cell(sym, *board["target"], rows, cols),
+    }
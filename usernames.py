@@ -0,0 +1,88 @@
+import re
+from typing import Optional, Set
+
+from models import NAME_COUNTER
+from persistence import reserve_block
+
+# ----------------------------
+# Generated username allocator
+# ----------------------------
+ADJECTIVES = ["Fast", "Red", "Clever", "Sneaky", "Brave", "Quick", "Fuzzy"]
+NOUNS = ["Tiger", "Robot", "Wizard", "Ninja", "Eagle", "Panther", "Fox"]
+NAME_SPACE = len(ADJECTIVES) * len(NOUNS) * 10000
+
+# index -> (MULTIPLIER * index + OFFSET) % NAME_SPACE is a permutation of the
+# name space (the multiplier is coprime with 2, 5 and 7), so consecutive
+# counters give unique names that don't look sequential
+MULTIPLIER = 104729
+OFFSET = 271828
+INVERSE = pow(MULTIPLIER, -1, NAME_SPACE)
+
+NAME_PATTERN = re.compile(r"^(%s)(%s)(\d{4,})$" % ("|".join(ADJECTIVES), "|".join(NOUNS)))
+
+def name_for(counter: int) -> str:
+    """Username for a counter value; distinct counters always give distinct names."""
+    if counter >= NAME_SPACE:
+        # name space used up: the counter itself is wider than 4 digits, so unique
+        index = counter
+        return f"{ADJECTIVES[index % len(ADJECTIVES)]}{NOUNS[(index // len(ADJECTIVES)) % len(NOUNS)]}{counter}"
+    index = (MULTIPLIER * counter + OFFSET) % NAME_SPACE
+    adj = ADJECTIVES[index % len(ADJECTIVES)]
+    noun = NOUNS[(index // len(ADJECTIVES)) % len(NOUNS)]
+    number = index // (len(ADJECTIVES) * len(NOUNS))
+    return f"{adj}{noun}{number:04d}"
+
+def counter_of(username: str) -> Optional[int]:
+    """The counter name_for turns into `username`, None if no counter does."""
+    match = NAME_PATTERN.match(username)
+    if match is None:
+        return None
+    adj, noun, number = match.groups()
+    if len(number) > 4:
+        counter = int(number)
+    else:
+        index = ADJECTIVES.index(adj) + len(ADJECTIVES) * (NOUNS.index(noun) + len(NOUNS) * int(number))
+        counter = (index - OFFSET) * INVERSE % NAME_SPACE
+    return counter if name_for(counter) == username else None
+
+class UsernameAllocator:
+    """
+    Hands out generated usernames without asking the DB whether they are free.
+
+    Counters come in blocks reserved with one atomic UPDATE on the NameCounter
+    row, so every worker process draws from its own range and two workers never
+    produce the same name; generated names need no bookkeeping. A name a client
+    picked in this worker whose counter is still ahead of ours is kept in
+    `reserved` until the counter comes up and the name is skipped, or until we
+    move past it to a later block (another worker drew it). Names picked
+    before a restart or in another worker aren't loaded: the caller checks
+    every generated name against the Player table (see app.handle_join_game).
+    """
+
+    def __init__(self, block_size: int = 100):
+        self.block_size = block_size
+        self.reserved: Set[str] = set()
+        self.next = 0
+        self.end = 0
+
+    def reserve(self, username: str) -> None:
+        """Remember a picked name that a generated name could still collide with."""
+        counter = counter_of(username)
+        if counter is not None and counter >= self.next:
+            self.reserved.add(username)
+
+    def _reserve_block(self) -> None:
+        self.next, self.end = reserve_block(NAME_COUNTER, self.block_size)
+
+    def allocate(self) -> str:
+        """A username no other allocator (in any process) has handed out."""
+        while True:
+            if self.next >= self.end:
+                self._reserve_block()
+                # counters skipped between our blocks went to other workers
+                self.reserved = {name for name in self.reserved if counter_of(name) >= self.next}
+            username = name_for(self.next)
+            self.next += 1
+            if username not in self.reserved:
+                return username
+            self.reserved.discard(username)  # its counter won't come up again
@@ -0,0 +1,61 @@
+from conftest import connect, received
+from persistence import PlayerIdCache
+from usernames import NAME_PATTERN, UsernameAllocator, counter_of, name_for
+
+class LocalAllocator(UsernameAllocator):
+    """Counter blocks from memory instead of the NameCounter row."""
+    counter = 0
+
+    def _reserve_block(self):
+        self.next, self.end = LocalAllocator.counter, LocalAllocator.counter + self.block_size
+        LocalAllocator.counter = self.end
+
+def test_generated_names_are_unique_and_not_kept():
+    LocalAllocator.counter = 0
+    allocator = LocalAllocator(block_size=10)
+    names = [allocator.allocate() for _ in range(1000)]
+    assert len(set(names)) == 1000
+    assert all(NAME_PATTERN.match(name) for name in names)
+    assert [counter_of(name) for name in names] == list(range(1000))
+    assert allocator.reserved == set()
+
+def test_picked_names_are_skipped_then_forgotten():
+    LocalAllocator.counter = 0
+    allocator = LocalAllocator()
+    for name in (name_for(3), "Kevin", name_for(5)):
+        allocator.reserve(name)
+    assert allocator.allocate() == name_for(0)
+    assert allocator.reserved == {name_for(3), name_for(5)}
+    names = [allocator.allocate() for _ in range(5)]
+    assert names == [name_for(i) for i in (1, 2, 4, 6, 7)]
+    assert allocator.reserved == set()
+
+def test_names_behind_the_counter_are_not_kept():
+    LocalAllocator.counter = 0
+    allocator = LocalAllocator(block_size=10)
+    allocator.allocate()
+    for counter in (0, 5, 15, 25):
+        allocator.reserve(name_for(counter))
+    assert allocator.reserved == {name_for(5), name_for(15), name_for(25)}
+    LocalAllocator.counter = 20  # another worker drew [10, 20)
+    names = [allocator.allocate() for _ in range(9)]
+    assert names == [name_for(i) for i in (1, 2, 3, 4, 6, 7, 8, 9, 20)]
+    assert allocator.reserved == {name_for(25)}
+
+def join(server):
+    client = connect(server)
+    client.emit("join_game", {"max_players": 4})
+    (seat,) = received(client, "game_session")
+    return seat["username"]
+
+def test_a_restart_checks_picked_names_instead_of_loading_them(server):
+    picked = connect(server)
+    picked.emit("join_game", {"username": name_for(101), "max_players": 4})
+    assert join(server) == name_for(0)  # the first block is [0, 100)
+    server.write_behind.flush()
+
+    # a restarted worker: nothing in memory, the same DB
+    server.username_allocator = UsernameAllocator()
+    server.player_ids = PlayerIdCache()
+    assert [join(server), join(server)] == [name_for(100), name_for(102)]
+    assert server.username_allocator.reserved == set()
@@ -1,3 +1,4 @@
+# Quick look at a small DB; for analysis at scale use export.py (batched, incremental).
 import sqlite3
 
 DB_PATH = "./instance/game.db"  # change this if your DB is elsewhere
@@ -0,0 +1,97 @@
+import struct
+from typing import Dict, List, Tuple
+
+from game_state import DIRECTION_INDEX
+from solver import DIRECTIONS
+
+# ----------------------------
+# Compact binary wire format
+# ----------------------------
+# Opt-in alternative to the JSON payloads of game_start / game_update.
+# Cells are indexes y * cols + x, directions are their position in
+# solver.DIRECTIONS (Down, Up, Left, Right).
+#
+#   board:  rows (u8) | cols (u8) | robot count (u8)
+#           | robot cells (u16 each) | target cell (u16)
+#           | grid wall masks, 4-bit nibbles row-major, high nibble first
+#           [ | target count (u8) | target cells (u16 each) ]
+#           (the trailer is only present for boards with a "targets" list)
+#   move:   one byte, robot << 2 | direction
+#   moves:  one move byte per move (a solution)
+#   delta:  move (u8) | to cell (u16) | moves so far (u32) | solved (u8)
+#
+# Reset updates ({"reset": true}) and every other event stay JSON.
+#
+# Multi-byte fields are big-endian.
+
+ENCODINGS = ("json", "compact")
+
+DIRECTION_NAMES = list(DIRECTIONS)
+
+_BOARD_HEADER = struct.Struct(">BBB")
+_DELTA = struct.Struct(">BHIB")
+
+def encode_board(board: Dict) -> bytes:
+    rows, cols = board["rows"], board["cols"]
+    cells = [y * cols + x for x, y in board["robots"]]
+    tx, ty = board["target"]
+    cells.append(ty * cols + tx)
+
+    walls = [w for row in board["grid"] for w in row]
+    if len(walls) % 2:
+        walls.append(0)
+    nibbles = bytes((walls[i] << 4) | walls[i + 1] for i in range(0, len(walls), 2))
+
+    data = (_BOARD_HEADER.pack(rows, cols, len(board["robots"]))
+            + struct.pack(f">{len(cells)}H", *cells)
+            + nibbles)
+    if "targets" in board:
+        targets = [y * cols + x for x, y in board["targets"]]
+        data += bytes([len(targets)]) + struct.pack(f">{len(targets)}H", *targets)
+    return data
+
+def decode_board(data: bytes) -> Dict:
+    rows, cols, num_robots = _BOARD_HEADER.unpack_from(data)
+    offset = _BOARD_HEADER.size
+    cells = struct.unpack_from(f">{num_robots + 1}H", data, offset)
+    offset += 2 * (num_robots + 1)
+
+    walls = []
+    nibble_bytes = (rows * cols + 1) // 2
+    for byte in data[offset:offset + nibble_bytes]:
+        walls.append(byte >> 4)
+        walls.append(byte & 0xF)
+    offset += nibble_bytes
+    grid = [walls[y * cols:(y + 1) * cols] for y in range(rows)]
+    xy = [(cell % cols, cell // cols) for cell in cells]
+    board = {"rows": rows, "cols": cols, "grid": grid, "robots": xy[:-1], "target": xy[-1]}
+
+    if offset < len(data):
+        count = data[offset]
+        targets = struct.unpack_from(f">{count}H", data, offset + 1)
+        board["targets"] = [(cell % cols, cell // cols) for cell in targets]
+    return board
+
+def encode_move(robot: int, direction: str) -> int:
+    return (robot << 2) | DIRECTION_INDEX[direction]
+
+def decode_move(byte: int) -> Tuple[int, str]:
+    return byte >> 2, DIRECTION_NAMES[byte & 3]
+
+def encode_moves(moves: List[Dict]) -> bytes:
+    return bytes(encode_move(m["robot"], m["dir"]) for m in moves)
+
+def decode_moves(data: bytes) -> List[Dict]:
+    return [dict(zip(("robot", "dir"), decode_move(byte))) for byte in data]
+
+def encode_delta(delta: Dict, cols: int) -> bytes:
+    """A GameState.apply_move delta."""
+    x, y = delta["to"]
+    return _DELTA.pack(encode_move(delta["robot"], delta["dir"]), y * cols + x,
+                       delta["moves"], delta["solved"])
+
+def decode_delta(data: bytes, cols: int) -> Dict:
+    move, cell, moves, solved = _DELTA.unpack(data)
+    robot, direction = decode_move(move)
+    return {"robot": robot, "dir": direction, "to": [cell % cols, cell // cols],
+            "moves": moves, "solved": bool(solved)}
@@ -0,0 +1,52 @@
+from boards import generate_classic_board
+from conftest import connect, received
+from wire import (decode_board, decode_delta, decode_move, decode_moves, encode_board, encode_delta,
+                  encode_move, encode_moves)
+
+def as_lists(board):
+    """decode_board gives (x, y) tuples; compare boards as JSON would see them."""
+    return {key: [list(v) for v in value] if key in ("robots", "targets") else
+            list(value) if key == "target" else value
+            for key, value in board.items()}
+
+def test_board_round_trip(board):
+    decoded = decode_board(encode_board(board))
+    assert as_lists(decoded) == as_lists(board)
+    assert "targets" not in decoded
+
+def test_classic_board_round_trip_keeps_its_targets():
+    board = generate_classic_board(4)
+    assert as_lists(decode_board(encode_board(board))) == as_lists(board)
+
+def test_odd_cell_count_round_trip(board):
+    board = {**board, "rows": 3, "cols": 3, "grid": [[9, 1, 3], [8, 0, 2], [12, 4, 6]],
+             "robots": [[0, 0], [2, 1]], "target": [1, 2]}
+    assert as_lists(decode_board(encode_board(board))) == as_lists(board)
+
+def test_moves_round_trip(solution):
+    assert encode_move(5, "Right") == 5 << 2 | 3
+    assert decode_move(encode_move(5, "Right")) == (5, "Right")
+    packed = encode_moves(solution)
+    assert len(packed) == len(solution)
+    assert decode_moves(packed) == [{"robot": m["robot"], "dir": m["dir"]} for m in solution]
+
+def test_delta_round_trip():
+    delta = {"robot": 2, "dir": "Left", "to": [15, 15], "moves": 70000, "solved": True}
+    assert decode_delta(encode_delta(delta, 16), 16) == delta
+
+def test_compact_clients_get_binary_payloads(server, board, solution):
+    compact, plain = connect(server), connect(server)
+    compact.emit("join_game", {"username": "alice", "encoding": "compact"})
+    plain.emit("join_game", {"username": "bob"})
+    (start,) = received(compact, "game_start")
+    (plain_start,) = received(plain, "game_start")
+    assert as_lists(decode_board(start["board"])) == as_lists(plain_start["board"])
+    assert decode_moves(start["solution"]) == [{"robot": m["robot"], "dir": m["dir"]} for m in solution]
+
+    move = solution[0]
+    compact.emit("move", {"game_id": start["game_id"], "move": bytes([encode_move(move["robot"], move["dir"])])})
+    (update,) = received(compact, "game_update")
+    assert decode_delta(update["move"], board["cols"]) == {
+        "robot": move["robot"], "dir": move["dir"], "to": move["to"], "moves": 1, "solved": False}
+    (plain_update,) = received(plain, "game_update")
+    assert plain_update["move"]["to"] == move["to"]
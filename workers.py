@@ -0,0 +1,93 @@
+import atexit
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from boards import generate_solvable_board, LayoutTargets
+
+# ----------------------------
+# Process pool for board generation + solving
+# ----------------------------
+# The solver is pure CPU, so it runs in worker processes instead of the
+# eventlet loop. Workers are spawned (not forked) so they never inherit the
+# monkey-patched hub or open DB connections of the server process.
+BOARD_WORKERS = int(os.environ.get("BOARD_WORKERS", os.cpu_count() or 1))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_shut_down = False
+
+class PoolShutDown(RuntimeError):
+    """The pool was stopped by shutdown_executor (the server is exiting); no new jobs."""
+
+def get_executor() -> ProcessPoolExecutor:
+    """Create the shared pool on first use, bounded to BOARD_WORKERS processes."""
+    global _executor
+    if _shut_down:
+        raise PoolShutDown("board worker pool is shut down")
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=BOARD_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+def shutdown_executor() -> None:
+    """Cancel queued jobs and stop the pool, waiting for running jobs (bounded by their time limit)."""
+    global _executor, _shut_down
+    _shut_down = True
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+# stop workers explicitly: the pool's default exit hook hangs on the
+# green management thread once eventlet has monkey-patched threading
+atexit.register(shutdown_executor)
+
+def discard_executor(executor: ProcessPoolExecutor) -> None:
+    """
+    Drop a pool that broke because a worker died (OOM, kill): every job on it
+    fails with BrokenProcessPool, so the next get_executor starts a new one.
+    """
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def submit_board(**kwargs) -> Future:
+    """
+    Queue a generate_solvable_board(**kwargs) call on the pool, replacing the
+    pool once if it is broken. Raises PoolShutDown after shutdown_executor, and
+    BrokenProcessPool if the new pool is broken too.
+    """
+    executor = get_executor()
+    try:
+        return executor.submit(generate_solvable_board, **kwargs)
+    except BrokenProcessPool as e:
+        print("Board worker pool broken, starting a new one:", e)
+        discard_executor(executor)
+    return get_executor().submit(generate_solvable_board, **kwargs)
+
+def wait_for_board(future: Future, timeout: float, sleep: Callable[[float], None] = time.sleep,
+                   poll_interval: float = 0.05) -> Optional[Tuple[Dict, List[Dict], Dict, Optional[LayoutTargets]]]:
+    """
+    Wait for a submit_board future without blocking the event loop: `sleep` should be
+    a cooperative sleep such as socketio.sleep. Returns (board, solution, stats, layout), or None if
+    the job timed out, gave up or failed; a job still queued at the timeout is cancelled.
+    """
+    deadline = time.monotonic() + timeout
+    while not future.done():
+        if time.monotonic() > deadline:
+            future.cancel()
+            return None
+        sleep(poll_interval)
+
+    if future.cancelled():
+        return None
+    if future.exception() is not None:
+        # a BrokenProcessPool here is replaced by the next submit_board
+        print("Board job failed:", repr(future.exception()))
+        return None
+    return future.result()
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+import workers
+from board_pool import BoardPool
+from conftest import connect, received
+from workers import BrokenProcessPool, PoolShutDown, submit_board, wait_for_board
+
+BOARD_JOB = {"rows": 6, "cols": 6, "num_robots": 2, "min_moves": 1, "time_limit": 30}
+
+def break_pool():
+    """Kill a worker of the current pool and wait until the pool notices."""
+    executor = workers.get_executor()
+    assert wait_for_board(executor.submit(time.sleep, 0), 60) is None  # workers are up
+    next(iter(executor._processes.values())).kill()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            executor.submit(time.sleep, 0)
+        except BrokenProcessPool:
+            return executor
+        time.sleep(0.05)
+    pytest.fail("pool didn't break")
+
+@pytest.fixture
+def pool_state():
+    yield
+    workers._shut_down = False
+
+def test_submit_board_replaces_a_broken_pool(pool_state):
+    broken = break_pool()
+    result = wait_for_board(submit_board(**BOARD_JOB), 60)
+    assert result is not None
+    assert workers._executor is not broken
+
+def test_board_pool_refills_after_the_pool_broke(pool_state):
+    break_pool()
+    pool = BoardPool(low=1, high=1, max_in_flight=1, board_kwargs={"rows": 6, "cols": 6, "num_robots": 2})
+    pool.step()
+    assert len(pool.in_flight) == 1
+    assert wait_for_board(pool.in_flight[0], 60) is not None
+
+def test_no_jobs_after_shutdown(pool_state):
+    workers.shutdown_executor()
+    with pytest.raises(PoolShutDown):
+        submit_board(**BOARD_JOB)
+    pool = BoardPool(board_kwargs={"rows": 6, "cols": 6, "num_robots": 2})
+    pool.step()
+    assert pool.in_flight == []
+
+def test_join_ends_the_game_with_an_error_when_no_board_job_can_be_queued(server, monkeypatch):
+    def broken(**kwargs):
+        raise BrokenProcessPool("workers can't start")
+
+    server.board_pool.pop()  # the pool is empty: the board has to be generated on demand
+    monkeypatch.setattr(server, "submit_board", broken)
+    alice, bob = connect(server), connect(server)
+    alice.emit("join_game", {"username": "alice"})
+    bob.emit("join_game", {"username": "bob"})
+    (ended,) = received(bob, "end_game")
+    assert ended["message"] == "Could not generate a board, please rejoin."
+    assert server.game_states == {}